@@ -0,0 +1,143 @@
+"""
+Class that stores the decoded assets in a single bundle file
+The build step decodes the PNGs at the sizes used by the game and stores raw RGBA pixels
+At runtime the bundle is memory-mapped and the surfaces are created directly
+on top of the mapped pixels, without decoding or copying
+Entries whose PNG has changed since the build are ignored
+"""
+import mmap
+import os
+import struct
+from typing import Dict, Iterable, Tuple
+import pygame
+from app.core.texture_atlas import copy_image
+
+MAGIC = b'CBAB'
+VERSION = 1
+
+# magic, version, number of entries
+HEADER = struct.Struct('<4sHI')
+# width, height, modification time of the PNG, offset of the pixels
+ENTRY = struct.Struct('<HHQQ')
+
+
+class AssetBundle:
+    """Class that stores the decoded assets in a single bundle file"""
+
+    def __init__(self, path: str, asset_dir: str):
+        """
+        Map the bundle and read its index
+        :param path: path to the bundle
+        :param asset_dir: directory with the PNGs used to check the entries are up to date
+        """
+        self.path = path
+        with open(path, 'rb') as file:
+            self._data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._data)
+
+        magic, version, count = HEADER.unpack_from(self._data, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f'Unsupported asset bundle: {path}')
+
+        self._entries = self._read_index(count, asset_dir)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __enter__(self) -> 'AssetBundle':
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Release the mapped file, all surfaces created from the bundle must be deleted before
+        """
+        self._view.release()
+        self._data.close()
+
+    def _read_index(self, count: int, asset_dir: str) -> Dict[Tuple[str, Tuple[int, int]], int]:
+        """
+        Read the index following the header
+        :param count: number of entries
+        :param asset_dir: directory with the PNGs
+        :return: {(asset name, (width, height)): offset of the pixels}
+        """
+        mtimes = {}
+        entries = {}
+        offset = HEADER.size
+        for _ in range(count):
+            length = self._data[offset]
+            name = self._data[offset + 1:offset + 1 + length].decode('utf-8')
+            width, height, mtime, pixels = ENTRY.unpack_from(self._data, offset + 1 + length)
+            offset += 1 + length + ENTRY.size
+
+            if name not in mtimes:
+                try:
+                    mtimes[name] = os.stat(os.path.join(asset_dir, name)).st_mtime_ns
+                except OSError:
+                    mtimes[name] = None
+            # Skip the outdated entries, the PNG will be used instead
+            if mtimes[name] == mtime:
+                entries[(name, (width, height))] = pixels
+        return entries
+
+    def get(self, asset_name: str, size: Tuple[int, int]) -> pygame.Surface | None:
+        """
+        Create the surface on top of the mapped pixels
+        :param asset_name: filename of the asset
+        :param size: (width, height) of the image
+        :return: RGBA surface or None if the image is not in the bundle
+        """
+        offset = self._entries.get((asset_name, size))
+        if offset is None:
+            return None
+        length = size[0] * size[1] * 4
+        return pygame.image.frombuffer(self._view[offset:offset + length], size, 'RGBA')
+
+    @staticmethod
+    def build(path: str, asset_dir: str, requests: Iterable[Tuple[str, Tuple[int, int]]]) -> int:
+        """
+        Decode the assets and write them into a new bundle
+        :param path: path to the bundle
+        :param asset_dir: directory with the PNGs
+        :param requests: (asset name, (width, height)) pairs to store
+        :return: number of stored images
+        """
+        requests = sorted(set(requests))
+        names = [name.encode('utf-8') for name, _ in requests]
+
+        # The pixels follow the index, aligned to 16 bytes
+        offset = HEADER.size + sum(1 + len(name) + ENTRY.size for name in names)
+        padding = bytes(-offset % 16)
+        offset += len(padding)
+
+        index = bytearray()
+        data = bytearray()
+        for (name, size), encoded in zip(requests, names):
+            image_path = os.path.join(asset_dir, name)
+            rgba = pygame.Surface(size, pygame.SRCALPHA)
+            rgba.fill((0, 0, 0, 0))
+            copy_image(rgba, pygame.transform.scale(pygame.image.load(image_path), size),
+                       rgba.get_rect())
+
+            index += bytes((len(encoded),)) + encoded
+            index += ENTRY.pack(size[0], size[1], os.stat(image_path).st_mtime_ns,
+                                offset + len(data))
+            raw = pygame.image.tobytes(rgba, 'RGBA')
+            data += raw + bytes(-len(raw) % 16)
+
+        with open(path, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, VERSION, len(requests)) + index + padding + data)
+        return len(requests)
+
+
+if __name__ == '__main__':
+    # Build the bundle: python -m app.core.asset_bundle
+    from app.core.config import Config
+
+    Config.import_from_json()
+    stored = AssetBundle.build(Config.BUNDLE_PATH, Config.ASSET_DIR, Config.get_image_requests())
+    print(f'Stored {stored} images in {Config.BUNDLE_PATH}')
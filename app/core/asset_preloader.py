@@ -0,0 +1,59 @@
+"""
+Class that decodes the images on a thread pool
+The decoding runs in the background while the main thread renders the loading screen
+The decoded images are stored into the image cache on the main thread,
+so the entities never read from the disk during the game
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Tuple
+
+
+class AssetPreloader:
+    """Class that decodes the images on a thread pool"""
+
+    def __init__(self, requests: List[Tuple[str, Tuple[int, int]]], decode: Callable,
+                 workers: int = None):
+        """
+        :param requests: (asset name, (width, height)) pairs to decode
+        :param decode: callable(asset name, (width, height)) returning decoded image
+        :param workers: number of threads, picked by the executor if None
+        """
+        self.requests = list(dict.fromkeys(requests))
+        self._decode = decode
+        self._workers = workers
+        self._futures = []
+
+    def start(self) -> None:
+        """
+        Submit all the images to the thread pool
+        """
+        executor = ThreadPoolExecutor(max_workers=self._workers,
+                                      thread_name_prefix='asset-preloader')
+        self._futures = [executor.submit(self._decode, name, size)
+                         for name, size in self.requests]
+        # The submitted images are still decoded, only the start does not wait for them
+        executor.shutdown(wait=False)
+
+    def progress(self) -> float:
+        """
+        :return: part of the images that are decoded, between 0 and 1
+        """
+        if not self._futures:
+            return 1.0
+        return sum(future.done() for future in self._futures) / len(self._futures)
+
+    def done(self) -> bool:
+        """
+        :return: True if all images are decoded
+        """
+        return all(future.done() for future in self._futures)
+
+    def store(self, store_image: Callable) -> int:
+        """
+        Wait for the remaining images and pass them to the cache
+        :param store_image: callable(asset name, (width, height), image)
+        :return: number of stored images
+        """
+        for (name, size), future in zip(self.requests, self._futures):
+            store_image(name, size, future.result())
+        return len(self._futures)
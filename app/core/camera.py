@@ -0,0 +1,63 @@
+"""
+Class that handles the part of the map visible on the screen
+The camera follows the player over the maps larger than the window
+Only the cells and entities intersecting the viewport have to be drawn
+"""
+from typing import Tuple
+import pygame
+
+
+class Camera:
+    """Class that handles the part of the map visible on the screen"""
+
+    def __init__(self, view_size: Tuple[int, int], world_size: Tuple[int, int]):
+        """
+        :param view_size: (width, height) of the viewport on the screen in pixels
+        :param world_size: (width, height) of the map in pixels
+        """
+        # Visible part of the map in the map coordinates
+        self.rect = pygame.Rect((0, 0), view_size)
+        self.world = pygame.Rect((0, 0), world_size)
+
+    @property
+    def scrolling(self) -> bool:
+        """
+        :return: True if the map does not fit into the viewport
+        """
+        return self.world.width > self.rect.width or self.world.height > self.rect.height
+
+    def follow(self, target: pygame.Rect) -> None:
+        """
+        Center the viewport on the target, the viewport does not leave the map
+        :param target: hitbox of the followed entity
+        """
+        self.rect.center = target.center
+        self.rect.x = max(0, min(self.rect.x, self.world.width - self.rect.width))
+        self.rect.y = max(0, min(self.rect.y, self.world.height - self.rect.height))
+
+    def apply(self, rect: pygame.Rect) -> pygame.Rect:
+        """
+        Transform the map coordinates to the screen coordinates
+        :param rect: rect in the map coordinates
+        :return: moved rect
+        """
+        return rect.move(-self.rect.x, -self.rect.y)
+
+    def is_visible(self, rect: pygame.Rect) -> bool:
+        """
+        :param rect: rect in the map coordinates
+        :return: True if the rect intersects the viewport
+        """
+        return self.rect.colliderect(rect)
+
+    def visible_cells(self, cell_size: int) -> Tuple[range, range]:
+        """
+        Retrieve the cells intersecting the viewport
+        :param cell_size: size of the cell in pixels
+        :return: range of columns, range of rows
+        """
+        columns = range(max(self.rect.left // cell_size, 0),
+                        min(-(-self.rect.right // cell_size), self.world.width // cell_size))
+        rows = range(max(self.rect.top // cell_size, 0),
+                     min(-(-self.rect.bottom // cell_size), self.world.height // cell_size))
+        return columns, rows
@@ -2,65 +2,152 @@
 # pylint: disable=no-member
 """This Class is responsible for aggregating the constants"""
 import os
-import random as rand
 import json
-from typing import Tuple
+from typing import List, Tuple
 
+import pygame.display
 import pygame.font
 import pygame.image
 import pygame.transform
+from app.core.asset_bundle import AssetBundle
+from app.core.lru_cache import LRUCache
+from app.core.texture_atlas import TextureAtlas
 
 
 class SpriteHandler:
     """This class is responsible for loading and converting the images"""
 
+    ASSET_DIR = os.path.join('app', 'assets')
+    BUNDLE_PATH = os.path.join(ASSET_DIR, 'assets.bundle')
+
+    # Pre-decoded images, PNGs are used if the bundle is missing
+    bundle = None
+
+    # Loaded images are shared by all entities, keyed by (asset name, size)
+    image_cache = LRUCache(128)
+
+    # Assets pre-scaled to the cell size
+    atlas = TextureAtlas()
+
+    # Number of the alternatives of the assets
+    IMAGE_VARIANTS = {
+        'wall_': 6,
+        'enemy_': 3,
+        'space_': 3
+    }
+
     @staticmethod
-    def load_image(asset_name: str, scale_factor) -> pygame.image:
+    def _get_size(scale_factor) -> Tuple[int, int]:
+        """
+        Transform the scale factor to the size of image
+        :param scale_factor: size of a side or (width, height)
+        :return: (width, height)
+        """
+        if not isinstance(scale_factor, (tuple, list)):
+            scale_factor = [scale_factor, scale_factor]
+        return int(scale_factor[0]), int(scale_factor[1])
+
+    @classmethod
+    def decode_image(cls, asset_name: str, size: Tuple[int, int]) -> pygame.Surface:
         """
-        Load in the image
+        Read the image from the bundle or the disk and scale it, the result is not cached
         :param asset_name: path to the asset
-        :param scale_factor: scale the image
+        :param size: (width, height) of the image
         :return: pygame image
         """
+        if cls.bundle is not None:
+            image = cls.bundle.get(asset_name, size)
+            if image is not None:
+                return image
 
-        if not isinstance(scale_factor, tuple):
-            scale_factor = [scale_factor, scale_factor]
         try:
-            image_path = os.path.join('app', 'assets', f'{asset_name}')
+            image_path = os.path.join(cls.ASSET_DIR, f'{asset_name}')
             image = pygame.image.load(image_path)
         except IOError as e:
             print(f"Error loading image '{asset_name}': {e}")
             image = pygame.Surface((10, 10))
-        return pygame.transform.scale(image, scale_factor)
+        return pygame.transform.scale(image, size)
 
     @staticmethod
-    def load_image_random(asset_name: str, scale_factor) -> pygame.image:
+    def _convert_image(image: pygame.Surface) -> pygame.Surface:
+        """
+        Convert the image to the display format to speed up the blits
+        :param image: pygame image
+        :return: converted image, unchanged if there is no display yet
+        """
+        if pygame.display.get_surface() is None:
+            return image
+        return image.convert_alpha()
+
+    @classmethod
+    def load_image(cls, asset_name: str, scale_factor) -> pygame.image:
         """
-        Load image and choose the random alternative
+        Load in the image, the image is shared and must not be modified
         :param asset_name: path to the asset
         :param scale_factor: scale the image
         :return: pygame image
         """
+        size = cls._get_size(scale_factor)
+        image = cls.atlas.get(asset_name, size)
+        if image is not None:
+            return image
 
-        image_cnt = {
-            'wall_': 6,
-            'enemy_': 3,
-            'space_': 3
-        }
+        image = cls.image_cache.get((asset_name, size))
+        if image is None:
+            image = cls.store_image(asset_name, size, cls.decode_image(asset_name, size))
+        return image
 
-        if asset_name not in image_cnt:
-            raise ValueError(f'Unknown asset: {asset_name}')
+    @classmethod
+    def store_image(cls, asset_name: str, size: Tuple[int, int],
+                    image: pygame.Surface) -> pygame.Surface:
+        """
+        Convert the decoded image and put it into the cache
+        :param asset_name: path to the asset
+        :param size: (width, height) of the image
+        :param image: decoded image
+        :return: converted image
+        """
+        image = cls._convert_image(image)
+        cls.image_cache.put((asset_name, size), image)
+        return image
 
-        if not isinstance(scale_factor, tuple):
-            scale_factor = [scale_factor, scale_factor]
-        number = rand.randint(0, image_cnt[asset_name] - 1)
+    @classmethod
+    def open_bundle(cls) -> bool:
+        """
+        Map the pre-decoded images, keep using the PNGs if the bundle is not available
+        :return: True if the bundle is used
+        """
         try:
-            image_path = os.path.join('app', 'assets', f'{asset_name}{number}.png')
-            image = pygame.image.load(image_path)
-        except IOError as e:
-            print(f"Error loading image '{asset_name}': {e}")
-            image = pygame.Surface((10, 10))
-        return pygame.transform.scale(image, scale_factor)
+            cls.bundle = AssetBundle(cls.BUNDLE_PATH, cls.ASSET_DIR)
+        except FileNotFoundError:
+            cls.bundle = None
+        except (OSError, ValueError) as e:
+            print(f"Asset bundle not used, loading PNGs: {e}")
+            cls.bundle = None
+        return cls.bundle is not None
+
+    @classmethod
+    def build_atlas(cls, cell_size: int) -> bool:
+        """
+        Pack all the assets at the cell size, call after the display is created
+        :param cell_size: size of the packed images
+        :return: True if the atlas was rebuilt
+        """
+        return cls.atlas.build(cls.ASSET_DIR, cell_size, cls.load_image)
+
+    @classmethod
+    def load_image_variants(cls, asset_name: str, scale_factor) -> List[pygame.Surface]:
+        """
+        Load all the alternatives of the image
+        :param asset_name: path to the asset
+        :param scale_factor: scale the images
+        :return: list of pygame images ordered by their number
+        """
+        if asset_name not in cls.IMAGE_VARIANTS:
+            raise ValueError(f'Unknown asset: {asset_name}')
+
+        return [cls.load_image(f'{asset_name}{number}.png', scale_factor)
+                for number in range(cls.IMAGE_VARIANTS[asset_name])]
 
 
 class Config(SpriteHandler):
@@ -108,10 +195,17 @@ class Config(SpriteHandler):
         "BLUE": (0, 0, 255),
         "CELL_SIZE": 50,
         "PROPAGATION_COOLDOWN": 0.1,
+        "PREFETCH_LEVELS": 2,
+        "MAP_WIDTH": 0,
+        "MAP_HEIGHT": 0,
+        "ADAPTIVE_QUALITY": True,
+        "VECTORISED_ENEMIES": False,
+        "ENEMY_BEHAVIOUR": 'wander',
+        "FAST_FORWARD": 1,
     }
 
     # Asset paths
-    FONT = os.path.join('app', 'assets', 'PressStart2P-Regular.ttf')
+    FONT = os.path.join(SpriteHandler.ASSET_DIR, 'PressStart2P-Regular.ttf')
 
     # Bomb
     PLANT_BOMB_KEY = pygame.K_SPACE
@@ -128,8 +222,18 @@ class Config(SpriteHandler):
     STATE_END_EVENT = pygame.USEREVENT + 2
     HIDE_CURSOR_EVENT = pygame.USEREVENT + 3
 
-    GRID_HEIGHT = (consts['HEIGHT'] // consts['CELL_SIZE']) - 3
-    GRID_WIDTH = consts['WIDTH'] // consts['CELL_SIZE']
+    CURSOR_SIZE = 80
+
+    # Enemies wander randomly or chase the player along the flow field
+    ENEMY_BEHAVIOURS = ('wander', 'chase')
+
+    # Number of cells visible in the window
+    VIEW_HEIGHT = (consts['HEIGHT'] // consts['CELL_SIZE']) - 3
+    VIEW_WIDTH = consts['WIDTH'] // consts['CELL_SIZE']
+
+    # Size of the map, the map fits into the window unless MAP_WIDTH/MAP_HEIGHT are set
+    GRID_HEIGHT = VIEW_HEIGHT
+    GRID_WIDTH = VIEW_WIDTH
 
     @classmethod
     def _check_range(cls, n: int, f: int, t: int) -> bool:
@@ -179,9 +283,17 @@ class Config(SpriteHandler):
         if not cls._check_range(consts['ENEMY_SPEED'], 0, 10):
             consts['ENEMY_SPEED'] = cls.consts['ENEMY_SPEED']
 
-        if not cls._check_range(consts['NUM_OF_ENEMIES'], 0, 20):
+        if not isinstance(consts['VECTORISED_ENEMIES'], bool):
+            consts['VECTORISED_ENEMIES'] = cls.consts['VECTORISED_ENEMIES']
+
+        # The vectorised enemies are meant for the stress arenas
+        enemy_limit = 10000 if consts['VECTORISED_ENEMIES'] else 20
+        if not cls._check_range(consts['NUM_OF_ENEMIES'], 0, enemy_limit):
             consts['NUM_OF_ENEMIES'] = cls.consts['NUM_OF_ENEMIES']
 
+        if consts['ENEMY_BEHAVIOUR'] not in cls.ENEMY_BEHAVIOURS:
+            consts['ENEMY_BEHAVIOUR'] = cls.consts['ENEMY_BEHAVIOUR']
+
         if not cls._check_range(consts['ENEMY_SCALE'], 0, 1):
             consts['ENEMY_SCALE'] = cls.consts['ENEMY_SCALE']
 
@@ -212,6 +324,10 @@ class Config(SpriteHandler):
         if not cls._check_range(consts['FPS'], 0, 120):
             consts['FPS'] = cls.consts['FPS']
 
+        # Simulated seconds per real second, 0 runs the ticks as fast as possible
+        if consts['FAST_FORWARD'] != 0 and not cls._check_range(consts['FAST_FORWARD'], 0, 1000):
+            consts['FAST_FORWARD'] = cls.consts['FAST_FORWARD']
+
         if not cls._check_range(consts['WIDTH'], 0, 1200):
             consts['WIDTH'] = cls.consts['WIDTH']
 
@@ -221,6 +337,9 @@ class Config(SpriteHandler):
         if not isinstance(consts['VSYNC'], bool):
             consts['VSYNC'] = cls.consts['VSYNC']
 
+        if not isinstance(consts['ADAPTIVE_QUALITY'], bool):
+            consts['ADAPTIVE_QUALITY'] = cls.consts['ADAPTIVE_QUALITY']
+
         if not cls._check_range(consts['TITLE_SIZE'], 0, 100):
             consts['TITLE_SIZE'] = cls.consts['TITLE_SIZE']
 
@@ -230,6 +349,15 @@ class Config(SpriteHandler):
         if not cls._check_range(consts['PROPAGATION_COOLDOWN'], 0, 1):
             consts['PROPAGATION_COOLDOWN'] = cls.consts['PROPAGATION_COOLDOWN']
 
+        if not cls._check_range(consts['PREFETCH_LEVELS'], -1, 10):
+            consts['PREFETCH_LEVELS'] = cls.consts['PREFETCH_LEVELS']
+
+        if not cls._check_range(consts['MAP_WIDTH'], -1, 1000):
+            consts['MAP_WIDTH'] = cls.consts['MAP_WIDTH']
+
+        if not cls._check_range(consts['MAP_HEIGHT'], -1, 1000):
+            consts['MAP_HEIGHT'] = cls.consts['MAP_HEIGHT']
+
         if not cls._check_range(consts['CELL_SIZE'], 0, 300):
             consts['CELL_SIZE'] = cls.consts['CELL_SIZE']
 
@@ -257,6 +385,16 @@ class Config(SpriteHandler):
         """
         return cls.consts['WIDTH'], cls.consts['HEIGHT']
 
+    @classmethod
+    def update_grid_size(cls) -> None:
+        """
+        Derive the size of the view and the map from the constants
+        """
+        cls.VIEW_HEIGHT = (cls.consts['HEIGHT'] // cls.consts['CELL_SIZE']) - 3
+        cls.VIEW_WIDTH = cls.consts['WIDTH'] // cls.consts['CELL_SIZE']
+        cls.GRID_HEIGHT = int(cls.consts['MAP_HEIGHT']) or cls.VIEW_HEIGHT
+        cls.GRID_WIDTH = int(cls.consts['MAP_WIDTH']) or cls.VIEW_WIDTH
+
     @classmethod
     def get_grid_size(cls) -> tuple:
         """
@@ -265,6 +403,30 @@ class Config(SpriteHandler):
         """
         return cls.GRID_WIDTH, cls.GRID_HEIGHT
 
+    @classmethod
+    def get_button_size(cls) -> tuple:
+        """
+        return size of the buttons
+        :return: tuple
+        """
+        return cls.consts['CELL_SIZE'] * 8, cls.consts['CELL_SIZE'] * 2
+
+    @classmethod
+    def get_image_requests(cls) -> list:
+        """
+        return the images used by the game
+        :return: list of (asset name, (width, height))
+        """
+        cell = cls._get_size(cls.consts['CELL_SIZE'])
+        requests = [(name, cell) for name in sorted(os.listdir(cls.ASSET_DIR))
+                    if name.endswith('.png')]
+        requests.append((cls.consts['PLAYER_IMAGE'],
+                         cls._get_size(cls.consts['CELL_SIZE'] * cls.consts['PLAYER_SCALE'])))
+        requests.append((cls.consts['CURSOR_IMAGE'], cls._get_size(cls.CURSOR_SIZE)))
+        for button in ('BTN_PLAY', 'BTN_EXIT', 'BTN_BACK'):
+            requests.append((cls.consts[button], cls.get_button_size()))
+        return requests
+
     @classmethod
     def export_to_json(cls):
         """
@@ -287,11 +449,13 @@ class Config(SpriteHandler):
         try:
             path = os.path.join('game_settings.json')
             with open(path, 'r', encoding='utf-8') as json_file:
-                consts = json.load(json_file)
+                # Keys missing in older files keep their default values
+                consts = {**cls.consts, **json.load(json_file)}
                 for key in consts.keys():
                     if isinstance(consts[key], list):
                         consts[key] = tuple(consts[key])
                 cls.consts = cls._check_data(consts)
+                cls.update_grid_size()
 
         except IOError as error:
             print(f'Error importing from JSON: {error}')
@@ -0,0 +1,131 @@
+"""
+Class that predicts when the pending bombs hit every cell
+Every cell stores the earliest tick it will burn in, the blast spreads from the bomb
+one cell every EXPLOSION_SPAWN_COUNTDOWN seconds
+A detonated bomb is replaced by its explosion, the cells stay marked until the blast ends
+The map is updated incrementally:
+    - a planted bomb or explosion casts its rays once and lowers the ticks of the reached cells
+    - a detonated or destroyed bomb restores only its cells from the bombs still covering them
+    - a destroyed wall re-casts only the pending bombs whose rays it stopped,
+      the rays of an explosion are final
+The ticks are exposed as a read-only NumPy view with the same cells as the occupancy grid
+"""
+from typing import Dict, Hashable, List, Tuple
+import numpy as np
+from app.core.enums_manager import GroupClass
+from app.core.occupancy_grid import OccupancyGrid
+from app.entities.explosion import cast_blast, spread_delay
+
+# Tick of the cells no pending bomb reaches
+NEVER = np.iinfo(np.int64).max
+
+
+class DangerMap:
+    """Class that predicts when the pending bombs hit every cell"""
+
+    def __init__(self, occupancy: OccupancyGrid):
+        """
+        :param occupancy: walls and border of the level, the map uses the same cells
+        """
+        self.occupancy = occupancy
+
+        # Cell (x, y) of the map is stored at [y + 1, x + 1]
+        self._ticks = np.full(occupancy.kinds.shape, NEVER, dtype=np.int64)
+        self.ticks = self._ticks.view()
+        self.ticks.flags.writeable = False
+
+        # Bomb or explosion -> (cell, detonation tick, range, reached cells with their ticks)
+        self._bombs: Dict[Hashable, Tuple] = {}
+        # Cell -> {bomb: tick} of all the bombs reaching the cell
+        self._covering: Dict[Tuple[int, int], Dict[Hashable, int]] = {}
+        # Wall cell -> bombs whose rays stop at the wall
+        self._stopped: Dict[Tuple[int, int], Dict[Hashable, None]] = {}
+
+    def __len__(self) -> int:
+        return len(self._bombs)
+
+    def _reach(self, cell: Tuple[int, int], tick: int,
+               blast_range: int) -> List[Tuple[Tuple[int, int], int]]:
+        """
+        :param cell: position of the bomb in the grid
+        :param tick: detonation tick of the bomb
+        :param blast_range: number of cells the blast reaches in every direction
+        :return: (cell, tick) of all the cells the blast will burn
+        """
+        return [(reached, tick + spread_delay(distance))
+                for distance, reached in cast_blast(cell, blast_range, self.occupancy.kind_at)]
+
+    def plant(self, bomb: Hashable, cell: Tuple[int, int], tick: int, blast_range: int,
+              extendable: bool = True) -> None:
+        """
+        Add the blast of a pending bomb or a spreading explosion
+        :param bomb: key of the blast, the bomb or the explosion sprite
+        :param cell: position of the bomb in the grid
+        :param tick: detonation tick of the bomb
+        :param blast_range: number of cells the blast reaches in every direction
+        :param extendable: True if the destroyed walls extend the rays,
+            False for the explosions cast at the detonation
+        """
+        self.remove(bomb)
+        reached = self._reach(cell, tick, blast_range)
+        self._bombs[bomb] = (cell, tick, blast_range, reached)
+
+        for reached_cell, reached_tick in reached:
+            self._covering.setdefault(reached_cell, {})[bomb] = reached_tick
+            index = (reached_cell[1] + 1, reached_cell[0] + 1)
+            self._ticks[index] = min(self._ticks[index], reached_tick)
+            if extendable and self.occupancy.kind_at(reached_cell) == GroupClass.WALL.value:
+                self._stopped.setdefault(reached_cell, {})[bomb] = None
+
+    def remove(self, bomb: Hashable) -> None:
+        """
+        Remove the blast of a detonated or destroyed bomb or an ended explosion,
+        unknown keys are ignored
+        :param bomb: key of the blast
+        """
+        if bomb not in self._bombs:
+            return
+        _, _, _, reached = self._bombs.pop(bomb)
+
+        for reached_cell, _ in reached:
+            covering = self._covering[reached_cell]
+            del covering[bomb]
+            if not covering:
+                del self._covering[reached_cell]
+            stopped = self._stopped.get(reached_cell)
+            if stopped is not None:
+                stopped.pop(bomb, None)
+                if not stopped:
+                    del self._stopped[reached_cell]
+            index = (reached_cell[1] + 1, reached_cell[0] + 1)
+            self._ticks[index] = min(covering.values(), default=NEVER)
+
+    def wall_removed(self, cell: Tuple[int, int]) -> None:
+        """
+        Extend the rays stopped by the destroyed wall
+        :param cell: position of the wall in the grid
+        """
+        for bomb in list(self._stopped.pop(cell, ())):
+            bomb_cell, tick, blast_range, _ = self._bombs[bomb]
+            self.plant(bomb, bomb_cell, tick, blast_range)
+
+    def tick_at(self, cell: Tuple[int, int]) -> int | None:
+        """
+        :param cell: (column, row) of the map
+        :return: earliest tick the cell burns in, None if no pending bomb reaches it
+        """
+        row, column = cell[1] + 1, cell[0] + 1
+        if 0 <= row < self._ticks.shape[0] and 0 <= column < self._ticks.shape[1]:
+            tick = int(self._ticks[row, column])
+            if tick != NEVER:
+                return tick
+        return None
+
+    def time_to_blast(self, cell: Tuple[int, int], now: int) -> int | None:
+        """
+        :param cell: (column, row) of the map
+        :param now: current tick
+        :return: number of ticks until the cell burns, None if no pending bomb reaches it
+        """
+        tick = self.tick_at(cell)
+        return None if tick is None else tick - now
@@ -0,0 +1,223 @@
+"""
+Class that simulates all enemies at once
+The positions, directions and images of the enemies are stored in NumPy arrays
+Every tick all enemies are moved together:
+    - an enemy moves in its direction unless it would hit a wall or the border
+    - a blocked enemy looks around for the directions without walls and picks one randomly
+    - every enemy changes its direction randomly with a small probability
+    - chasing enemies turn along the flow field in the middle of every cell instead
+    - an enemy touching the player kills it
+The random numbers are drawn per enemy id and tick from the streams of the game,
+an enemy moves the same whatever the other enemies do
+The walls are tested against the occupancy grid, enemies larger than a cell are not supported
+The system behaves like a sprite group for the drawing and the explosions
+"""
+from typing import Iterator, List, NamedTuple, Sequence, Tuple
+import numpy as np
+import pygame
+from app.core.config import Config
+from app.core.enums_manager import GroupClass, Movement
+from app.core.occupancy_grid import OccupancyGrid
+from app.core.random_streams import RandomStreams
+
+# Steps of the directions ordered by the Movement values
+STEPS = np.array([(0, -1), (0, 1), (-1, 0), (1, 0)], dtype=np.int64)
+
+# Probability of a random direction change in one tick
+TURN_PROBABILITY = 0.01
+
+
+class EnemyView(NamedTuple):
+    """Drawable view of one enemy"""
+    image: pygame.Surface
+    rect: pygame.Rect
+
+
+class EnemySystem:
+    """Class that simulates all enemies at once"""
+
+    def __init__(self, cells: Sequence[Tuple[int, int]], seed: int, occupancy: OccupancyGrid):
+        """
+        :param cells: initial positions of the enemies in the grid
+        :param seed: seed of the game, the random streams of the enemies are derived from it
+        :param occupancy: walls and border of the level
+        """
+        self.streams = RandomStreams(seed)
+        # Number of the updates, the counter of the random draws
+        self.tick = 0
+        self.occupancy = occupancy
+        self.size = Config.consts['CELL_SIZE']
+        self.speed = Config.consts['ENEMY_SPEED']
+
+        # Positions of the top left corners in pixels, shape (number of enemies, 2)
+        self.pos = np.array(cells, dtype=np.int64).reshape(-1, 2) * self.size
+        # Positions before the last update, the drawing interpolates from them
+        self.previous = self.pos.copy()
+        # Ids select the random streams, they stay with the enemies when others are removed
+        self.ids = np.arange(len(self.pos), dtype=np.int64)
+        self.direction = self.streams.integers('direction', self.ids, 0, len(Movement))
+
+        self.images = Config.load_image_variants(Config.consts['ENEMY_IMAGE'], self.size)
+        self.image_index = self.streams.integers('image', self.ids, 0, len(self.images))
+
+    def __len__(self) -> int:
+        return len(self.pos)
+
+    def __iter__(self) -> Iterator[EnemyView]:
+        for (x, y), image in zip(self.pos.tolist(), self.image_index.tolist()):
+            yield EnemyView(self.images[image], pygame.Rect(x, y, self.size, self.size))
+
+    def sprites(self) -> List[EnemyView]:
+        """
+        :return: views of all enemies
+        """
+        return list(self)
+
+    def empty(self) -> None:
+        """
+        Remove all enemies
+        """
+        self._keep(np.zeros(len(self.pos), dtype=bool))
+
+    def _keep(self, mask: np.ndarray) -> None:
+        """
+        Remove the enemies outside the mask
+        :param mask: boolean array, True for the enemies to keep
+        """
+        self.pos = self.pos[mask]
+        self.previous = self.previous[mask]
+        self.ids = self.ids[mask]
+        self.direction = self.direction[mask]
+        self.image_index = self.image_index[mask]
+
+    def _blocked(self, pos: np.ndarray, kinds: Sequence[int]) -> np.ndarray:
+        """
+        Test the hitboxes against the obstacles in the cells they overlap
+        :param pos: top left corners in pixels, shape (n, 2)
+        :param kinds: kinds of obstacles that block the movement
+        :return: boolean array, True if the hitbox overlaps an obstacle
+        """
+        grid = self.occupancy.kinds
+        # The right and bottom edges are exclusive, at most 2x2 cells are overlapped
+        first = pos // self.occupancy.cell_size + 1
+        last = (pos + self.size - 1) // self.occupancy.cell_size + 1
+        columns = np.clip(np.stack([first[:, 0], last[:, 0]]), 0, grid.shape[1] - 1)
+        rows = np.clip(np.stack([first[:, 1], last[:, 1]]), 0, grid.shape[0] - 1)
+
+        blocked = np.zeros(len(pos), dtype=bool)
+        for row in rows:
+            for column in columns:
+                blocked |= np.isin(grid[row, column], kinds)
+        return blocked
+
+    def _overlaps(self, pos: np.ndarray, rect: pygame.Rect) -> np.ndarray:
+        """
+        :param pos: top left corners in pixels, shape (n, 2)
+        :param rect: hitbox to test
+        :return: boolean array, True if the enemy collides with the rect
+        """
+        return ((pos[:, 0] < rect.right) & (pos[:, 0] + self.size > rect.left)
+                & (pos[:, 1] < rect.bottom) & (pos[:, 1] + self.size > rect.top))
+
+    def _look_around(self, indices: np.ndarray, stream: str) -> np.ndarray:
+        """
+        Pick the random directions without walls, any direction if all are blocked
+        :param indices: indices of the enemies
+        :param stream: name of the random stream, one per reason to turn
+        :return: new directions of the enemies
+        """
+        possible = np.empty((len(indices), len(STEPS)), dtype=bool)
+        for direction, step in enumerate(STEPS):
+            possible[:, direction] = ~self._blocked(self.pos[indices] + step * self.speed,
+                                                    [GroupClass.WALL.value])
+        possible[~possible.any(axis=1)] = True
+
+        # The largest random weight among the possible directions is a uniform choice
+        draws = self.ids[indices, np.newaxis] * len(STEPS) + np.arange(len(STEPS))
+        weights = self.streams.uniform(stream, draws, self.tick) + possible
+        return weights.argmax(axis=1)
+
+    def _follow_flow(self, flow_field) -> None:
+        """
+        Turn the enemies in the middle of a cell towards the player
+        :param flow_field: FlowField leading to the player
+        """
+        cells = (self.pos + self.size // 2) // self.size
+        # Turning is safe only when the hitbox is aligned to the cell
+        aligned = (np.abs(self.pos - cells * self.size) < self.speed).all(axis=1)
+
+        rows = np.clip(cells[:, 1] + 1, 0, flow_field.directions.shape[0] - 1)
+        columns = np.clip(cells[:, 0] + 1, 0, flow_field.directions.shape[1] - 1)
+        directions = flow_field.directions[rows, columns]
+
+        following = aligned & (directions >= 0)
+        self.pos[following] = cells[following] * self.size
+        self.direction[following] = directions[following]
+
+    def update(self, player_group: pygame.sprite.Group, flow_field=None) -> None:
+        """
+        Advance all enemies by one tick
+        :param player_group: the player, killed on a collision
+        :param flow_field: FlowField to chase the player, None to wander
+        """
+        self.previous = self.pos.copy()
+        self.tick += 1
+        if not len(self.pos):
+            return
+
+        if flow_field is not None:
+            self._follow_flow(flow_field)
+
+        new_pos = self.pos + STEPS[self.direction] * self.speed
+        blocked = self._blocked(new_pos, [GroupClass.WALL.value, GroupClass.BORDER.value])
+
+        # Enemies touching the player kill it and move on
+        hit = np.zeros(len(self.pos), dtype=bool)
+        for player in player_group.sprites():
+            player_hit = self._overlaps(new_pos, player.rect)
+            if player_hit.any():
+                player.kill()
+            hit |= player_hit
+
+        moving = hit | ~blocked
+        self.pos[moving] = new_pos[moving]
+
+        stopped = np.flatnonzero(~moving)
+        if len(stopped):
+            self.direction[stopped] = self._look_around(stopped, 'blocked')
+
+        # Random direction change, chasing enemies keep to the field
+        if flow_field is not None:
+            return
+        turning = np.flatnonzero(self.streams.uniform('turn', self.ids, self.tick)
+                                 < TURN_PROBABILITY)
+        if len(turning):
+            self.direction[turning] = self._look_around(turning, 'turn direction')
+
+    def interpolated(self, alpha: float) -> List[EnemyView]:
+        """
+        :param alpha: fraction of the tick passed since the last update
+        :return: views of all enemies placed between their last two positions
+        """
+        if alpha >= 1:
+            return self.sprites()
+        pos = np.rint(self.previous + (self.pos - self.previous) * alpha).astype(np.int64)
+        return [EnemyView(self.images[image], pygame.Rect(x, y, self.size, self.size))
+                for (x, y), image in zip(pos.tolist(), self.image_index.tolist())]
+
+    def collide(self, entity: pygame.sprite.Sprite, dokill: bool) -> List[EnemyView]:
+        """
+        Find the enemies colliding with the entity
+        :param entity: sprite with a rect
+        :param dokill: remove all collided enemies
+        :return: views of the collided enemies
+        """
+        hit = self._overlaps(self.pos, entity.rect)
+        if not hit.any():
+            return []
+        collided = [EnemyView(self.images[image], pygame.Rect(x, y, self.size, self.size))
+                    for (x, y), image in zip(self.pos[hit].tolist(),
+                                             self.image_index[hit].tolist())]
+        if dokill:
+            self._keep(~hit)
+        return collided
@@ -0,0 +1,112 @@
+"""
+Class that guides all chasing enemies towards the player
+A single breadth-first search from the cell of the player gives the distance of every cell,
+every free cell then stores the direction to its neighbour closer to the player
+The search is a wavefront over the whole grid done by NumPy, one step per distance
+The field is recomputed only when the player enters another cell or a wall is destroyed,
+the enemies read their direction in O(1)
+"""
+from typing import Tuple
+import numpy as np
+from app.core.enums_manager import Movement
+from app.core.occupancy_grid import EMPTY, OccupancyGrid
+
+# Distance of the cells the player can't be reached from
+UNREACHABLE = -1
+
+# Direction of the cells without a way to the player
+NO_DIRECTION = -1
+
+
+class FlowField:
+    """Class that guides all chasing enemies towards the player"""
+
+    def __init__(self, occupancy: OccupancyGrid):
+        """
+        :param occupancy: walls and border of the level, the field uses the same cells
+        """
+        self.occupancy = occupancy
+        # Number of steps to the player and the Movement value towards it, stored as the kinds
+        self.distance = np.full(occupancy.kinds.shape, UNREACHABLE, dtype=np.int32)
+        self.directions = np.full(occupancy.kinds.shape, NO_DIRECTION, dtype=np.int8)
+        self.target = None
+        self.computations = 0
+        self._dirty = True
+
+    def invalidate(self) -> None:
+        """
+        Recompute the field in the next update, called when a wall is destroyed
+        """
+        self._dirty = True
+
+    def update(self, target: Tuple[int, int]) -> bool:
+        """
+        Recompute the field if the target moved to another cell or the walls changed
+        :param target: (column, row) of the player
+        :return: True if the field was recomputed
+        """
+        if target == self.target and not self._dirty:
+            return False
+        self.target = target
+        self._dirty = False
+        self._compute()
+        return True
+
+    def _compute(self) -> None:
+        """
+        Breadth-first search from the target over the free cells
+        """
+        self.computations += 1
+        free = self.occupancy.kinds == EMPTY
+        distance = np.full(free.shape, UNREACHABLE, dtype=np.int32)
+
+        row, column = self.target[1] + 1, self.target[0] + 1
+        if 0 <= row < free.shape[0] and 0 <= column < free.shape[1] and free[row, column]:
+            frontier = np.zeros(free.shape, dtype=bool)
+            frontier[row, column] = True
+            distance[row, column] = 0
+            step = 0
+            while frontier.any():
+                step += 1
+                # Cells next to the frontier
+                grown = np.zeros(free.shape, dtype=bool)
+                grown[1:] |= frontier[:-1]
+                grown[:-1] |= frontier[1:]
+                grown[:, 1:] |= frontier[:, :-1]
+                grown[:, :-1] |= frontier[:, 1:]
+                frontier = grown & free & (distance == UNREACHABLE)
+                distance[frontier] = step
+        self.distance = distance
+
+        # Distances of the neighbours in the order of the Movement values
+        neighbours = np.full((len(Movement),) + free.shape, UNREACHABLE, dtype=np.int32)
+        neighbours[Movement.MOVE_UP.value, 1:] = distance[:-1]
+        neighbours[Movement.MOVE_DOWN.value, :-1] = distance[1:]
+        neighbours[Movement.MOVE_LEFT.value, :, 1:] = distance[:, :-1]
+        neighbours[Movement.MOVE_RIGHT.value, :, :-1] = distance[:, 1:]
+
+        closer = (neighbours == distance - 1) & (distance > 0)
+        self.directions = np.where(closer.any(axis=0), closer.argmax(axis=0),
+                                   NO_DIRECTION).astype(np.int8)
+
+    def distance_at(self, cell: Tuple[int, int]) -> int:
+        """
+        :param cell: (column, row) of the map
+        :return: number of steps to the player, UNREACHABLE if there is no way
+        """
+        row, column = cell[1] + 1, cell[0] + 1
+        if 0 <= row < self.distance.shape[0] and 0 <= column < self.distance.shape[1]:
+            return int(self.distance[row, column])
+        return UNREACHABLE
+
+    def direction_at(self, cell: Tuple[int, int]) -> Movement | None:
+        """
+        :param cell: (column, row) of the map
+        :return: direction towards the player, None if there is no way or the cell is the target
+        """
+        row, column = cell[1] + 1, cell[0] + 1
+        if 0 <= row < self.directions.shape[0] and 0 <= column < self.directions.shape[1]:
+            direction = int(self.directions[row, column])
+            if direction != NO_DIRECTION:
+                return Movement(direction)
+        return None
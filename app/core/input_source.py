@@ -0,0 +1,105 @@
+# pygame constants missing errors
+# pylint: disable=no-member
+"""
+Classes that provide the input of the player to the states
+InputSource reads the keyboard and the event feed of pygame
+ScriptedInput replays prepared key states, so the game runs without a player
+"""
+import random
+from typing import Collection, Iterable, List
+import pygame
+
+
+class KeyState:
+    """Pressed keys indexed the same way as the result of pygame.key.get_pressed"""
+
+    def __init__(self, keys: Collection[int] = ()):
+        """
+        :param keys: pygame key codes that are held down
+        """
+        self.keys = frozenset(keys)
+
+    def __getitem__(self, key: int) -> bool:
+        return key in self.keys
+
+
+class InputSource:
+    """Class that reads the input from pygame"""
+
+    def poll(self) -> List[pygame.event.Event]:
+        """
+        Retrieve the events of the current frame
+        :return: pygame events
+        """
+        return pygame.event.get()
+
+    def get_pressed(self):
+        """
+        :return: state of the keyboard, indexed by the pygame key codes
+        """
+        return pygame.key.get_pressed()
+
+
+class ScriptedInput(InputSource):
+    """
+    Class that replays the held keys frame by frame
+    Pressing and releasing a key generates KEYDOWN and KEYUP events
+    Once the script is exhausted the game is asked to quit
+    """
+
+    def __init__(self, frames: Iterable[Collection[int]]):
+        """
+        :param frames: keys held down in every frame
+        """
+        self._frames = iter(frames)
+        self._held = KeyState()
+        self.frame = 0
+        self.finished = False
+
+    def poll(self) -> List[pygame.event.Event]:
+        """
+        Advance the script by one frame
+        :return: events posted by the game and the generated key events
+        """
+        # Events posted by the states still have to be delivered
+        events = pygame.event.get()
+
+        keys = next(self._frames, None)
+        if keys is None:
+            self.finished = True
+            self._held = KeyState()
+            return events + [pygame.event.Event(pygame.QUIT)]
+
+        held = KeyState(keys)
+        events += [pygame.event.Event(pygame.KEYUP, key=key)
+                   for key in sorted(self._held.keys - held.keys)]
+        events += [pygame.event.Event(pygame.KEYDOWN, key=key)
+                   for key in sorted(held.keys - self._held.keys)]
+        self._held = held
+        self.frame += 1
+        return events
+
+    def get_pressed(self) -> KeyState:
+        """
+        :return: keys held down in the current frame
+        """
+        return self._held
+
+    @staticmethod
+    def random_frames(count: int, keys: Collection[int], seed: int = 0,
+                      hold: int = 10) -> Iterable[List[int]]:
+        """
+        Generate a random script, every key combination is held for a few frames
+        :param count: number of frames
+        :param keys: keys to choose from
+        :param seed: seed of the script
+        :param hold: number of frames a combination is held
+        :return: keys held down in every frame
+        """
+        rand = random.Random(seed)
+        keys = sorted(keys)
+        held = []
+        for frame in range(count):
+            if frame % hold == 0:
+                held = [key for key in keys if rand.random() < 0.3]
+            yield held
@@ -0,0 +1,224 @@
+"""
+Class that reads and writes the binary level packs
+A level pack stores curated levels in a compact form:
+    - header with the size of the levels and the number of levels
+    - table of tiles, mapping tile index to the symbol, the asset and the wall flag
+    - run-length encoded tile grids, one per level
+    - index with the offset and length of every level at the end of the file
+The pack is memory-mapped, a level is decoded only when it is requested
+"""
+import mmap
+import struct
+import sys
+from typing import Dict, List, Tuple
+import numpy as np
+import pygame
+from app.core.config import Config
+from app.entities.empty import Empty
+from app.entities.wall import Wall
+
+MAGIC = b'CBLP'
+VERSION = 1
+
+# magic, version, width, height, number of tiles, number of levels, index offset
+HEADER = struct.Struct('<4sHHHHIQ')
+# offset of the level data, length of the level data
+INDEX_ENTRY = struct.Struct('<QI')
+# maximal length of one run
+MAX_RUN = 255
+
+
+class LevelPack:
+    """Class that reads and writes the binary level packs"""
+
+    def __init__(self, path: str):
+        """
+        Open the level pack, only the header and the tiles are read
+        :param path: path to the pack
+        """
+        self.path = path
+        with open(path, 'rb') as file:
+            self._data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.width, self.height, tile_cnt, self.level_cnt, self._index_offset = (
+            HEADER.unpack_from(self._data, 0))
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f'Unsupported level pack: {path}')
+
+        self.symbols, self.tiles = self._read_tiles(tile_cnt)
+
+    def __len__(self) -> int:
+        return self.level_cnt
+
+    def __enter__(self) -> 'LevelPack':
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Release the mapped file
+        """
+        self._data.close()
+
+    def _read_tiles(self, tile_cnt: int) -> Tuple[List[str], Dict]:
+        """
+        Read the table of tiles following the header
+        :param tile_cnt: number of tiles in the table
+        :return: list of symbols ordered by index, {symbol: (asset, is wall)}
+        """
+        symbols = []
+        tiles = {}
+        offset = HEADER.size
+        for _ in range(tile_cnt):
+            symbol, offset = self._read_string(offset)
+            wall = bool(self._data[offset])
+            asset, offset = self._read_string(offset + 1)
+            symbols.append(symbol)
+            tiles[symbol] = (asset, wall)
+        return symbols, tiles
+
+    def _read_string(self, offset: int) -> Tuple[str, int]:
+        """
+        Read a length-prefixed string
+        :param offset: position of the length byte
+        :return: the string, position after the string
+        """
+        length = self._data[offset]
+        start = offset + 1
+        return self._data[start:start + length].decode('utf-8'), start + length
+
+    def load_indices(self, number: int) -> np.ndarray:
+        """
+        Decode the tile grid of a level as the indices of tiles
+        :param number: number of the level
+        :return: array of shape (height, width) with tile indices
+        """
+        if not 0 <= number < self.level_cnt:
+            raise IndexError(f'Level {number} is not in the pack')
+
+        offset, length = INDEX_ENTRY.unpack_from(
+            self._data, self._index_offset + number * INDEX_ENTRY.size)
+        runs = np.frombuffer(self._data, dtype=np.uint8, count=length, offset=offset)
+        # pairs of (run length, tile index)
+        indices = np.repeat(runs[1::2], runs[0::2])
+        return indices.reshape(self.height, self.width)
+
+    def load_grid(self, number: int) -> List[List[str]]:
+        """
+        Decode the tile grid of a level
+        :param number: number of the level
+        :return: rows of tile symbols
+        """
+        symbols = np.array(self.symbols, dtype=object)
+        return symbols[self.load_indices(number)].tolist()
+
+    def load_level(self, number: int) -> Dict:
+        """
+        Create the entities of a level
+        :param number: number of the level
+        :return: level information for GameState.retrieve_information
+        """
+        return self.create_level_information(self.load_grid(number), self.tiles)
+
+    @staticmethod
+    def create_level_information(grid: List[List[str]], tiles: Dict) -> Dict:
+        """
+        Transform the tile grid into game entities
+        :param grid: rows of tile symbols
+        :param tiles: {symbol: (asset, is wall)}
+        :return: level information in the format of WaveFunctionCollapse
+        """
+        walls_group = pygame.sprite.Group()
+        empty_group = pygame.sprite.Group()
+        walls_pos = []
+        for i, row in enumerate(grid):
+            for j, symbol in enumerate(row):
+                asset, wall = tiles[symbol]
+                if wall:
+                    walls_group.add(Wall((j, i), asset))
+                    walls_pos.append((j, i))
+                else:
+                    empty_group.add(Empty((j, i), asset))
+        return {'walls': walls_group,
+                'empty': empty_group,
+                'walls_pos': walls_pos,
+                'grid': grid,
+                'tiles': tiles}
+
+    @staticmethod
+    def encode_grid(indices: np.ndarray) -> bytes:
+        """
+        Run-length encode the tile grid
+        :param indices: array of tile indices
+        :return: pairs of (run length, tile index) as bytes
+        """
+        flat = np.asarray(indices, dtype=np.uint8).ravel()
+        encoded = bytearray()
+        start = 0
+        # positions where the tile changes
+        for end in list(np.flatnonzero(flat[1:] != flat[:-1]) + 1) + [len(flat)]:
+            run = end - start
+            while run > 0:
+                length = min(run, MAX_RUN)
+                encoded += bytes((length, flat[start]))
+                run -= length
+            start = end
+        return bytes(encoded)
+
+    @classmethod
+    def write(cls, path: str, tiles: Dict, grids: List[List[List[str]]]) -> None:
+        """
+        Write the levels into a new pack
+        :param path: path to the pack
+        :param tiles: {symbol: (asset, is wall)}
+        :param grids: tile grids of the levels, all of the same size
+        """
+        if len(tiles) > 255:
+            raise ValueError('Level pack supports at most 255 tiles')
+
+        height = len(grids[0]) if grids else 0
+        width = len(grids[0][0]) if height else 0
+        symbols = list(tiles.keys())
+        lookup = {symbol: i for i, symbol in enumerate(symbols)}
+
+        body = bytearray()
+        for symbol in symbols:
+            asset, wall = tiles[symbol]
+            body += cls._encode_string(symbol) + bytes((int(wall),)) + cls._encode_string(asset)
+
+        index = bytearray()
+        for grid in grids:
+            if len(grid) != height or any(len(row) != width for row in grid):
+                raise ValueError('All levels in a pack must have the same size')
+            encoded = cls.encode_grid([[lookup[symbol] for symbol in row] for row in grid])
+            index += INDEX_ENTRY.pack(HEADER.size + len(body), len(encoded))
+            body += encoded
+
+        header = HEADER.pack(MAGIC, VERSION, width, height, len(symbols), len(grids),
+                             HEADER.size + len(body))
+        with open(path, 'wb') as file:
+            file.write(header + body + index)
+
+    @staticmethod
+    def _encode_string(text: str) -> bytes:
+        """
+        :param text: string to encode
+        :return: length-prefixed utf-8 string
+        """
+        data = text.encode('utf-8')
+        if len(data) > 255:
+            raise ValueError(f'String is too long: {text}')
+        return bytes((len(data),)) + data
+
+
+if __name__ == '__main__':
+    # Generate a pack: python -m app.core.level_pack <path> <number of levels>
+    from app.states.wfc_state import WaveFunctionCollapseState
+
+    Config.import_from_json()
+    levels = [WaveFunctionCollapseState.create_generator().generate()
+              for _ in range(int(sys.argv[2]))]
+    LevelPack.write(sys.argv[1], levels[0]['tiles'], [level['grid'] for level in levels])
@@ -0,0 +1,90 @@
+"""
+Class that generates the upcoming levels in the background
+While the player is in the game, a worker thread runs the
+Wave Function Collapse to completion and stores the finished levels in a bounded queue
+The state manager then picks a finished level instead of generating a new one
+"""
+import queue
+import threading
+from typing import Callable, Dict
+
+
+class LevelPrefetcher:
+    """Class that generates the upcoming levels in the background"""
+
+    def __init__(self, create_generator: Callable, size: int):
+        """
+        :param create_generator: callable returning initialized WaveFunctionCollapse
+        :param size: number of levels kept ready, 0 disables the prefetching
+        """
+        self._create_generator = create_generator
+        self.size = size
+        self._levels = queue.Queue(maxsize=max(size, 1))
+        self._stop_event = threading.Event()
+        self._worker = None
+
+    def start(self) -> None:
+        """
+        Start the background worker
+        """
+        if self.size <= 0 or self._worker is not None:
+            return
+        self._stop_event.clear()
+        self._worker = threading.Thread(target=self._run, name='level-prefetcher', daemon=True)
+        self._worker.start()
+
+    def stop(self) -> None:
+        """
+        Stop the background worker, the unfinished level is thrown away
+        """
+        if self._worker is None:
+            return
+        self._stop_event.set()
+        self._worker.join()
+        self._worker = None
+
+    def get_level(self, timeout: float = None) -> Dict | None:
+        """
+        Take a finished level from the queue
+        :param timeout: how long to wait for a level, None does not wait at all
+        :return: level information for the game state or None if no level is ready
+        """
+        try:
+            if timeout is None:
+                return self._levels.get_nowait()
+            return self._levels.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def ready(self) -> int:
+        """
+        :return: number of levels that are ready to be played
+        """
+        return self._levels.qsize()
+
+    def _run(self) -> None:
+        """
+        Keep the queue of levels full until stopped
+        """
+        while not self._stop_event.is_set():
+            wfc = self._create_generator()
+
+            # Check the stop flag between the steps, generation can take a while
+            while not wfc.collapsed:
+                if self._stop_event.is_set():
+                    return
+                wfc.update()
+
+            self._put(wfc.get_level_information())
+
+    def _put(self, level: Dict) -> None:
+        """
+        Wait for a free slot in the queue
+        :param level: level information to store
+        """
+        while not self._stop_event.is_set():
+            try:
+                self._levels.put(level, timeout=0.1)
+                return
+            except queue.Full:
+                continue
@@ -0,0 +1,74 @@
+"""
+Class that implements a size-bounded cache
+When the cache is full, the least recently used entry is removed
+The cache counts hits and misses so its efficiency can be checked
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable
+
+
+class LRUCache:
+    """Class that implements a size-bounded cache"""
+
+    def __init__(self, max_size: int):
+        """
+        :param max_size: maximal number of stored entries
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        # Entries can be added from the background workers
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._items
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Retrieve the entry and mark it as recently used
+        :param key: key of the entry
+        :param default: returned if the entry is not cached
+        :return: cached value or default
+        """
+        with self._lock:
+            if key not in self._items:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Store the entry, remove the least recently used one if the cache is full
+        :param key: key of the entry
+        :param value: value to store
+        """
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        """
+        Remove all entries and reset the counters
+        """
+        with self._lock:
+            self._items.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self) -> Dict:
+        """
+        :return: statistics of the cache
+        """
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._items),
+                'max_size': self.max_size}
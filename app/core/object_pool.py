@@ -0,0 +1,59 @@
+"""
+Class that recycles the frequently created entities
+A released object is kept and reset by the next acquire instead of creating a new one
+The pooled objects have to implement reset taking the same arguments as the factory
+The pool counts the created and reused objects so its efficiency can be checked
+"""
+from typing import Any, Callable, Dict
+
+
+class ObjectPool:
+    """Class that recycles the frequently created entities"""
+
+    def __init__(self, factory: Callable, max_size: int = 256):
+        """
+        :param factory: callable creating a new object
+        :param max_size: maximal number of kept free objects
+        """
+        self._factory = factory
+        self.max_size = max_size
+        self._free = []
+        self.created = 0
+        self.reused = 0
+        self.released = 0
+
+    def __len__(self) -> int:
+        return len(self._free)
+
+    def acquire(self, *args) -> Any:
+        """
+        Reset a free object or create a new one
+        :param args: arguments of the factory and of the reset
+        :return: object ready to use
+        """
+        if self._free:
+            obj = self._free.pop()
+            obj.reset(*args)
+            self.reused += 1
+            return obj
+        self.created += 1
+        return self._factory(*args)
+
+    def release(self, obj: Any) -> None:
+        """
+        Return the object, it must not be used until it is acquired again
+        :param obj: object created by the pool
+        """
+        self.released += 1
+        if len(self._free) < self.max_size:
+            self._free.append(obj)
+
+    def info(self) -> Dict:
+        """
+        :return: statistics of the pool
+        """
+        return {'created': self.created,
+                'reused': self.reused,
+                'released': self.released,
+                'in_use': self.created + self.reused - self.released,
+                'free': len(self._free)}
@@ -0,0 +1,111 @@
+"""
+Class that stores the static obstacles of the level by their cell
+The kind of obstacle in every cell is kept in a NumPy array, the sprites in a parallel array
+A collision query checks only the cells overlapped by the hitbox,
+at most four cells for the entities not larger than a cell
+The grid has a margin of one cell for the border around the map
+"""
+from typing import Iterable, List, Tuple
+import numpy as np
+import pygame
+
+EMPTY = 0
+
+
+class OccupancyGrid:
+    """Class that stores the static obstacles of the level by their cell"""
+
+    def __init__(self, width: int, height: int, cell_size: int):
+        """
+        :param width: number of columns of the map
+        :param height: number of rows of the map
+        :param cell_size: size of the cell in pixels
+        """
+        self.cell_size = cell_size
+        # Cell (x, y) of the map is stored at [y + 1, x + 1]
+        self.kinds = np.zeros((height + 2, width + 2), dtype=np.int8)
+        self._sprites = np.empty((height + 2, width + 2), dtype=object)
+
+    def _cell(self, sprite: pygame.sprite.Sprite) -> tuple | None:
+        """
+        :param sprite: obstacle aligned to the cells
+        :return: (row, column) in the arrays or None if the sprite is outside the grid
+        """
+        row = sprite.rect.y // self.cell_size + 1
+        column = sprite.rect.x // self.cell_size + 1
+        if 0 <= row < self.kinds.shape[0] and 0 <= column < self.kinds.shape[1]:
+            return row, column
+        return None
+
+    def add(self, sprite: pygame.sprite.Sprite, kind: int) -> bool:
+        """
+        Place the obstacle into its cell
+        :param sprite: obstacle aligned to the cells
+        :param kind: non-zero kind of the obstacle, used to filter the queries
+        :return: True if the obstacle is inside the grid
+        """
+        cell = self._cell(sprite)
+        if cell is None:
+            return False
+        self.kinds[cell] = kind
+        self._sprites[cell] = sprite
+        return True
+
+    def add_all(self, sprites: Iterable[pygame.sprite.Sprite], kind: int) -> None:
+        """
+        Place the obstacles into their cells
+        :param sprites: obstacles aligned to the cells
+        :param kind: non-zero kind of the obstacles
+        """
+        for sprite in sprites:
+            self.add(sprite, kind)
+
+    def remove(self, sprite: pygame.sprite.Sprite) -> None:
+        """
+        Free the cell of the obstacle
+        :param sprite: obstacle to remove
+        """
+        cell = self._cell(sprite)
+        if cell is not None and self._sprites[cell] is sprite:
+            self.kinds[cell] = EMPTY
+            self._sprites[cell] = None
+
+    def kind_at(self, cell: Tuple[int, int]) -> int | None:
+        """
+        :param cell: (column, row) of the map, the border is at -1 and at the width/height
+        :return: kind of the obstacle in the cell, 0 if empty, None outside the grid
+        """
+        row, column = cell[1] + 1, cell[0] + 1
+        if 0 <= row < self.kinds.shape[0] and 0 <= column < self.kinds.shape[1]:
+            return int(self.kinds[row, column])
+        return None
+
+    def query(self, rect: pygame.Rect, kinds: Iterable[int]) -> List[pygame.sprite.Sprite]:
+        """
+        Find the obstacles colliding with the hitbox
+        :param rect: hitbox in pixels
+        :param kinds: kinds of obstacles to look for
+        :return: colliding obstacles
+        """
+        if rect.width <= 0 or rect.height <= 0:
+            return []
+
+        # Cells overlapped by the hitbox, the right and bottom edges are exclusive
+        top = max(rect.top // self.cell_size + 1, 0)
+        bottom = min((rect.bottom - 1) // self.cell_size + 2, self.kinds.shape[0])
+        left = max(rect.left // self.cell_size + 1, 0)
+        right = min((rect.right - 1) // self.cell_size + 2, self.kinds.shape[1])
+        if top >= bottom or left >= right:
+            return []
+
+        cells = self.kinds[top:bottom, left:right]
+        if not cells.any():
+            return []
+
+        kinds = set(kinds)
+        collisions = []
+        for row, line in enumerate(cells.tolist(), top):
+            for column, kind in enumerate(line, left):
+                if kind in kinds and rect.colliderect(self._sprites[row, column].rect):
+                    collisions.append(self._sprites[row, column])
+        return collisions
@@ -0,0 +1,114 @@
+"""
+Class that adapts the quality of the game to the measured frame time
+The update and draw times of every frame are averaged and compared to the frame budget
+When the frames are over the budget the quality is lowered one tier at a time:
+    - the game menu is refreshed less often
+    - the level generation runs fewer WFC steps per frame
+    - only every other frame is drawn
+When there is enough headroom again the quality is restored one tier at a time
+"""
+
+
+class QualityGovernor:
+    """Class that adapts the quality of the game to the measured frame time"""
+
+    # (WFC steps per frame, frames between menu refreshes, frames between drawn frames)
+    TIERS = (
+        (1.0, 1, 1),
+        (1.0, 4, 1),
+        (0.5, 15, 1),
+        (0.25, 30, 2),
+    )
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, budget: float, enabled: bool = True, smoothing: float = 0.1,
+                 patience: int = 30, headroom: float = 0.5):
+        """
+        :param budget: time available for one frame in seconds
+        :param enabled: adapt the quality, if False the full quality is kept
+        :param smoothing: weight of the newest frame in the average
+        :param patience: number of frames over the budget before the quality is lowered,
+            the quality is restored after four times as many frames with headroom
+        :param headroom: part of the budget the frames must fit into to restore the quality
+        """
+        self.budget = budget
+        self.enabled = enabled
+        self.smoothing = smoothing
+        self.patience = patience
+        self.headroom = headroom
+
+        self.level = 0
+        self.frame = 0
+        self.average = 0.0
+        self.update_time = 0.0
+        self.draw_time = 0.0
+        self._over = 0
+        self._under = 0
+
+    @property
+    def wfc_steps(self) -> float:
+        """
+        :return: number of WFC steps per frame, fractions are accumulated over the frames
+        """
+        return self.TIERS[self.level][0]
+
+    @property
+    def ui_interval(self) -> int:
+        """
+        :return: number of frames between the refreshes of the game menu
+        """
+        return self.TIERS[self.level][1]
+
+    @property
+    def draw_interval(self) -> int:
+        """
+        :return: number of frames between the drawn frames
+        """
+        return self.TIERS[self.level][2]
+
+    def should_refresh_ui(self) -> bool:
+        """
+        :return: True if the game menu should be refreshed in this frame
+        """
+        return self.frame % self.ui_interval == 0
+
+    def should_draw(self) -> bool:
+        """
+        :return: True if this frame should be drawn
+        """
+        return self.frame % self.draw_interval == 0
+
+    def record(self, update_time: float, draw_time: float = None) -> int:
+        """
+        Measure the frame and adapt the quality
+        :param update_time: time spent updating the state in seconds
+        :param draw_time: time spent drawing in seconds, None if the frame was not drawn
+        :return: the quality tier, 0 is the full quality
+        """
+        self.frame += 1
+        self.update_time = update_time
+        # Skipped frames are expected to cost the same as the last drawn one
+        if draw_time is not None:
+            self.draw_time = draw_time
+        self.average += self.smoothing * (update_time + self.draw_time - self.average)
+
+        if not self.enabled:
+            return self.level
+
+        if self.average > self.budget:
+            self._over += 1
+            self._under = 0
+        elif self.average < self.budget * self.headroom:
+            self._under += 1
+            self._over = 0
+        else:
+            self._over = 0
+            self._under = 0
+
+        if self._over >= self.patience and self.level < len(self.TIERS) - 1:
+            self.level += 1
+            self._over = 0
+        elif self._under >= self.patience * 4 and self.level > 0:
+            self.level -= 1
+            self._under = 0
+        return self.level
@@ -0,0 +1,97 @@
+"""
+Class that derives independent random streams from the seed of the game
+Every entity and system draws from its own stream instead of the global random module:
+    - the key of a stream is a hash of the game seed, the stream name and the entity id
+    - a stream is a NumPy Philox generator, a counter-based generator keyed by the hash
+    - the vectorised draws hash (key, entity id, counter) directly, one number per entity
+The numbers depend only on the seed, the name, the id and the counter,
+so they are reproducible and don't change with the order of the updates
+or the number of the other entities
+"""
+import zlib
+from typing import Hashable
+import numpy as np
+
+# Constants of the SplitMix64 finaliser
+GOLDEN_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+MIX_2 = np.uint64(0x94D049BB133111EB)
+
+# 53 bits of a hash make a uniform double in [0, 1)
+FLOAT_SCALE = 1.0 / (1 << 53)
+
+
+def mix(values) -> np.ndarray:
+    """
+    SplitMix64 hash, every bit of the input changes half of the output bits
+    :param values: integers, scalar or array
+    :return: uint64 array of the hashes
+    """
+    z = np.array(values, dtype=np.uint64, ndmin=1)
+    # The multiplications wrap around 64 bits on purpose
+    with np.errstate(over='ignore'):
+        z = z + GOLDEN_GAMMA
+        z = (z ^ (z >> np.uint64(30))) * MIX_1
+        z = (z ^ (z >> np.uint64(27))) * MIX_2
+    return z ^ (z >> np.uint64(31))
+
+
+def _to_int(part: Hashable) -> int:
+    """
+    :param part: stream name or entity id
+    :return: unsigned 64-bit integer, the names are hashed independent of the interpreter
+    """
+    if isinstance(part, str):
+        return zlib.crc32(part.encode('utf-8'))
+    return int(part) & 0xFFFFFFFFFFFFFFFF
+
+
+class RandomStreams:
+    """Class that derives independent random streams from the seed of the game"""
+
+    def __init__(self, seed: int):
+        """
+        :param seed: seed of the game
+        """
+        self.seed = seed
+
+    def key(self, *parts: Hashable) -> int:
+        """
+        :param parts: stream name and entity ids
+        :return: 64-bit key of the stream
+        """
+        key = mix(_to_int(self.seed))
+        for part in parts:
+            key = mix(key ^ np.uint64(_to_int(part)))
+        return int(key[0])
+
+    def generator(self, *parts: Hashable) -> np.random.Generator:
+        """
+        :param parts: stream name and entity ids
+        :return: Philox generator of the stream, the same parts give the same numbers
+        """
+        return np.random.Generator(np.random.Philox(key=self.key(*parts)))
+
+    def uniform(self, name: str, ids, counter: int) -> np.ndarray:
+        """
+        Vectorised draw of one number for every id
+        :param name: name of the stream
+        :param ids: integer entity ids, any shape
+        :param counter: number of the draw, usually the tick
+        :return: doubles in [0, 1) with the shape of the ids
+        """
+        ids = np.asarray(ids, dtype=np.uint64)
+        bits = mix(mix(np.uint64(self.key(name)) ^ ids.ravel())
+                   ^ np.uint64(_to_int(counter)))
+        return ((bits >> np.uint64(11)) * FLOAT_SCALE).reshape(ids.shape)
+
+    def integers(self, name: str, ids, counter: int, high: int) -> np.ndarray:
+        """
+        Vectorised draw of one integer for every id
+        :param name: name of the stream
+        :param ids: integer entity ids, any shape
+        :param counter: number of the draw, usually the tick
+        :param high: exclusive upper bound
+        :return: integers in [0, high) with the shape of the ids
+        """
+        return (self.uniform(name, ids, counter) * high).astype(np.int64)
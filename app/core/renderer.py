@@ -0,0 +1,126 @@
+"""
+Class that draws the frame in a few batched blits
+The (surface, dest) pairs of a layer are collected into a sequence
+and the whole layer is drawn with a single Surface.blits call
+Sequences of the static layers are kept and reused until they are invalidated
+The number of issued draw calls is counted for every frame
+"""
+from typing import Dict, Iterable, List, Sequence, Tuple
+import pygame
+
+# (surface, dest) or (surface, dest, area) accepted by Surface.blits
+BlitItem = Tuple
+
+
+class BatchRenderer:
+    """Class that draws the frame in a few batched blits"""
+
+    def __init__(self):
+        # Sequences reused across frames
+        self._static: Dict[str, List[BlitItem]] = {}
+        # Sequences collected for the current frame only
+        self._dynamic: Dict[str, List[BlitItem]] = {}
+
+        self.draw_calls = 0
+        # Draw calls of the last finished frame
+        self.frame_draw_calls = 0
+
+    def begin_frame(self) -> None:
+        """
+        Start a new frame, drop the dynamic sequences of the last frame
+        """
+        self._dynamic = {}
+        self.draw_calls = 0
+
+    def end_frame(self) -> int:
+        """
+        Finish the frame
+        :return: number of draw calls issued in the frame
+        """
+        self.frame_draw_calls = self.draw_calls
+        return self.frame_draw_calls
+
+    def has_static(self, layer: str) -> bool:
+        """
+        :param layer: name of the layer
+        :return: True if the static sequence of the layer is prebuilt
+        """
+        return layer in self._static
+
+    def set_static(self, layer: str, items: Iterable[BlitItem]) -> None:
+        """
+        Prebuild the sequence of a layer that does not change between frames
+        :param layer: name of the layer
+        :param items: (surface, dest) or (surface, dest, area) tuples
+        """
+        self._static[layer] = list(items)
+
+    def invalidate(self, layer: str = None) -> None:
+        """
+        Drop the static sequence so it is rebuilt
+        :param layer: name of the layer, all layers if None
+        """
+        if layer is None:
+            self._static = {}
+        else:
+            self._static.pop(layer, None)
+
+    def add(self, layer: str, surface: pygame.Surface, dest, area: pygame.Rect = None) -> None:
+        """
+        Add a single blit to the dynamic sequence of the layer
+        :param layer: name of the layer
+        :param surface: image to draw
+        :param dest: position or rect on the target
+        :param area: part of the image to draw, whole image if None
+        """
+        item = (surface, dest) if area is None else (surface, dest, area)
+        self._dynamic.setdefault(layer, []).append(item)
+
+    def add_sprites(self, layer: str, sprites: Iterable[pygame.sprite.Sprite]) -> None:
+        """
+        Add the sprites to the dynamic sequence of the layer
+        :param layer: name of the layer
+        :param sprites: sprites with image and rect
+        """
+        self._dynamic.setdefault(layer, []).extend(
+            (sprite.image, sprite.rect) for sprite in sprites)
+
+    def extend(self, layer: str, items: Iterable[BlitItem]) -> None:
+        """
+        Add the blits to the dynamic sequence of the layer
+        :param layer: name of the layer
+        :param items: (surface, dest) or (surface, dest, area) tuples
+        """
+        self._dynamic.setdefault(layer, []).extend(items)
+
+    def get_sequence(self, layer: str) -> Sequence[BlitItem]:
+        """
+        :param layer: name of the layer
+        :return: static sequence of the layer or the dynamic one collected in this frame
+        """
+        if layer in self._static:
+            return self._static[layer]
+        return self._dynamic.get(layer, ())
+
+    def draw(self, target: pygame.Surface, layers: Iterable[str]) -> None:
+        """
+        Draw the layers in order, every non-empty layer is a single draw call
+        :param target: surface to draw to
+        :param layers: names of the layers
+        """
+        for layer in layers:
+            sequence = self.get_sequence(layer)
+            if sequence:
+                target.blits(sequence, doreturn=False)
+                self.draw_calls += 1
+
+    def fill(self, target: pygame.Surface, color: Tuple[int, int, int],
+             rect: pygame.Rect = None) -> None:
+        """
+        Fill the target, counted as a draw call
+        :param target: surface to fill
+        :param color: rgb color
+        :param rect: area to fill, whole target if None
+        """
+        target.fill(color, rect)
+        self.draw_calls += 1
@@ -0,0 +1,189 @@
+# pygame constants missing errors
+# pylint: disable=no-member
+"""
+Classes that record a game and replay it without a window
+The recording holds everything the simulation depends on:
+    - the seed of the game, the tile grid of the level and the config constants
+    - the held keys and the pressed keys of every tick, run-length encoded
+    - the number of ticks and the hash of the final state
+The file is a gzip compressed JSON document
+The replayer re-runs GameState tick by tick at full speed without drawing
+and compares the final state hash, so a replay is a regression test and a benchmark
+"""
+import gzip
+import json
+import time
+from typing import Dict, List
+import pygame
+from app.core.config import Config
+from app.core.input_source import InputSource, KeyState
+from app.core.level_pack import LevelPack
+
+FORMAT_VERSION = 1
+
+# Keys the game reacts to, stored as the bits of the masks in this order
+INPUT_KEYS = (Config.MOVE_UP, Config.MOVE_DOWN, Config.MOVE_LEFT, Config.MOVE_RIGHT,
+              Config.PLANT_BOMB_KEY)
+
+
+def keys_to_mask(keys) -> int:
+    """
+    :param keys: collection of key codes or a key state indexed by the key codes
+    :return: bit mask of the INPUT_KEYS
+    """
+    if isinstance(keys, (set, frozenset, list, tuple)):
+        return sum(1 << bit for bit, key in enumerate(INPUT_KEYS) if key in keys)
+    return sum(1 << bit for bit, key in enumerate(INPUT_KEYS) if keys[key])
+
+
+def mask_to_keys(mask: int) -> List[int]:
+    """
+    :param mask: bit mask of the INPUT_KEYS
+    :return: key codes in the mask
+    """
+    return [key for bit, key in enumerate(INPUT_KEYS) if mask & (1 << bit)]
+
+
+class Recorder:
+    """Class that records the input of a game"""
+
+    def __init__(self, path: str):
+        """
+        :param path: path of the recording file
+        """
+        self.path = path
+        self._state = None
+        self._header = None
+        # [held mask, pressed mask, number of ticks]
+        self._runs: List[List[int]] = []
+        self.ticks = 0
+
+    def start(self, state) -> None:
+        """
+        Start a new recording, the last one is discarded unless it was saved
+        :param state: GameState with the level already retrieved
+        """
+        self._state = state
+        self._header = {'version': FORMAT_VERSION,
+                        'seed': state.seed,
+                        'level': state.level,
+                        'consts': dict(Config.consts)}
+        self._runs = []
+        self.ticks = 0
+
+    def record(self, events: List[pygame.event.Event], pressed) -> None:
+        """
+        Add the input of one tick
+        :param events: events passed to the update
+        :param pressed: state of the keyboard in the update
+        """
+        if self._header is None:
+            return
+        held = keys_to_mask(pressed)
+        down = keys_to_mask({event.key for event in events if event.type == pygame.KEYDOWN})
+        if self._runs and self._runs[-1][:2] == [held, down]:
+            self._runs[-1][2] += 1
+        else:
+            self._runs.append([held, down, 1])
+        self.ticks += 1
+
+    def save(self) -> None:
+        """
+        Write the recording with the hash of the current state
+        """
+        if self._header is None:
+            return
+        recording = dict(self._header, inputs=self._runs, ticks=self.ticks,
+                         hash=self._state.state_hash())
+        with gzip.open(self.path, 'wt', encoding='utf-8') as file:
+            json.dump(recording, file, separators=(',', ':'))
+
+
+class ReplayInput(InputSource):
+    """Class that feeds the recorded input tick by tick"""
+
+    def __init__(self, runs: List[List[int]]):
+        """
+        :param runs: [held mask, pressed mask, number of ticks] of the recording
+        """
+        self._runs = runs
+        self._run = 0
+        self._repeat = 0
+        self._held = KeyState()
+
+    def poll(self) -> List[pygame.event.Event]:
+        """
+        Advance the recording by one tick
+        :return: KEYDOWN events of the keys pressed in the tick
+        """
+        if self._run >= len(self._runs):
+            self._held = KeyState()
+            return []
+        held, down, count = self._runs[self._run]
+        self._repeat += 1
+        if self._repeat >= count:
+            self._run += 1
+            self._repeat = 0
+        self._held = KeyState(mask_to_keys(held))
+        return [pygame.event.Event(pygame.KEYDOWN, key=key) for key in mask_to_keys(down)]
+
+    def get_pressed(self) -> KeyState:
+        """
+        :return: keys held down in the current tick
+        """
+        return self._held
+
+
+class Replayer:
+    """Class that re-runs a recorded game and verifies its final state"""
+
+    def __init__(self, path: str):
+        """
+        :param path: path of the recording file
+        """
+        with gzip.open(path, 'rt', encoding='utf-8') as file:
+            self.recording = json.load(file)
+        if self.recording.get('version') != FORMAT_VERSION:
+            raise ValueError(f'Unsupported recording version: {self.recording.get("version")}')
+
+    def _recorded_consts(self) -> Dict:
+        """
+        :return: recorded config constants, JSON lists turned back into tuples
+        """
+        return {key: tuple(value) if isinstance(value, list) else value
+                for key, value in self.recording['consts'].items()}
+
+    def run(self) -> Dict:
+        """
+        Re-run the game with the recorded config, the config is restored afterwards
+        :return: number of ticks, final and recorded hash, match and the run time
+        """
+        # The game state is imported here, it depends on the whole game
+        # pylint: disable=import-outside-toplevel
+        from app.states.game_state import GameState
+
+        saved = dict(Config.consts)
+        Config.consts.update(self._recorded_consts())
+        Config.update_grid_size()
+        try:
+            level = self.recording['level']
+            tiles = {symbol: tuple(tile) for symbol, tile in level['tiles'].items()}
+            state = GameState(self.recording['seed'])
+            state.input_source = ReplayInput(self.recording['inputs'])
+            state.retrieve_information(LevelPack.create_level_information(level['grid'], tiles))
+
+            start = time.perf_counter()
+            for _ in range(self.recording['ticks']):
+                state.update(state.input_source.poll())
+            elapsed = time.perf_counter() - start
+            state_hash = state.state_hash()
+        finally:
+            Config.consts.clear()
+            Config.consts.update(saved)
+            Config.update_grid_size()
+
+        return {'ticks': self.recording['ticks'],
+                'hash': state_hash,
+                'expected': self.recording['hash'],
+                'match': state_hash == self.recording['hash'],
+                'seconds': elapsed}
@@ -0,0 +1,134 @@
+"""
+Classes that index the moving entities by the cells of a uniform grid
+Every sprite is stored in the buckets of the cells its hitbox overlaps
+A collision query visits only the buckets of the cells overlapped by the probe
+SpatialGroup keeps the index in sync when the sprites are added or killed,
+moved sprites are re-indexed by refresh after the group update
+"""
+from typing import Dict, List, Tuple
+import pygame
+
+
+class SpatialHash:
+    """Class that indexes the sprites by the cells of a uniform grid"""
+
+    def __init__(self, cell_size: int):
+        """
+        :param cell_size: size of the cell in pixels
+        """
+        self.cell_size = cell_size
+        # Buckets keyed by (column, row), dicts keep the insertion order
+        self._buckets: Dict[Tuple[int, int], Dict[pygame.sprite.Sprite, None]] = {}
+        # Cells of every indexed sprite
+        self._cells: Dict[pygame.sprite.Sprite, Tuple[Tuple[int, int], ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self._cells)
+
+    def __contains__(self, sprite: pygame.sprite.Sprite) -> bool:
+        return sprite in self._cells
+
+    def cells_of(self, rect: pygame.Rect) -> Tuple[Tuple[int, int], ...]:
+        """
+        :param rect: hitbox in pixels
+        :return: (column, row) of the cells overlapped by the hitbox
+        """
+        if rect.width <= 0 or rect.height <= 0:
+            return ()
+        # The right and bottom edges are exclusive
+        left, right = rect.left // self.cell_size, (rect.right - 1) // self.cell_size
+        top, bottom = rect.top // self.cell_size, (rect.bottom - 1) // self.cell_size
+        return tuple((x, y) for y in range(top, bottom + 1) for x in range(left, right + 1))
+
+    def insert(self, sprite: pygame.sprite.Sprite) -> None:
+        """
+        Index the sprite by its current hitbox
+        :param sprite: sprite with a rect
+        """
+        cells = self.cells_of(sprite.rect)
+        self._cells[sprite] = cells
+        for cell in cells:
+            self._buckets.setdefault(cell, {})[sprite] = None
+
+    def remove(self, sprite: pygame.sprite.Sprite) -> None:
+        """
+        Remove the sprite from the index
+        :param sprite: indexed sprite
+        """
+        for cell in self._cells.pop(sprite, ()):
+            bucket = self._buckets[cell]
+            del bucket[sprite]
+            if not bucket:
+                del self._buckets[cell]
+
+    def move(self, sprite: pygame.sprite.Sprite) -> bool:
+        """
+        Re-index the sprite after it moved, the buckets change only if the cells differ
+        :param sprite: indexed sprite
+        :return: True if the sprite changed its cells
+        """
+        if self._cells.get(sprite) == self.cells_of(sprite.rect):
+            return False
+        self.remove(sprite)
+        self.insert(sprite)
+        return True
+
+    def query(self, rect: pygame.Rect) -> List[pygame.sprite.Sprite]:
+        """
+        Find the sprites colliding with the hitbox
+        :param rect: hitbox in pixels
+        :return: colliding sprites
+        """
+        found = {}
+        for cell in self.cells_of(rect):
+            for sprite in self._buckets.get(cell, ()):
+                if sprite not in found and rect.colliderect(sprite.rect):
+                    found[sprite] = None
+        return list(found)
+
+    def clear(self) -> None:
+        """
+        Remove all the sprites
+        """
+        self._buckets = {}
+        self._cells = {}
+
+
+class SpatialGroup(pygame.sprite.Group):
+    """Sprite group answering the collision queries from a spatial hash"""
+
+    def __init__(self, cell_size: int, *sprites):
+        """
+        :param cell_size: size of the cell of the spatial hash in pixels
+        :param sprites: initial sprites
+        """
+        self.spatial_hash = SpatialHash(cell_size)
+        super().__init__(*sprites)
+
+    def add_internal(self, sprite: pygame.sprite.Sprite, layer=None) -> None:
+        super().add_internal(sprite, layer)
+        self.spatial_hash.insert(sprite)
+
+    def remove_internal(self, sprite: pygame.sprite.Sprite) -> None:
+        super().remove_internal(sprite)
+        self.spatial_hash.remove(sprite)
+
+    def refresh(self) -> None:
+        """
+        Re-index the sprites that moved since the last refresh
+        """
+        for sprite in self.sprites():
+            self.spatial_hash.move(sprite)
+
+    def collide(self, sprite: pygame.sprite.Sprite, dokill: bool) -> List[pygame.sprite.Sprite]:
+        """
+        Find the sprites of the group colliding with the sprite, same as spritecollide
+        :param sprite: sprite with a rect
+        :param dokill: kill all collided sprites
+        :return: collided sprites
+        """
+        collisions = self.spatial_hash.query(sprite.rect)
+        if dokill:
+            for collided in collisions:
+                collided.kill()
+        return collisions
@@ -10,23 +10,70 @@ Throughout the runtime,
     - one state must be always active
 Game class handles the active states' draw-update loop,
 starts the tick clock and handles the pygame event feed
+The states are updated in fixed ticks of 1/FPS seconds independently of the drawn frames,
+the real time is accumulated and every frame runs the ticks that fit into it,
+the entities are drawn interpolated between the last two ticks
+The fast-forward multiplier scales the simulated time, 0 runs one tick per frame at full speed
+In the headless mode the game runs without a window on the SDL dummy video driver,
+optionally without rendering and with an uncapped frame rate
+The input of the games can be recorded and replayed without a window
 """
 import json
-from typing import List
+import os
+import time
+from typing import Dict, List
 import pygame
+from app.core.asset_preloader import AssetPreloader
 from app.core.config import Config
+from app.core.input_source import InputSource
+from app.core.level_prefetcher import LevelPrefetcher
+from app.core.quality_governor import QualityGovernor
+from app.core.replay import Recorder
+from app.gui.label import Label
+from app.gui.progress_bar import ProgressBar
 from app.states.game_state import GameState
 from app.states.menu_state import Menu
 from app.states.summary_state import SummaryState
 from app.states.wfc_state import WaveFunctionCollapseState
 
+# Longest real time simulated in one frame, the game slows down instead of stalling
+MAX_FRAME_TIME = 0.25
+
 
 class StateManager:
     """Class Game handles the main update-draw loop"""
 
-    def __init__(self):
+    # Too many arguments error, all are optional settings of the run
+    # pylint: disable=too-many-arguments
+    def __init__(self, headless: bool = False, render: bool = True, uncapped: bool = False,
+                 input_source: InputSource = None, start_state: int = 0,
+                 information: Dict = None, fast_forward: float = None, record: str = None):
+        """
+        :param headless: run without a window, on the SDL dummy video driver
+        :param render: draw the states, disable to only simulate the game
+        :param uncapped: do not limit the drawn frames to the FPS
+        :param input_source: source of the player input, the keyboard if None
+        :param start_state: index of the first active state
+        :param information: information passed to the first active state
+        :param fast_forward: simulated seconds per real second, 0 runs one tick per frame,
+            FAST_FORWARD from the config if None
+        :param record: path to record the input of the games to, nothing is recorded if None
+        """
+        if headless:
+            # Has to be set before the display is initialized
+            os.environ['SDL_VIDEODRIVER'] = 'dummy'
         pygame.init()
 
+        self.headless = headless
+        self.render = render
+        self.uncapped = uncapped
+        self.input_source = input_source or InputSource()
+        self.fast_forward = fast_forward
+        # The last game is recorded, the file is written when the game ends or the loop quits
+        self.recorder = Recorder(record) if record else None
+        self.frame_count = 0
+        self.tick_count = 0
+
         # Load config data
         try:
             Config.import_from_json()
@@ -38,18 +85,77 @@ class StateManager:
             print(f"An unexpected error occurred: {e}")
 
         self.run = False
-        self.screen = pygame.display.set_mode(vsync=Config.consts['VSYNC'],
+        # Vsync would cap the loop and needs a real renderer
+        self.screen = pygame.display.set_mode(vsync=0 if headless else Config.consts['VSYNC'],
                                               size=Config.get_screen_size(),
-                                              flags=pygame.SCALED)
-        self.states = [Menu(), WaveFunctionCollapseState(), GameState(), SummaryState()]
-        self.current_state = 0
+                                              flags=0 if headless else pygame.SCALED)
+        Config.open_bundle()
+        self._preload_assets()
+        Config.build_atlas(Config.consts['CELL_SIZE'])
+        if self.fast_forward is None:
+            self.fast_forward = Config.consts['FAST_FORWARD']
+        # Lowers the quality when the frames do not fit into the budget
+        self.governor = QualityGovernor(1 / Config.consts['FPS'],
+                                        Config.consts['ADAPTIVE_QUALITY'])
+        self._state_types = [Menu, WaveFunctionCollapseState, GameState, SummaryState]
+        self.states = [self._create_state(i) for i in range(len(self._state_types))]
+        self.current_state = start_state
+        if information is not None:
+            self.states[self.current_state].retrieve_information(information)
 
-        self.cursor_image = Config.load_image(Config.consts['CURSOR_IMAGE'], 80)
+        # Generate the next levels while the player is busy
+        self.prefetcher = LevelPrefetcher(WaveFunctionCollapseState.create_generator,
+                                          Config.consts['PREFETCH_LEVELS'])
+        self.prefetcher.start()
+
+        self.cursor_image = Config.load_image(Config.consts['CURSOR_IMAGE'], Config.CURSOR_SIZE)
         self.cursor_rect = self.cursor_image.get_rect()
 
         # Set the custom cursor
         pygame.mouse.set_visible(False)
 
+    def _create_state(self, index: int):
+        """
+        Create a new state reading the input from the input source
+        :param index: index of the state type
+        :return: new state
+        """
+        state = self._state_types[index]()
+        state.input_source = self.input_source
+        state.governor = self.governor
+        if isinstance(state, GameState):
+            state.recorder = self.recorder
+        return state
+
+    def _preload_assets(self) -> None:
+        """
+        Decode all the images on a thread pool while showing the loading screen
+        """
+        requests = Config.get_image_requests()
+        Config.image_cache.max_size = max(Config.image_cache.max_size, len(requests))
+        preloader = AssetPreloader(requests, Config.decode_image)
+        preloader.start()
+
+        pygame.display.set_caption('Loading')
+        label = Label('Loading', {'color': Config.consts['WHITE'], 'size': 30},
+                      pos=(Config.consts['WIDTH'] * 0.40, Config.consts['HEIGHT'] * 0.4))
+        bar = ProgressBar((Config.consts['WIDTH'] * 0.25, Config.consts['HEIGHT'] * 0.5),
+                          (Config.consts['WIDTH'] * 0.5, Config.consts['CELL_SIZE']))
+        clock = pygame.time.Clock()
+        while not preloader.done():
+            clock.tick(Config.consts['FPS'])
+            pygame.event.pump()
+            if not self.render:
+                continue
+            bar.progress = preloader.progress()
+            self.screen.fill(Config.consts['BACKGROUND_COLOR'])
+            label.draw(self.screen)
+            bar.draw(self.screen)
+            pygame.display.flip()
+
+        # Conversion to the display format has to run on the main thread
+        preloader.store(Config.store_image)
+
     def _handle_events(self, events: List) -> None:
         """
         Call update method for active state
@@ -66,11 +172,16 @@ class StateManager:
         """
         Call draw method for active state and update the screen
         """
-        self.screen.fill(Config.consts['WHITE'])
-        self.states[self.current_state].draw(self.screen)
+        changed = self.states[self.current_state].draw(self.screen)
         if self.states[self.current_state].cursor:
             self.screen.blit(self.cursor_image, self.cursor_rect)
-        pygame.display.flip()
+            changed = None
+
+        # Update only the changed areas if the state tracks them
+        if changed is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(changed)
 
     def _handle_state(self) -> None:
         """
@@ -79,24 +190,80 @@ class StateManager:
         """
         if not self.states[self.current_state].change_state():
             return
+        if self.recorder is not None:
+            self.recorder.save()
 
         information = self.states[self.current_state].information
         self.current_state = (self.current_state + 1) % len(self.states)
-        # New init
-        self.states = [Menu(), WaveFunctionCollapseState(), GameState(), SummaryState()]
+
+        # Skip the generation if a level is already prepared in the background
+        if self._state_types[self.current_state] is WaveFunctionCollapseState:
+            level = self.prefetcher.get_level()
+            if level is not None:
+                information = level
+                self.current_state += 1
+
+        # New init, only the state that becomes active
+        self.states[self.current_state] = self._create_state(self.current_state)
         self.states[self.current_state].retrieve_information(information)
 
+    def _run_ticks(self, ticks: int) -> int:
+        """
+        Update the active state in fixed ticks, every tick reads its own input
+        Stops early when the game quits or the state is finished
+        :param ticks: number of ticks to run
+        :return: number of ticks run
+        """
+        for tick in range(ticks):
+            self._handle_events(self.input_source.poll())
+            self.tick_count += 1
+            if not self.run or self.states[self.current_state].change_state():
+                return tick + 1
+        return ticks
+
     def game_loop(self) -> None:
         """The main game-loop of game"""
         clock = pygame.time.Clock()
+        tick_time = 1 / Config.consts['FPS']
+        # The first frame runs a tick, the states are updated before they are drawn
+        accumulator = tick_time
+        last = time.perf_counter()
         self.run = True
         while self.run:
-            clock.tick(Config.consts['FPS'])
-            events = pygame.event.get()
-            self._handle_events(events)
-            self._handle_draw()
+            if not self.uncapped:
+                clock.tick(Config.consts['FPS'])
+
+            now = time.perf_counter()
+            if self.fast_forward:
+                accumulator += min(now - last, MAX_FRAME_TIME) * self.fast_forward
+                ticks = int(accumulator / tick_time)
+                accumulator -= ticks * tick_time
+            else:
+                ticks = 1
+            last = now
+
+            start = time.perf_counter()
+            ran = self._run_ticks(ticks)
+            update_time = time.perf_counter() - start
+            # The ticks left after a state change run in the next state
+            if self.fast_forward:
+                accumulator += (ticks - ran) * tick_time
+
+            draw_time = None
+            if self.render and self.governor.should_draw():
+                start = time.perf_counter()
+                # Draw the time between the last two ticks
+                self.states[self.current_state].interpolation = (
+                    min(accumulator / tick_time, 1.0) if self.fast_forward else 1.0)
+                self._handle_draw()
+                draw_time = time.perf_counter() - start
+            # The budget is one tick, fast-forwarded frames run several
+            self.governor.record(update_time / max(ran, 1), draw_time)
             self._handle_state()
+            self.frame_count += 1
         # Exit application
-
+        if self.recorder is not None:
+            self.recorder.save()
+        self.prefetcher.stop()
         pygame.display.quit()
         pygame.quit()
@@ -0,0 +1,112 @@
+"""
+Class that packs the assets into a few large surfaces
+Every asset is scaled to the cell size once and copied into a page of the atlas
+Entities then share subsurfaces of the pages instead of their own images
+The atlas is rebuilt only when the cell size or the assets change
+"""
+import os
+from typing import Callable, Dict, List, Tuple
+import pygame
+
+
+def copy_image(dest: pygame.Surface, image: pygame.Surface, rect: pygame.Rect) -> None:
+    """
+    Copy the image into the empty area of a transparent surface
+    :param dest: transparent surface with per-pixel alpha
+    :param image: image to copy
+    :param rect: area of the dest
+    """
+    # Colorkey pixels are skipped and stay transparent
+    if image.get_colorkey() is not None:
+        dest.blit(image, rect)
+        return
+    # Copy the pixels including alpha without blending
+    dest.blit(image, rect, special_flags=pygame.BLEND_RGBA_MAX)
+
+
+class TextureAtlas:
+    """Class that packs the assets into a few large surfaces"""
+
+    def __init__(self, max_page_size: int = 2048):
+        """
+        :param max_page_size: maximal width and height of one page
+        """
+        self.max_page_size = max_page_size
+        self.pages: List[pygame.Surface] = []
+        self._regions: Dict[Tuple[str, Tuple[int, int]], pygame.Surface] = {}
+        self._signature = None
+
+    def __len__(self) -> int:
+        return len(self._regions)
+
+    @staticmethod
+    def _get_signature(asset_dir: str, cell_size: int) -> Tuple:
+        """
+        Describe the inputs of the atlas
+        :param asset_dir: directory with the assets
+        :param cell_size: size of the packed images
+        :return: tuple that changes whenever the atlas has to be rebuilt
+        """
+        assets = tuple((name, os.stat(os.path.join(asset_dir, name)).st_mtime_ns)
+                       for name in sorted(os.listdir(asset_dir)) if name.endswith('.png'))
+        return os.path.abspath(asset_dir), cell_size, assets
+
+    def build(self, asset_dir: str, cell_size: int, decode: Callable) -> bool:
+        """
+        Pack all the assets scaled to the cell size
+        :param asset_dir: directory with the assets
+        :param cell_size: size of the packed images
+        :param decode: callable(asset name, (width, height)) returning scaled image
+        :return: True if the atlas was rebuilt, False if it is up to date
+        """
+        signature = self._get_signature(asset_dir, cell_size)
+        if signature == self._signature:
+            return False
+
+        names = [name for name, _ in signature[2]]
+        columns = max(self.max_page_size // cell_size, 1)
+        per_page = columns * columns
+        size = (cell_size, cell_size)
+
+        self.pages = []
+        self._regions = {}
+        for first in range(0, len(names), per_page):
+            page_names = names[first:first + per_page]
+            rows = -(-len(page_names) // columns)
+            page = pygame.Surface((min(len(page_names), columns) * cell_size, rows * cell_size),
+                                  pygame.SRCALPHA)
+            page.fill((0, 0, 0, 0))
+
+            rects = []
+            for i, name in enumerate(page_names):
+                rect = pygame.Rect((i % columns) * cell_size, (i // columns) * cell_size,
+                                   cell_size, cell_size)
+                copy_image(page, decode(name, size), rect)
+                rects.append((name, rect))
+
+            if pygame.display.get_surface() is not None:
+                page = page.convert_alpha()
+
+            for name, rect in rects:
+                self._regions[(name, size)] = page.subsurface(rect)
+            self.pages.append(page)
+
+        self._signature = signature
+        return True
+
+    def get(self, asset_name: str, size: Tuple[int, int]) -> pygame.Surface | None:
+        """
+        Retrieve the packed image
+        :param asset_name: filename of the asset
+        :param size: (width, height) of the image
+        :return: subsurface of a page or None if the image is not in the atlas
+        """
+        return self._regions.get((asset_name, size))
+
+    def clear(self) -> None:
+        """
+        Remove all the pages
+        """
+        self.pages = []
+        self._regions = {}
+        self._signature = None
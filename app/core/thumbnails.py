@@ -0,0 +1,189 @@
+"""
+Class that renders the preview images of many levels
+Every tile is decoded and downscaled once into a NumPy array
+A thumbnail is composed by indexing the stack of tiles with the tile grid,
+no sprites are created for the cells
+The levels are split between processes, every process writes its own PNGs
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+import pygame
+from app.core.level_pack import LevelPack
+
+# Renderer of the worker process, created once by the initializer
+_WORKER = None
+
+
+class ThumbnailRenderer:
+    """Class that renders the preview images of many levels"""
+
+    def __init__(self, symbols: Sequence[str], tiles: Dict, tile_size: int, asset_dir: str,
+                 background: Tuple[int, int, int] = (0, 0, 0)):
+        """
+        Decode the tiles
+        :param symbols: tile symbols ordered by their index
+        :param tiles: {symbol: (asset, is wall)}
+        :param tile_size: size of one cell in the thumbnail in pixels
+        :param asset_dir: directory with the assets
+        :param background: color of the transparent pixels
+        """
+        self.symbols = list(symbols)
+        self._lookup = {symbol: index for index, symbol in enumerate(self.symbols)}
+        self.tile_size = tile_size
+
+        # Shape (number of tiles, x, y, rgb), the same axes as pygame.surfarray
+        self._stack = np.stack([self._decode_tile(os.path.join(asset_dir, tiles[symbol][0]),
+                                                  tile_size, background)
+                                for symbol in self.symbols])
+
+    @staticmethod
+    def _decode_tile(path: str, tile_size: int, background: Tuple[int, int, int]) -> np.ndarray:
+        """
+        Decode and downscale the tile over the background
+        :param path: path to the image
+        :param tile_size: size of the tile in pixels
+        :param background: color of the transparent pixels
+        :return: array of shape (tile_size, tile_size, 3)
+        """
+        image = pygame.image.load(path)
+        image = pygame.transform.scale(image, (tile_size, tile_size))
+        tile = pygame.Surface((tile_size, tile_size))
+        tile.fill(background)
+        tile.blit(image, (0, 0))
+        return pygame.surfarray.array3d(tile)
+
+    def compose(self, indices: np.ndarray) -> np.ndarray:
+        """
+        Compose the thumbnail of a level
+        :param indices: array of shape (height, width) with tile indices
+        :return: pixels of shape (width * tile_size, height * tile_size, 3)
+        """
+        height, width = indices.shape
+        # (width, height, x, y, rgb) -> (width, x, height, y, rgb)
+        cells = self._stack[indices.T]
+        return cells.transpose(0, 2, 1, 3, 4).reshape(width * self.tile_size,
+                                                      height * self.tile_size, 3)
+
+    def grid_to_indices(self, grid: List[List[str]]) -> np.ndarray:
+        """
+        :param grid: rows of tile symbols
+        :return: array of shape (height, width) with tile indices
+        """
+        return np.array([[self._lookup[symbol] for symbol in row] for row in grid],
+                        dtype=np.intp)
+
+    def save(self, indices: np.ndarray, path: str) -> None:
+        """
+        Compose the thumbnail and write it as PNG
+        :param indices: array of shape (height, width) with tile indices
+        :param path: path to the PNG
+        """
+        pygame.image.save(pygame.surfarray.make_surface(self.compose(indices)), path)
+
+
+def _init_worker(symbols: Sequence[str], tiles: Dict, tile_size: int, asset_dir: str,
+                 background: Tuple[int, int, int]) -> None:
+    """
+    Decode the tiles once per worker process
+    """
+    global _WORKER  # pylint: disable=global-statement
+    _WORKER = ThumbnailRenderer(symbols, tiles, tile_size, asset_dir, background)
+
+
+def _render_pack_levels(pack_path: str, numbers: Sequence[int], out_dir: str) -> List[str]:
+    """
+    Render the levels of the pack in the worker process
+    :return: paths to the written thumbnails
+    """
+    paths = []
+    with LevelPack(pack_path) as pack:
+        for number in numbers:
+            path = os.path.join(out_dir, f'level_{number:05d}.png')
+            _WORKER.save(pack.load_indices(number), path)
+            paths.append(path)
+    return paths
+
+
+def _render_grids(grids: Sequence[Tuple[int, List[List[str]]]], out_dir: str) -> List[str]:
+    """
+    Render the tile grids in the worker process
+    :return: paths to the written thumbnails
+    """
+    paths = []
+    for number, grid in grids:
+        path = os.path.join(out_dir, f'level_{number:05d}.png')
+        _WORKER.save(_WORKER.grid_to_indices(grid), path)
+        paths.append(path)
+    return paths
+
+
+def _split(items: Sequence, chunks: int) -> List[Sequence]:
+    """
+    Split the items into at most the given number of continuous chunks
+    """
+    size = -(-len(items) // max(chunks, 1))
+    return [items[i:i + size] for i in range(0, len(items), size)] if items else []
+
+
+def render_pack(pack_path: str, out_dir: str, tile_size: int, asset_dir: str,
+                background: Tuple[int, int, int] = (0, 0, 0), workers: int = None) -> List[str]:
+    """
+    Write the thumbnails of all levels in the pack
+    :param pack_path: path to the level pack
+    :param out_dir: directory for the PNGs
+    :param tile_size: size of one cell in the thumbnail in pixels
+    :param asset_dir: directory with the assets
+    :param background: color of the transparent pixels
+    :param workers: number of processes, number of CPUs if None
+    :return: paths to the written thumbnails
+    """
+    with LevelPack(pack_path) as pack:
+        symbols, tiles, count = pack.symbols, pack.tiles, len(pack)
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker,
+                             initargs=(symbols, tiles, tile_size, asset_dir,
+                                       background)) as executor:
+        futures = [executor.submit(_render_pack_levels, pack_path, chunk, out_dir)
+                   for chunk in _split(range(count), workers * 4)]
+        return [path for future in futures for path in future.result()]
+
+
+def render_grids(grids: Sequence[List[List[str]]], tiles: Dict, out_dir: str, tile_size: int,
+                 asset_dir: str, background: Tuple[int, int, int] = (0, 0, 0),
+                 workers: int = None) -> List[str]:
+    """
+    Write the thumbnails of the tile grids, e.g. from the WFC output
+    :param grids: tile grids, rows of tile symbols
+    :param tiles: {symbol: (asset, is wall)}
+    :param out_dir: directory for the PNGs
+    :param tile_size: size of one cell in the thumbnail in pixels
+    :param asset_dir: directory with the assets
+    :param background: color of the transparent pixels
+    :param workers: number of processes, number of CPUs if None
+    :return: paths to the written thumbnails
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker,
+                             initargs=(sorted(tiles), tiles, tile_size, asset_dir,
+                                       background)) as executor:
+        futures = [executor.submit(_render_grids, chunk, out_dir)
+                   for chunk in _split(list(enumerate(grids)), workers * 4)]
+        return [path for future in futures for path in future.result()]
+
+
+if __name__ == '__main__':
+    # Render the thumbnails: python -m app.core.thumbnails <pack> <output dir> [tile size]
+    import sys
+    from app.core.config import Config
+
+    Config.import_from_json()
+    written = render_pack(sys.argv[1], sys.argv[2],
+                          int(sys.argv[3]) if len(sys.argv) > 3 else 8,
+                          Config.ASSET_DIR, Config.consts['BACKGROUND_COLOR'])
+    print(f'Wrote {len(written)} thumbnails to {sys.argv[2]}')
@@ -0,0 +1,154 @@
+"""
+Class that fires the scheduled callbacks at their tick
+The timers are kept in a hierarchical wheel, every level has 64 slots:
+    - the first level holds the timers of the next 64 ticks, one slot per tick
+    - every higher level covers 64 times more ticks with one slot
+    - when a lower level wraps around, the next slot of the higher level is spread into it
+Scheduling and cancelling a timer is O(1), a tick costs only the timers firing in it
+and the timers moved to the lower level, not the number of pending timers
+The timers firing in the same tick are called in the order they were scheduled,
+a cascaded timer is sorted back in front of the later scheduled ones by its sequence number
+"""
+from typing import Callable, List
+
+SLOT_BITS = 6
+SLOTS = 1 << SLOT_BITS
+LEVELS = 4
+
+
+class Timer:
+    """Handle of a scheduled callback"""
+
+    def __init__(self, wheel: 'TimerWheel', tick: int, callback: Callable, args: tuple,
+                 sequence: int):
+        """
+        :param wheel: wheel the timer is scheduled in
+        :param tick: tick to fire in
+        :param callback: called with the args when the timer fires
+        :param args: arguments of the callback
+        :param sequence: number of the timers scheduled before, orders the timers of a tick
+        """
+        self.wheel = wheel
+        self.tick = tick
+        self.callback = callback
+        self.args = args
+        self.sequence = sequence
+        self.pending = True
+
+    def cancel(self) -> None:
+        """
+        Prevent the callback from firing, fired or cancelled timers are ignored
+        """
+        if self.pending:
+            self.pending = False
+            self.wheel.pending -= 1
+
+
+class TimerWheel:
+    """Class that fires the scheduled callbacks at their tick"""
+
+    def __init__(self, now: int = 0):
+        """
+        :param now: last processed tick
+        """
+        self.now = now
+        self.pending = 0
+        self.fired = 0
+        self._scheduled = 0
+        self._wheel: List[List[List[Timer]]] = [[[] for _ in range(SLOTS)] for _ in range(LEVELS)]
+        # Timers further than all the levels cover
+        self._overflow: List[Timer] = []
+        self._firing = False
+
+    def __len__(self) -> int:
+        return self.pending
+
+    def schedule(self, tick: int, callback: Callable, *args) -> Timer:
+        """
+        Fire the callback at the tick
+        :param tick: absolute tick, the past ticks fire in the next processed tick
+        :param callback: called with the args when the timer fires
+        :param args: arguments of the callback
+        :return: handle to cancel the timer
+        """
+        # A callback can schedule another one in the tick being processed
+        earliest = self.now if self._firing else self.now + 1
+        timer = Timer(self, max(tick, earliest), callback, args, self._scheduled)
+        self._scheduled += 1
+        self.pending += 1
+        self._place(timer)
+        return timer
+
+    def _place(self, timer: Timer) -> None:
+        """
+        Put the timer into the slot of the lowest level covering its tick
+        :param timer: pending timer
+        """
+        delta = timer.tick - self.now
+        for level in range(LEVELS):
+            if delta < 1 << (SLOT_BITS * (level + 1)):
+                slot = (timer.tick >> (SLOT_BITS * level)) & (SLOTS - 1)
+                self._wheel[level][slot].append(timer)
+                return
+        self._overflow.append(timer)
+
+    def _cascade(self, level: int) -> None:
+        """
+        Spread the current slot of the level into the lower levels
+        :param level: level to cascade, at least 1
+        """
+        slot = (self.now >> (SLOT_BITS * level)) & (SLOTS - 1)
+        timers = self._wheel[level][slot]
+        self._wheel[level][slot] = []
+        for timer in timers:
+            if timer.pending:
+                self._place(timer)
+
+    def _step(self) -> None:
+        """
+        Process the next tick
+        """
+        self.now += 1
+
+        # Levels wrap from the highest, its timers may land in the lower levels being cascaded
+        if self.now & ((1 << (SLOT_BITS * LEVELS)) - 1) == 0:
+            overflow, self._overflow = self._overflow, []
+            for timer in overflow:
+                if timer.pending:
+                    self._place(timer)
+        for level in range(LEVELS - 1, 0, -1):
+            if self.now & ((1 << (SLOT_BITS * level)) - 1) == 0:
+                self._cascade(level)
+
+        slot = self.now & (SLOTS - 1)
+        bucket = self._wheel[0][slot]
+        if not bucket:
+            return
+
+        # The cascaded timers were appended behind the timers scheduled later
+        bucket.sort(key=lambda timer: timer.sequence)
+        self._firing = True
+        index = 0
+        # The callbacks may append to the bucket
+        while index < len(bucket):
+            timer = bucket[index]
+            index += 1
+            if timer.pending:
+                timer.pending = False
+                self.pending -= 1
+                self.fired += 1
+                timer.callback(*timer.args)
+        self._wheel[0][slot] = []
+        self._firing = False
+
+    def advance(self, tick: int) -> None:
+        """
+        Fire all the timers up to the tick
+        :param tick: absolute tick to process to
+        """
+        while self.now < tick:
+            # Nothing to fire or cascade
+            if not self.pending:
+                self.now = tick
+                return
+            self._step()
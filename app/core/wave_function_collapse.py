@@ -25,11 +25,15 @@ from app.entities.wall import Wall
 class WaveFunctionCollapse:
     """Class implements simple Tile Wave Function Collapse algorithm"""
 
-    def __init__(self, width: int, height: int) -> None:
+    def __init__(self, width: int, height: int, seed: int = None) -> None:
         """
         :param width: width of the output grid
         :param height:  height of the output grid
+        :param seed: seed of the generator, random if None
         """
+        # Own generator so the levels can be created outside the main thread
+        self.rand = random.Random(seed)
+
         # Tiles are mapped to a number/character
         self.tiles = {}
 
@@ -60,6 +64,10 @@ class WaveFunctionCollapse:
         # Keep track of positions of walls to use in game-state
         self._walls_pos = []
 
+        # Cells collapsed since the last draw, the rest of the screen is unchanged
+        self._changed_sprites = []
+        self.redraw = True
+
         # All cells are collapsed
         self.collapsed = False
 
@@ -70,6 +78,35 @@ class WaveFunctionCollapse:
         """
         return self._walls_group, self._empty_group, self._walls_pos
 
+    def get_level_information(self) -> Dict:
+        """
+        Return the outputs of the algorithm in the format expected by the game state
+        :return: dictionary with walls, empty, walls_pos, the tile grid and tiles
+        """
+        return {'walls': self._walls_group,
+                'empty': self._empty_group,
+                'walls_pos': self._walls_pos,
+                'grid': self.get_tile_grid(),
+                'tiles': self.tiles}
+
+    def get_tile_grid(self) -> List[List[str]]:
+        """
+        Return the collapsed cells as symbols of the tiles
+        :return: rows of tile symbols, None for the cells that are not collapsed
+        """
+        return [[next(iter(cell)) if self.grid_collapsed[i][j] else None
+                 for j, cell in enumerate(row)]
+                for i, row in enumerate(self.grid)]
+
+    def generate(self) -> Dict:
+        """
+        Run the algorithm until all cells are collapsed
+        :return: level information, see get_level_information
+        """
+        while not self.collapsed:
+            self.update()
+        return self.get_level_information()
+
     def update(self) -> None:
         """
         Execute 1 iteration of the WaveFunctionCollapse algorithm
@@ -150,10 +187,13 @@ class WaveFunctionCollapse:
         pos = pos[1], pos[0]
 
         if wall:
-            self._walls_group.add(Wall(pos, entity))
+            sprite = Wall(pos, entity)
+            self._walls_group.add(sprite)
             self._walls_pos.append(pos)
-            return
-        self._empty_group.add(Empty(pos, entity))
+        else:
+            sprite = Empty(pos, entity)
+            self._empty_group.add(sprite)
+        self._changed_sprites.append(sprite)
 
     def collapse(self, pos: Tuple[int, int]) -> None:
         """
@@ -166,7 +206,7 @@ class WaveFunctionCollapse:
         possible_weights = [self.weights[tile] for tile in possible_tiles]
 
         # pick a random state
-        random_pick = random.choices(possible_tiles, weights=possible_weights)[0]
+        random_pick = self.rand.choices(possible_tiles, weights=possible_weights)[0]
         self.grid[pos[0]][pos[1]] = set(list(random_pick))
 
         # Update the internal containers
@@ -178,14 +218,29 @@ class WaveFunctionCollapse:
         # remove from collapsed
         self.grid_placeholder_sprites[pos[0]][pos[1]].kill()
 
-    def draw(self, screen: pygame.display) -> None:
+    def draw(self, screen: pygame.display) -> List[pygame.Rect] | None:
         """
         Render the placeholders and collapsed cells
+        After the first frame only the cells collapsed since the last draw are rendered
         :param screen: pygame display
+        :return: changed areas or None if all cells were rendered
         """
-        self._walls_group.draw(screen)
-        self._empty_group.draw(screen)
-        self._non_collapsed_group.draw(screen)
+        if self.redraw:
+            self.redraw = False
+            self._changed_sprites = []
+            self._walls_group.draw(screen)
+            self._empty_group.draw(screen)
+            self._non_collapsed_group.draw(screen)
+            return None
+
+        changed = []
+        for sprite in self._changed_sprites:
+            # Clear the placeholder under the tile
+            screen.fill(Config.consts['BACKGROUND_COLOR'], sprite.rect)
+            screen.blit(sprite.image, sprite.rect)
+            changed.append(sprite.rect)
+        self._changed_sprites = []
+        return changed
 
     def propagate(self, tile_to_collapse: Tuple[int, int]) -> None:
         """
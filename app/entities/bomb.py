@@ -5,13 +5,13 @@
 Class for the Bomb entity.
 A bomb can be placed only by the player
 The range of the bomb can be changed in config file
+The detonation is scheduled in the timer wheel when the bomb is planted
 Class crates explosion entities
 """
-from typing import Tuple, List, Callable
+import math
+from typing import Tuple, Callable
 import pygame.draw
-from app.entities.explosion import Explosion
 from app.core.config import Config
-from app.core.enums_manager import Movement
 
 
 class Bomb(pygame.sprite.Sprite):
@@ -25,12 +25,47 @@ class Bomb(pygame.sprite.Sprite):
         # Create Image and Hitbox of a bomb
         self.image = Config.load_image(Config.consts['BOMB_IMAGE'], Config.consts['CELL_SIZE'])
 
+        self.rect = self.image.get_rect()
+
+        # Callback notified when the bomb is removed, returns it to the pool
+        self.on_release = None
+        # Scheduled detonation
+        self.timer = None
+        self.reset(pos)
+
+    def reset(self, pos: Tuple[int, int]) -> None:
+        """
+        Place the bomb and restart its countdown, used to reuse a pooled bomb
+        :param pos: The initial position of the bomb
+        """
         # Calculate the position on the grid
         self.pos = self._center_pos(pos)
-        self.rect = self.image.get_rect(topleft=(self.pos[0] * Config.consts['CELL_SIZE'],
-                                                 self.pos[1] * Config.consts['CELL_SIZE']))
-        # Lifespan of entity
-        self.countdown = Config.consts['BOMB_COUNTDOWN_SEC'] * Config.consts['FPS']
+        self.rect.topleft = (self.pos[0] * Config.consts['CELL_SIZE'],
+                             self.pos[1] * Config.consts['CELL_SIZE'])
+        # Number of ticks until the detonation
+        self.countdown = math.ceil(Config.consts['BOMB_COUNTDOWN_SEC'] * Config.consts['FPS'])
+
+    def arm(self, timers, tick: int, spawn_entity: Callable) -> None:
+        """
+        Register the detonation
+        :param timers: TimerWheel of the game
+        :param tick: detonation tick
+        :param spawn_entity: callback from StateManager that creates new explosion,
+            takes the position and the range of the blast
+        """
+        self.timer = timers.schedule(tick, self.detonate, spawn_entity)
+
+    def kill(self) -> None:
+        """
+        Remove the bomb from all groups, cancel its detonation and return it to the pool
+        """
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        alive = self.alive()
+        super().kill()
+        if alive and self.on_release is not None:
+            self.on_release(self)
 
     @staticmethod
     def _center_pos(pos: Tuple[int, int]) -> Tuple[int, int]:
@@ -42,46 +77,12 @@ class Bomb(pygame.sprite.Sprite):
         return (round(pos[0] / Config.consts['CELL_SIZE']),
                 round(pos[1] / Config.consts['CELL_SIZE']))
 
-    def _create_explosion(self) -> List[Explosion]:
-        """
-        Create Explosion entities in all directions around the bomb
-        :return: a list of Explosion entities
-        """
-        return [
-            # Center Explosion
-            Explosion((self.pos[0], self.pos[1]), 0, Movement.MOVE_RIGHT),
-
-            Explosion((self.pos[0] + 1, self.pos[1]),
-                      Config.consts['BOMB_RANGE'] - 1,
-                      Movement.MOVE_RIGHT),
-            Explosion((self.pos[0] - 1, self.pos[1]),
-                      Config.consts['BOMB_RANGE'] - 1,
-                      Movement.MOVE_LEFT),
-            Explosion((self.pos[0], self.pos[1] + 1),
-                      Config.consts['BOMB_RANGE'] - 1,
-                      Movement.MOVE_DOWN),
-            Explosion((self.pos[0], self.pos[1] - 1),
-                      Config.consts['BOMB_RANGE'] - 1,
-                      Movement.MOVE_UP), ]
-
-    def update(self, spawn_entity: Callable) -> None:
+    def detonate(self, spawn_entity: Callable) -> None:
         """
-        Reduce the lifespan and handle a bomb explosion
-        :param spawn_entity: callback from StateManager that creates new explosion
+        Spawn the blast and remove the bomb
+        :param spawn_entity: callback from StateManager that creates new explosion,
+            takes the position and the range of the blast
         """
-        self.countdown -= 1
-        self._spawn_explosions(spawn_entity)
-
-    def _spawn_explosions(self, spawn_entity: Callable) -> None:
-        """
-        Spawn explosions at the end of the lifespan
-        :param spawn_entity:
-        """
-        if self.countdown > 0:
-            return
-
-        expl = self._create_explosion()
-        for entity in expl:
-            spawn_entity(entity)
-        # Remove bomb
+        self.timer = None
+        spawn_entity(self.pos, Config.consts['BOMB_RANGE'])
         self.kill()
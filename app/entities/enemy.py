@@ -3,12 +3,13 @@
 
 """
 Class that handles an enemy entity
-Enemy moves randomly
+Enemy moves randomly or chases the player along the flow field
 Enemy can be killed by a bomb
 Entity kills player on collision
+Enemy draws from its own random stream, the other enemies don't change its movement
 """
-import random
 from typing import Tuple, Callable, List
+import numpy as np
 import pygame.draw
 from app.core.config import Config
 from app.core.enums_manager import Movement, GroupClass
@@ -20,17 +21,18 @@ class Enemy(pygame.sprite.Sprite):
     def __init__(self, pos: Tuple[int, int], seed: int):
         """
         :param pos: the initial position of the enemy a grid
-        :param seed: random seed to ensure the same movement after reset
+        :param seed: key of the random stream of the enemy, the same key repeats the movement
         """
         super().__init__()
-        # set seed
-        random.seed(seed)
+        # Counter-based generator owned by the enemy
+        self.rng = np.random.Generator(np.random.Philox(key=seed))
 
         # Create Image and Hitbox for Enemy
         self.pos = (pos[0] * Config.consts['CELL_SIZE'],
                     pos[1] * Config.consts['CELL_SIZE'])
-        self.image = Config.load_image_random(Config.consts['ENEMY_IMAGE'],
-                                              Config.consts['CELL_SIZE'])
+        images = Config.load_image_variants(Config.consts['ENEMY_IMAGE'],
+                                            Config.consts['CELL_SIZE'])
+        self.image = images[self.rng.integers(len(images))]
         self.rect = self.image.get_rect(topleft=[self.pos[0] * Config.consts['CELL_SIZE'],
                                                  self.pos[1] * Config.consts['CELL_SIZE']])
 
@@ -111,11 +113,38 @@ class Enemy(pygame.sprite.Sprite):
         self._move(list(self.pos))
         return possible_moves
 
-    def update(self, handle_collisions: Callable) -> None:
+    def _follow_flow(self, flow_field) -> bool:
+        """
+        Turn towards the player when the enemy is in the middle of a cell
+        :param flow_field: FlowField leading to the player
+        :return: True if the enemy follows the field
+        """
+        size = Config.consts['CELL_SIZE']
+        cell = ((self.pos[0] + size // 2) // size, (self.pos[1] + size // 2) // size)
+
+        # Turning is safe only when the hitbox is aligned to the cell
+        if (abs(self.pos[0] - cell[0] * size) >= Config.consts['ENEMY_SPEED'] or
+                abs(self.pos[1] - cell[1] * size) >= Config.consts['ENEMY_SPEED']):
+            return False
+
+        direction = flow_field.direction_at(cell)
+        if direction is None:
+            return False
+
+        self.pos = (cell[0] * size, cell[1] * size)
+        self._move(list(self.pos))
+        self.direction = direction
+        return True
+
+    def update(self, handle_collisions: Callable, flow_field=None) -> None:
         """
         Update the internal state of the enemy
         :param handle_collisions: Callback from StateManager to return list of collided entities
+        :param flow_field: FlowField to chase the player, None to wander
         """
+        if flow_field is not None:
+            self._follow_flow(flow_field)
+
         # handle the movement
         new_pos = self._move_in_dir()
         self._move(list(new_pos))
@@ -132,8 +161,8 @@ class Enemy(pygame.sprite.Sprite):
             directions = self._look_around(handle_collisions)
             self.direction = self._pick_random(directions)
 
-        # random direction change
-        if random.random() < 0.01:
+        # random direction change, chasing enemies keep to the field
+        if flow_field is None and self.rng.random() < 0.01:
             directions = self._look_around(handle_collisions)
             self.direction = self._pick_random(directions)
 
@@ -151,8 +180,7 @@ class Enemy(pygame.sprite.Sprite):
 
         return self.pos[0] + Config.consts['ENEMY_SPEED'], self.pos[1]
 
-    @staticmethod
-    def _pick_random(possible_moves: List[Movement]) -> Movement:
+    def _pick_random(self, possible_moves: List[Movement]) -> Movement:
         """
         Pick the direction to move to
         :param possible_moves: list of possible directions
@@ -160,4 +188,4 @@ class Enemy(pygame.sprite.Sprite):
         """
         if not possible_moves:
             possible_moves = list(Movement)
-        return random.choice(possible_moves)
+        return possible_moves[self.rng.integers(len(possible_moves))]
@@ -5,111 +5,204 @@
 # pylint: disable=too-many-instance-attributes
 
 """
-Class that handles the explosion after a bomb detonation
-Explosion can be created only by a bomb or by another explosion
-It can only travel in one direction and only if the range is > 0
-On a collision it kills a player/enemy and destroys walls
+Class that handles the blast after a bomb detonation
+The cells of the blast are ray-cast once at the detonation along the four directions,
+a ray stops at the map border and at the first wall, which is destroyed
+The blast spreads one cell further every EXPLOSION_SPAWN_COUNTDOWN seconds,
+the spreading and the end of the blast are scheduled in the timer wheel at the detonation
+On a collision with a reached cell it kills a player/enemy/bomb and destroys walls
 """
-from typing import Tuple, Callable
+import math
+from typing import Callable, List, Tuple
 import pygame.draw
 from app.core.config import Config
 from app.core.enums_manager import GroupClass, Movement
 
+# Steps of the rays in the grid
+DIRECTIONS = {
+    Movement.MOVE_UP: (0, -1),
+    Movement.MOVE_DOWN: (0, 1),
+    Movement.MOVE_LEFT: (-1, 0),
+    Movement.MOVE_RIGHT: (1, 0),
+}
+
+
+def cast_blast(pos: Tuple[int, int], blast_range: int,
+               kind_at: Callable) -> List[Tuple[int, Tuple[int, int]]]:
+    """
+    Find the cells reached by a blast
+    :param pos: position of the detonated bomb in the grid
+    :param blast_range: number of cells the blast reaches in every direction
+    :param kind_at: callable((column, row)) returning the kind of the obstacle in the cell,
+        the GroupClass value, 0 if empty and None outside the map
+    :return: (distance from the bomb, cell) of all the reached cells, the bomb cell first
+    """
+    cells = [(0, pos)]
+    for step in DIRECTIONS.values():
+        for distance in range(1, blast_range + 1):
+            cell = (pos[0] + step[0] * distance, pos[1] + step[1] * distance)
+            kind = kind_at(cell)
+            if kind is None or kind == GroupClass.BORDER.value:
+                break
+            cells.append((distance, cell))
+            # The first wall is destroyed and stops the ray
+            if kind == GroupClass.WALL.value:
+                break
+    return cells
+
+
+def spread_delay(distance: int) -> int:
+    """
+    :param distance: distance of the cell from the bomb
+    :return: number of ticks after the detonation the cell starts burning in
+    """
+    spawn_frames = Config.consts['EXPLOSION_SPAWN_COUNTDOWN'] * Config.consts['FPS']
+    return math.ceil(max(distance - 1, 0) * spawn_frames)
+
 
 class Explosion(pygame.sprite.Sprite):
-    """Class that handles the explosion after a bomb detonation"""
+    """Class that handles the blast after a bomb detonation"""
 
-    def __init__(self,
-                 pos: Tuple[int, int],
-                 remaining_range: int,
-                 direction: Movement,
-                 timer: int = None):
+    def __init__(self, pos: Tuple[int, int], blast_range: int):
         """
-        :param pos: initial position of the explosion in the grid
-        :param remaining_range: number of children explosions that will be created
-        :param direction: direction of the explosion
-        :param timer: synced timers to stop all explosions at the same time
+        :param pos: position of the detonated bomb in the grid
+        :param blast_range: number of cells the blast reaches in every direction
         """
         super().__init__()
+
+        # Hitbox of a single cell for the collision queries
+        self._probe = pygame.sprite.Sprite()
+        self._probe.rect = pygame.Rect(0, 0, Config.consts['CELL_SIZE'],
+                                       Config.consts['CELL_SIZE'])
+
+        self._cell_image = Config.load_image(Config.consts['EXPLOSION_IMAGE'],
+                                             Config.consts['CELL_SIZE'])
+        # Surface large enough for the whole blast, the image is its subsurface
+        self._canvas = None
+        self._rendered = None
+
+        # Callback notified when the blast is removed, returns it to the pool
+        self.on_release = None
+        # Scheduled spreading and end of the blast
+        self._timers = []
+        self.reset(pos, blast_range)
+
+    def reset(self, pos: Tuple[int, int], blast_range: int) -> None:
+        """
+        Start a new blast, used to reuse a pooled explosion
+        :param pos: position of the detonated bomb in the grid
+        :param blast_range: number of cells the blast reaches in every direction
+        """
         self.pos = pos
+        self.range = blast_range
 
-        # Create image and hitbox for the explosion
-        self.image = Config.load_image(Config.consts['EXPLOSION_IMAGE'], Config.consts['CELL_SIZE'])
-        self.rect = self.image.get_rect(topleft=[self.pos[0] * Config.consts['CELL_SIZE'],
-                                                 self.pos[1] * Config.consts['CELL_SIZE']])
-        # direction to create children explosions
-        self.direction = direction
-        # number of explosions in range
-        self.range = remaining_range
-        # if entity is killed stop the spreading
-        self.create_children = True
-
-        self.lifespan = 0
-        self.synced_timer = timer
-
-        # Initial explosion
-        if self.synced_timer is None:
-            self.synced_timer = (
-                    self.range * Config.consts['FPS'] * Config.consts['EXPLOSION_ALIVE_COUNTDOWN'])
-
-    def _create_children(self) -> 'Explosion':
-        """
-        Create the consecutive explosions
-        :return: a new explosion entity moved in the direction of the explosion
-        """
-        new_pos = list(self.pos)
-        if self.direction == Movement.MOVE_UP:
-            new_pos[1] -= 1
-        elif self.direction == Movement.MOVE_DOWN:
-            new_pos[1] += 1
-        elif self.direction == Movement.MOVE_LEFT:
-            new_pos[0] -= 1
-        else:
-            new_pos[0] += 1
-        return Explosion(
-            (new_pos[0], new_pos[1]), self.range - 1, self.direction, self.synced_timer)
-
-    def update(self, handle_collisions: Callable, spawn_entity: Callable) -> None:
-        """
-        Update the internal explosion state"
-        :param handle_collisions: Callback from StateManager to return list of collided entities
-        :param spawn_entity: Callback from StateManager to spawn explosion entity
-        """""
-        # Kill collided entities
-        self._handle_collisions(handle_collisions)
+        # (distance from the bomb, cell) of all the cells the blast reaches
+        self.cells: List[Tuple[int, Tuple[int, int]]] = [(0, pos)]
+
+        # The center burns only in the detonation tick, the blast starts one cell around it
+        self.center_burning = True
+        self.reach = 1
+        # Ticks until all cells stop burning at the same time
+        self.duration = max(
+            (self.range - 1) * Config.consts['FPS'] * Config.consts['EXPLOSION_ALIVE_COUNTDOWN'],
+            1)
+
+        size = (2 * max(self.range, 0) + 1) * Config.consts['CELL_SIZE']
+        if self._canvas is None or self._canvas.get_width() < size:
+            self._canvas = pygame.Surface((size, size), pygame.SRCALPHA)
+        self._create_image()
+
+    def schedule(self, timers, tick: int) -> None:
+        """
+        Register the spreading and the end of the blast
+        :param timers: TimerWheel of the game
+        :param tick: detonation tick
+        """
+        self._timers = [timers.schedule(tick + 1, self._put_out_center)]
+        for distance in range(2, self.range + 1):
+            self._timers.append(
+                timers.schedule(tick + spread_delay(distance), self._spread, distance))
+        self._timers.append(timers.schedule(tick + math.ceil(self.duration), self.kill))
 
-        # Update internal state
-        self.lifespan += 1
-        self.synced_timer -= 1
-        self._spawn_explosion(spawn_entity)
+    def _put_out_center(self) -> None:
+        """
+        Stop burning the cell of the bomb
+        """
+        self.center_burning = False
 
-        # Destroy
-        if self.synced_timer <= 0:
-            self.kill()
+    def _spread(self, distance: int) -> None:
+        """
+        Spread the blast further from the bomb
+        :param distance: distance of the furthest burning cells
+        """
+        self.reach = distance
 
-    def _spawn_explosion(self, spawn_entity: Callable) -> bool:
+    def cast(self, kind_at: Callable) -> None:
         """
-        Spawn the child explosion entity
-        :param spawn_entity: Callback from StateManager to spawn explosion entity
+        Find the cells reached by the blast
+        :param kind_at: callable((column, row)) returning the kind of the obstacle in the cell,
+            the GroupClass value, 0 if empty and None outside the map
         """
-        if (self.lifespan >= (Config.consts['EXPLOSION_SPAWN_COUNTDOWN'] * Config.consts['FPS'])
-                and self.create_children
-                and self.range != 0):
-            spawn_entity(self._create_children())
-            return True
-        return False
+        self.cells = cast_blast(self.pos, self.range, kind_at)
+        self._create_image()
 
-    def _handle_collisions(self, handle_collisions: Callable) -> None:
+    def active_cells(self) -> List[Tuple[int, int]]:
+        """
+        :return: cells burning in the current tick
         """
-        Remove an entity on a collision
+        return [cell for distance, cell in self.cells
+                if (distance == 0 and self.center_burning) or 0 < distance <= self.reach]
+
+    def _create_image(self) -> None:
+        """
+        Place the transparent image over all the cells of the blast
+        """
+        size = Config.consts['CELL_SIZE']
+        rects = [pygame.Rect(cell[0] * size, cell[1] * size, size, size) for _, cell in self.cells]
+        self.rect = rects[0].unionall(rects[1:])
+        self.image = self._canvas.subsurface((0, 0), self.rect.size)
+        self._rendered = None
+        self._render(self.active_cells())
+
+    def _render(self, cells: List[Tuple[int, int]]) -> None:
+        """
+        Draw the burning cells, the image is redrawn only when the cells change
+        :param cells: burning cells
+        """
+        if cells == self._rendered:
+            return
+        size = Config.consts['CELL_SIZE']
+        self.image.fill((0, 0, 0, 0))
+        self.image.blits([(self._cell_image, (cell[0] * size - self.rect.x,
+                                              cell[1] * size - self.rect.y))
+                          for cell in cells], doreturn=False)
+        self._rendered = cells
+
+    def update(self, handle_collisions: Callable) -> None:
+        """
+        Kill the entities in the burning cells
         :param handle_collisions: Callback from StateManager to return list of collided entities
         """
-        entities = handle_collisions(self,
-                                     [GroupClass.WALL,
-                                      GroupClass.PLAYER,
-                                      GroupClass.BOMB,
-                                      GroupClass.ENEMY], False)
-        # Kill Collided entities and disable ability to spawning child
-        for entity in entities:
-            self.create_children = False
-            entity.kill()
+        cells = self.active_cells()
+        self._render(cells)
+
+        for cell in cells:
+            self._probe.rect.topleft = (cell[0] * Config.consts['CELL_SIZE'],
+                                        cell[1] * Config.consts['CELL_SIZE'])
+            handle_collisions(self._probe,
+                              [GroupClass.WALL,
+                               GroupClass.PLAYER,
+                               GroupClass.BOMB,
+                               GroupClass.ENEMY], True)
+
+    def kill(self) -> None:
+        """
+        Remove the blast from all groups, cancel its timers and return it to the pool
+        """
+        for timer in self._timers:
+            timer.cancel()
+        self._timers = []
+        alive = self.alive()
+        super().kill()
+        if alive and self.on_release is not None:
+            self.on_release(self)
@@ -13,7 +13,6 @@ from typing import Tuple, Callable, List
 import pygame.draw
 from app.core.config import Config
 from app.core.enums_manager import GroupClass
-from app.entities.bomb import Bomb
 
 
 class Player(pygame.sprite.Sprite):
@@ -34,15 +33,17 @@ class Player(pygame.sprite.Sprite):
         self.killable = True
         self.destroyable = False
 
-    def update(self, events: List, handle_collisions: Callable, spawn_entity: Callable) -> None:
+    def update(self, events: List, handle_collisions: Callable, spawn_entity: Callable,
+               key_pressed=None) -> None:
         """
         Update the internal player state
         :param events: event feed from pygame
         :param handle_collisions: Callback from StateManager to return list of collided entities
         :param spawn_entity: Callback from StateManager to spawn bomb entity
+        :param key_pressed: state of the keyboard, read from pygame if None
         """
         # Handle Movement
-        self.pos = self._handle_movement(handle_collisions)
+        self.pos = self._handle_movement(handle_collisions, key_pressed)
 
         for event in events:
             # Spawn a bomb
@@ -53,11 +54,11 @@ class Player(pygame.sprite.Sprite):
         """
         Plant a bomb at the current position
         :param event: event feed from pygame
-        :param spawn_entity: Callback from StateManager to spawn bomb entity
+        :param spawn_entity: Callback from StateManager to spawn bomb entity at the position
         :return: True if the bomb has been planted, False otherwise
         """
         if event.key == Config.PLANT_BOMB_KEY:
-            spawn_entity(Bomb(self.pos))
+            spawn_entity(self.pos)
             return True
         return False
 
@@ -79,14 +80,16 @@ class Player(pygame.sprite.Sprite):
         """
         self.rect.topleft = tuple(new_pos)
 
-    def _handle_movement(self, handle_collision: Callable) -> Tuple:
+    def _handle_movement(self, handle_collision: Callable, key_pressed=None) -> Tuple:
         """
         Try to move to a new position and check if a collision occurs
         :param handle_collision: Callback from StateManager to return list of
             collided entities
+        :param key_pressed: state of the keyboard, read from pygame if None
         :return: -> new position without collision
         """
-        key_pressed = pygame.key.get_pressed()
+        if key_pressed is None:
+            key_pressed = pygame.key.get_pressed()
         new_pos = list(self.pos)
 
         # Move Up
@@ -29,3 +29,15 @@ class Wall(pygame.sprite.Sprite):
 
         self.destroyable = True
         self.killable = False
+
+        # Callback notified when the wall is destroyed
+        self.on_destroy = None
+
+    def kill(self) -> None:
+        """
+        Remove the wall from all groups and notify about the destruction
+        """
+        alive = self.alive()
+        super().kill()
+        if alive and self.on_destroy is not None:
+            self.on_destroy(self)
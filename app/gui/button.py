@@ -19,7 +19,7 @@ class Button:
         """
         super().__init__()
         # Hardcoded size
-        self.size = (Config.consts['CELL_SIZE'] * 8, Config.consts['CELL_SIZE'] * 2)
+        self.size = Config.get_button_size()
         self.image = Config.load_image(asset, self.size)
 
         self.pos = int(pos[0]), int(pos[1])
@@ -8,7 +8,50 @@ from typing import Dict, Tuple
 
 from pygame import font
 from pygame import display
+from pygame import Surface
 from app.core.config import Config
+from app.core.lru_cache import LRUCache
+
+
+class TextCache:
+    """Class that shares the fonts and the rendered texts between the labels"""
+
+    # Opened fonts keyed by (path, size)
+    fonts = {}
+
+    # Rendered texts keyed by (path, size, text, color)
+    texts = LRUCache(256)
+
+    @classmethod
+    def get_font(cls, path: str, size: int) -> font.Font:
+        """
+        Open the font only once
+        :param path: path to the font file
+        :param size: font size
+        :return: pygame font
+        """
+        key = (path, size)
+        if key not in cls.fonts:
+            cls.fonts[key] = font.Font(path, size)
+        return cls.fonts[key]
+
+    @classmethod
+    def render(cls, text: str, size: int, color: Tuple[int, int, int],
+               path: str = Config.FONT) -> Surface:
+        """
+        Render the text, the surface is shared and must not be modified
+        :param text: text to render
+        :param size: font size
+        :param color: color of the text as rgb tuple
+        :param path: path to the font file
+        :return: rendered text
+        """
+        key = (path, size, text, tuple(color))
+        widget = cls.texts.get(key)
+        if widget is None:
+            widget = cls.get_font(path, size).render(text, True, color)
+            cls.texts.put(key, widget)
+        return widget
 
 
 class Label:
@@ -28,10 +71,22 @@ class Label:
         self.text = text
         self.text_size = text_desc['size']
         self.color = text_desc['color']
-        self.font = font.Font(Config.FONT, text_desc['size'])
-        self.widget = self.font.render(text, True, text_desc['color'])
+        self.font = TextCache.get_font(Config.FONT, text_desc['size'])
+        self.widget = TextCache.render(text, text_desc['size'], text_desc['color'])
         self.pos = int(pos[0]), int(pos[1])
 
+    def set_text(self, text: str) -> bool:
+        """
+        Change the displayed text, the text is rendered only if it differs
+        :param text: new text
+        :return: True if the text has changed
+        """
+        if text == self.text:
+            return False
+        self.text = text
+        self.widget = TextCache.render(text, self.text_size, self.color)
+        return True
+
     def draw(self, screen: display) -> None:
         """
         Draw the text on the screen
@@ -0,0 +1,34 @@
+# Class represents a static widget that is the reason for few public methods
+# pylint: disable=too-few-public-methods
+"""
+Class that is responsible for Progress Bar Widget
+Entity is not intractable and displays the progress of a long task
+"""
+from typing import Tuple
+
+import pygame.draw
+from pygame import display
+from app.core.config import Config
+
+
+class ProgressBar:
+    """Class that is responsible for Progress Bar Widget"""
+
+    def __init__(self, pos: Tuple[float, float], size: Tuple[float, float]):
+        """
+        Create a new progress bar
+        :param pos: location of the bar
+        :param size: (width, height) of the bar
+        """
+        self.rect = pygame.Rect(int(pos[0]), int(pos[1]), int(size[0]), int(size[1]))
+        self.progress = 0.0
+
+    def draw(self, screen: display) -> None:
+        """
+        Draw the bar on the screen
+        :param screen: pygame display
+        """
+        filled = self.rect.copy()
+        filled.width = int(self.rect.width * min(max(self.progress, 0.0), 1.0))
+        pygame.draw.rect(screen, Config.consts['WHITE'], filled)
+        pygame.draw.rect(screen, Config.consts['WHITE'], self.rect, width=2)
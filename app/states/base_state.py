@@ -4,9 +4,11 @@ Abstract base class for all states
 State is the elementary block of game
 """
 
-from typing import List, Dict
+from typing import List, Dict, Optional
 from abc import ABC, abstractmethod
 import pygame.display
+from app.core.input_source import InputSource
+from app.core.quality_governor import QualityGovernor
 
 
 class BaseState(ABC):
@@ -17,6 +19,13 @@ class BaseState(ABC):
         self.information = None
         self.active = True
         self.cursor = True
+        # Replaced by the state manager when the game is driven by a script
+        self.input_source = InputSource()
+        # Shared by the state manager, the full quality is kept by default
+        self.governor = QualityGovernor(0, enabled=False)
+        # Fraction of the tick passed since the last update, set by the state manager,
+        # 1 draws the entities at their current positions
+        self.interpolation = 1.0
 
     @abstractmethod
     def _init_state(self) -> None:
@@ -25,10 +34,12 @@ class BaseState(ABC):
         """
 
     @abstractmethod
-    def draw(self, screen: pygame.display) -> None:
+    def draw(self, screen: pygame.display) -> Optional[List[pygame.Rect]]:
         """
         Draw all the entities every tick
+        States showing the cursor have to redraw the whole screen
         :param screen: screen to draw on
+        :return: list of changed areas or None if the whole screen has to be updated
         """
 
     @abstractmethod
@@ -6,13 +6,24 @@ Updates internal states of all entities
 Implements the game logic
 Checks for game over
 """
-import random
+import hashlib
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Tuple
 import pygame
 from app.gui.label import Label
+from app.core.camera import Camera
 from app.core.config import Config
+from app.core.danger_map import DangerMap
+from app.core.enemy_system import EnemySystem
 from app.core.enums_manager import GroupClass
+from app.core.flow_field import FlowField
+from app.core.level_pack import LevelPack
+from app.core.object_pool import ObjectPool
+from app.core.occupancy_grid import OccupancyGrid
+from app.core.random_streams import RandomStreams
+from app.core.renderer import BatchRenderer
+from app.core.spatial_hash import SpatialGroup
+from app.core.timer_wheel import TimerWheel
 from app.entities.bomb import Bomb
 from app.entities.explosion import Explosion
 from app.entities.wall import Wall
@@ -34,8 +45,10 @@ class GameInfo:
         self.seed = 0
 
         self.text_attr = {'color': Config.consts['WHITE'], 'size': 25}
-        self.tries_label = Label(f'Tries: {self.tries}', self.text_attr, pos=(0.25, 0.9))
-        self.timer_label = Label(f'Time: {self.time}', self.text_attr, pos=(0.75, 0.9))
+        self.tries_label = Label(f'Tries: {self.tries}', self.text_attr,
+                                 pos=(Config.consts['WIDTH'] * 0.75, Config.consts['HEIGHT'] * 0.9))
+        self.timer_label = Label(f'Time: {self.time}', self.text_attr,
+                                 pos=(Config.consts['WIDTH'] * 0.10, Config.consts['HEIGHT'] * 0.9))
         space_attr = {'color': Config.consts['WHITE'], 'size': 15}
         self.space_hint_label = (
             Label('(space)',
@@ -53,22 +66,23 @@ class GameInfo:
             "seed": self.seed
         }
 
-    def update(self) -> None:
-        """ Update the game information"""
+    def update(self, refresh: bool = True) -> None:
+        """
+        Update the game information, the labels are re-rendered only on change
+        :param refresh: update the labels, the counters are updated every frame
+        """
         self.time += 1
-        self.tries_label = Label(f'Tries: {self.tries}', self.text_attr,
-                                 pos=(Config.consts['WIDTH'] * 0.75, Config.consts['HEIGHT'] * 0.9))
-        self.timer_label = Label(f"Time: {self.time // Config.consts['FPS']}", self.text_attr,
-                                 pos=(Config.consts['WIDTH'] * 0.10, Config.consts['HEIGHT'] * 0.9))
+        if not refresh:
+            return
+        self.tries_label.set_text(f'Tries: {self.tries}')
+        self.timer_label.set_text(f"Time: {self.time // Config.consts['FPS']}")
 
-    def draw(self, screen: pygame.display) -> None:
+    def get_blit_sequence(self) -> List[Tuple[pygame.Surface, Tuple[int, int]]]:
         """
-        Draw the game menu
-        :param screen: pygame display
+        :return: (rendered text, position) pairs of the game menu labels
         """
-        self.timer_label.draw(screen)
-        self.tries_label.draw(screen)
-        self.space_hint_label.draw(screen)
+        return [(label.widget, label.pos)
+                for label in (self.timer_label, self.tries_label, self.space_hint_label)]
 
     def reset(self) -> None:
         """
@@ -82,25 +96,57 @@ class GameInfo:
 class GameState(BaseState):
     """State class that handles the main gameplay"""
 
-    def __init__(self):
+    def __init__(self, seed: int = None):
+        """
+        :param seed: seed of the enemy placement and movement, unique if None
+        """
 
         # Base entity groups from WFC
         self.walls_pos = []
         self._walls_group = pygame.sprite.Group()
         self._empty_group = pygame.sprite.Group()
 
+        # Pre-rendered floor and walls, changed only when a wall is destroyed
+        self._static_layer = None
+        self._destroyed_walls = []
+        # Areas of the dynamic entities drawn in the last frame
+        self._dirty_rects = []
+        self._redraw = True
+
+        # Tiles by the grid position and the camera for the maps larger than the window
+        self._tile_index = []
+        self._camera_pos = None
+        self._camera = Camera(
+            (Config.VIEW_WIDTH * Config.consts['CELL_SIZE'],
+             Config.VIEW_HEIGHT * Config.consts['CELL_SIZE']),
+            (Config.GRID_WIDTH * Config.consts['CELL_SIZE'],
+             Config.GRID_HEIGHT * Config.consts['CELL_SIZE']))
+
+        # Batches the blits of every layer into one call
+        self.renderer = BatchRenderer()
+
         super().__init__()
 
         self._game_info = GameInfo()
         self._enemies_alive = 0
 
-        # Generate a unique seed
-        self.rand = random.Random()
-        self._seed = datetime.now().microsecond
-        self.rand.seed(self._seed)
+        # Generate a unique seed, every entity draws from its own stream derived from it
+        self._seed = datetime.now().microsecond if seed is None else seed
+        self._streams = RandomStreams(self._seed)
         self._game_info.seed = self._seed
 
         self.cursor = False
+
+        # Tile grid of the level, kept for the recordings
+        self.level = None
+        # Records the input of every tick, set by the state manager
+        self.recorder = None
+
+        # Bombs and explosions are reused instead of created for every detonation
+        self._bomb_pool = ObjectPool(Bomb)
+        self._explosion_pool = ObjectPool(Explosion)
+        self._bomb_group = SpatialGroup(Config.consts['CELL_SIZE'])
+        self._explosion_group = SpatialGroup(Config.consts['CELL_SIZE'])
         self._init_state()
 
     def _init_state(self) -> None:
@@ -109,27 +155,37 @@ class GameState(BaseState):
         use to restart the game
         """
 
-        # Set existing seed
-        self.rand.seed(self._seed)
+        # Return the bombs and explosions of the last try to the pools
+        for sprite in self._bomb_group.sprites() + self._explosion_group.sprites():
+            sprite.kill()
 
-        # Entity Groups
-        self._player_group = pygame.sprite.Group()
-        self._bomb_group = pygame.sprite.Group()
-        self._explosion_group = pygame.sprite.Group()
-        self._enemy_group = pygame.sprite.Group()
+        # Entity Groups, indexed by the cells for the collision queries
+        self._player_group = SpatialGroup(Config.consts['CELL_SIZE'])
+        self._bomb_group = SpatialGroup(Config.consts['CELL_SIZE'])
+        self._explosion_group = SpatialGroup(Config.consts['CELL_SIZE'])
+        self._enemy_group = SpatialGroup(Config.consts['CELL_SIZE'])
         self._map_border_group = pygame.sprite.Group()
 
         # Config data
         self._enemies_alive = Config.consts['NUM_OF_ENEMIES']
+        # Simulation ticks of the current try, the countdowns of the entities fire in the wheel
+        self.tick = 0
+        self._timers = TimerWheel(self.tick)
+        # Positions of the moving sprites before the last tick, for the interpolated drawing
+        self._previous_pos = {}
+
+        # All entities are new, redraw the whole screen
+        self._redraw = True
+        self._dirty_rects = []
 
         # UI bomb counter
         self._bomb_counter_group = [
-            Bomb(((Config.GRID_WIDTH * 0.5) * Config.consts['CELL_SIZE'],
-                  (Config.GRID_HEIGHT + 1) * Config.consts['CELL_SIZE'])),
-            Bomb(((Config.GRID_WIDTH * 0.45) * Config.consts['CELL_SIZE'],
-                  (Config.GRID_HEIGHT + 1) * Config.consts['CELL_SIZE'])),
-            Bomb(((Config.GRID_WIDTH * 0.4) * Config.consts['CELL_SIZE'],
-                  (Config.GRID_HEIGHT + 1) * Config.consts['CELL_SIZE']))]
+            Bomb(((Config.VIEW_WIDTH * 0.5) * Config.consts['CELL_SIZE'],
+                  (Config.VIEW_HEIGHT + 1) * Config.consts['CELL_SIZE'])),
+            Bomb(((Config.VIEW_WIDTH * 0.45) * Config.consts['CELL_SIZE'],
+                  (Config.VIEW_HEIGHT + 1) * Config.consts['CELL_SIZE'])),
+            Bomb(((Config.VIEW_WIDTH * 0.4) * Config.consts['CELL_SIZE'],
+                  (Config.VIEW_HEIGHT + 1) * Config.consts['CELL_SIZE']))]
 
         # Choose starting enemy positions
         all_possible_tuples = [(i, j) for i in range(1, Config.GRID_WIDTH)
@@ -140,25 +196,69 @@ class GameState(BaseState):
         all_possible_tuples = self._spawn_enemies(all_possible_tuples)
         self._player_group.add(Player((all_possible_tuples[0])))
 
-    def spawn_bomb(self, new_entity: Bomb) -> bool:
+    def spawn_bomb(self, pos: Tuple[int, int]) -> bool:
         """
-        Callback to add a bomb to the sprite group
-        :param new_entity: Bomb to add to the game
+        Callback to add a bomb from the pool to the sprite group
+        :param pos: (x,y) raw position of the bomb
         :return: True if the bomb was created, False otherwise
         """
 
         if len(self._bomb_group) >= Config.consts['BOMB_LIMIT']:
             return False
 
-        self._bomb_group.add(new_entity)
+        bomb = self._bomb_pool.acquire(pos)
+        bomb.on_release = self._release_bomb
+        self._bomb_group.add(bomb)
+        # The countdown starts in this tick, the bomb detonates when it reaches 0
+        detonation = self.tick + bomb.countdown - 1
+        bomb.arm(self._timers, detonation, self.spawn_explosion)
+        self._danger_map.plant(bomb, bomb.pos, detonation, Config.consts['BOMB_RANGE'])
         return True
 
-    def spawn_explosion(self, new_entity: Explosion) -> None:
+    def _release_bomb(self, bomb: Bomb) -> None:
+        """
+        Callback notified when a bomb detonates or is destroyed
+        :param bomb: removed bomb
+        """
+        self._danger_map.remove(bomb)
+        self._bomb_pool.release(bomb)
+
+    @property
+    def danger_map(self) -> DangerMap:
         """
-        Callback to add an explostion to the sprite group
-        :param new_entity: Explosion to add to the game
+        :return: predicted blasts of the pending bombs and the spreading explosions,
+            ticks is a read-only view
         """
-        self._explosion_group.add(new_entity)
+        return self._danger_map
+
+    def spawn_explosion(self, pos: Tuple[int, int], blast_range: int) -> None:
+        """
+        Callback to add an explostion from the pool to the sprite group
+        The reach of the blast is ray-cast against the walls and the border once
+        :param pos: position of the detonated bomb in the grid
+        :param blast_range: number of cells the blast reaches in every direction
+        """
+        explosion = self._explosion_pool.acquire(pos, blast_range)
+        explosion.on_release = self._release_explosion
+        explosion.cast(self._occupancy.kind_at)
+        explosion.schedule(self._timers, self.tick)
+        self._explosion_group.add(explosion)
+        # The outer cells burn only later, they stay dangerous after the bomb is removed
+        self._danger_map.plant(explosion, pos, self.tick, blast_range, extendable=False)
+
+    def _release_explosion(self, explosion: Explosion) -> None:
+        """
+        Callback notified when a blast ends
+        :param explosion: removed explosion
+        """
+        self._danger_map.remove(explosion)
+        self._explosion_pool.release(explosion)
+
+    def pool_info(self) -> Dict:
+        """
+        :return: statistics of the bomb and explosion pools
+        """
+        return {'bombs': self._bomb_pool.info(), 'explosions': self._explosion_pool.info()}
 
     def handle_collision(self, entity: pygame.sprite, groups: List, dokill: bool) -> List:
         """
@@ -168,46 +268,222 @@ class GameState(BaseState):
         :param entity: entity to check collision with
         :return: list of state_entities that has collided with entity
         """
+        # Only the cells overlapped by the entity are checked
         check_collision = []
-
-        # Add Groups to Check
         if GroupClass.PLAYER in groups:
             check_collision.append(self._player_group)
         if GroupClass.BOMB in groups:
             check_collision.append(self._bomb_group)
         if GroupClass.WALL in groups:
-            check_collision.append(self._walls_group)
+            check_collision.append(GroupClass.WALL)
         if GroupClass.ENEMY in groups:
             check_collision.append(self._enemy_group)
         if GroupClass.BORDER in groups:
-            check_collision.append(self._map_border_group)
+            check_collision.append(GroupClass.BORDER)
 
         collisions = []
         # Get collisions
         for group in check_collision:
-            collisions += pygame.sprite.spritecollide(entity, group, dokill)
+            if isinstance(group, GroupClass):
+                static = self._occupancy.query(entity.rect, [group.value])
+                if dokill:
+                    for sprite in static:
+                        sprite.kill()
+                collisions += static
+            else:
+                collisions += group.collide(entity, dokill)
         return collisions
 
-    def draw(self, screen: pygame.display) -> None:
+    def _render_static_layer(self, size: Tuple[int, int]) -> pygame.Surface:
+        """
+        Render the background, the floor and the walls once
+        :param size: size of the screen
+        :return: surface with the static part of the level
+        """
+        layer = pygame.Surface(size)
+        self.renderer.fill(layer, Config.consts['BACKGROUND_COLOR'])
+        self.renderer.add_sprites('level', self._empty_group)
+        self.renderer.add_sprites('level', self._walls_group)
+        self.renderer.draw(layer, ['level'])
+        self._destroyed_walls = []
+        return layer
+
+    def _create_tile_index(self) -> List[List]:
+        """
+        Index the floor and wall tiles by their grid position
+        :return: rows of tiles, None for the cells without a tile
+        """
+        tile_index = [[None] * Config.GRID_WIDTH for _ in range(Config.GRID_HEIGHT)]
+        for group in (self._empty_group, self._walls_group):
+            for sprite in group:
+                x = sprite.rect.x // Config.consts['CELL_SIZE']
+                y = sprite.rect.y // Config.consts['CELL_SIZE']
+                if 0 <= x < Config.GRID_WIDTH and 0 <= y < Config.GRID_HEIGHT:
+                    tile_index[y][x] = sprite
+        return tile_index
+
+    def _wall_destroyed(self, wall: Wall) -> None:
+        """
+        Callback notified when a wall is destroyed
+        :param wall: destroyed wall
+        """
+        self._destroyed_walls.append(wall)
+        self._occupancy.remove(wall)
+        self._flow_field.invalidate()
+
+        x = wall.rect.x // Config.consts['CELL_SIZE']
+        y = wall.rect.y // Config.consts['CELL_SIZE']
+        self._danger_map.wall_removed((x, y))
+        if 0 <= y < len(self._tile_index) and 0 <= x < len(self._tile_index[y]):
+            if self._tile_index[y][x] is wall:
+                self._tile_index[y][x] = None
+                self.renderer.invalidate('tiles')
+
+    def _visible_tiles(self) -> List[pygame.sprite.Sprite]:
+        """
+        Look up the tiles intersecting the viewport in the tile index
+        :return: list of visible tiles
+        """
+        columns, rows = self._camera.visible_cells(Config.consts['CELL_SIZE'])
+        tiles = []
+        for y in rows:
+            row = self._tile_index[y]
+            tiles += [row[x] for x in columns if row[x] is not None]
+        return tiles
+
+    def draw(self, screen: pygame.display) -> List[pygame.Rect] | None:
         """
         Render the groups on the screen
         :param screen: a screen to draw to
+        :return: changed areas or None if the whole screen was redrawn
+        """
+        self.renderer.begin_frame()
+        if self._camera.scrolling:
+            changed = self._draw_viewport(screen)
+        else:
+            changed = self._draw_static_view(screen)
+        self.renderer.end_frame()
+        return changed
+
+    def _dynamic_groups(self) -> List[pygame.sprite.Group]:
         """
+        :return: groups of the moving entities in the drawing order
+        """
+        return [self._bomb_group, self._enemy_group, self._explosion_group, self._player_group]
 
-        pygame.display.set_caption('Collapsed Bomberman')
-        screen.fill(Config.consts['BACKGROUND_COLOR'])
+    def _interpolated_rect(self, sprite: pygame.sprite.Sprite) -> pygame.Rect:
+        """
+        :param sprite: dynamic entity
+        :return: hitbox placed between the positions before and after the last tick
+        """
+        previous = self._previous_pos.get(sprite)
+        if previous is None or self.interpolation >= 1:
+            return sprite.rect
+        remaining = 1 - self.interpolation
+        return sprite.rect.move(round((previous[0] - sprite.rect.x) * remaining),
+                                round((previous[1] - sprite.rect.y) * remaining))
+
+    def _entity_blits(self) -> List[Tuple[pygame.Surface, pygame.Rect]]:
+        """
+        :return: (image, rect) of the dynamic entities in the drawing order
+        """
+        blits = []
+        for group in self._dynamic_groups():
+            if isinstance(group, EnemySystem):
+                blits += [(view.image, view.rect)
+                          for view in group.interpolated(self.interpolation)]
+            else:
+                blits += [(sprite.image, self._interpolated_rect(sprite)) for sprite in group]
+        return blits
+
+    def _draw_viewport(self, screen: pygame.display) -> List[pygame.Rect] | None:
+        """
+        Render the part of the map around the player, the map is larger than the window
+        Only the tiles and entities intersecting the viewport are drawn
+        :param screen: a screen to draw to
+        :return: None, the whole screen is redrawn
+        """
+        for player in self._player_group:
+            self._camera.follow(self._interpolated_rect(player))
+
+        if self._redraw:
+            pygame.display.set_caption('Collapsed Bomberman')
+            self._redraw = False
+        self.renderer.fill(screen, Config.consts['BACKGROUND_COLOR'])
+
+        # Visible tiles are collected again only after the camera moved
+        if self._camera_pos != self._camera.rect.topleft or not self.renderer.has_static('tiles'):
+            self._camera_pos = self._camera.rect.topleft
+            self.renderer.set_static('tiles', [(tile.image, self._camera.apply(tile.rect))
+                                               for tile in self._visible_tiles()])
 
-        self._empty_group.draw(screen)
-        self._walls_group.draw(screen)
-        self._bomb_group.draw(screen)
-        self._enemy_group.draw(screen)
-        self._explosion_group.draw(screen)
-        self._game_info.draw(screen)
-        self._player_group.draw(screen)
+        for image, rect in self._entity_blits():
+            if self._camera.is_visible(rect):
+                self.renderer.add('entities', image, self._camera.apply(rect))
+
+        # Do not draw over the game menu
+        screen.set_clip(pygame.Rect((0, 0), self._camera.rect.size))
+        self.renderer.draw(screen, ['tiles', 'entities'])
+        screen.set_clip(None)
+
+        self._draw_menu(screen)
+        return None
+
+    def _draw_static_view(self, screen: pygame.display) -> List[pygame.Rect] | None:
+        """
+        Render the map that fits into the window
+        Only the areas of the dynamic entities and the destroyed walls are redrawn
+        :param screen: a screen to draw to
+        :return: changed areas or None if the whole screen was redrawn
+        """
+        if self._static_layer is None or self._static_layer.get_size() != screen.get_size():
+            self._static_layer = self._render_static_layer(screen.get_size())
+            self._redraw = True
+
+        # Remove the destroyed walls from the static layer
+        restore = self._dirty_rects + [wall.rect for wall in self._destroyed_walls]
+        for wall in self._destroyed_walls:
+            self._static_layer.fill(Config.consts['BACKGROUND_COLOR'], wall.rect)
+        self._destroyed_walls = []
+
+        # Game menu is redrawn every frame unless the quality is lowered
+        ui_top = Config.VIEW_HEIGHT * Config.consts['CELL_SIZE']
+        ui_rects = []
+        if self._redraw or self.governor.should_refresh_ui():
+            ui_rects = [pygame.Rect(0, ui_top, screen.get_width(), screen.get_height() - ui_top)]
+
+        # Erase the dynamic entities from the last frame
+        if self._redraw:
+            pygame.display.set_caption('Collapsed Bomberman')
+            self.renderer.add('restore', self._static_layer, (0, 0))
+        else:
+            for rect in restore + ui_rects:
+                self.renderer.add('restore', self._static_layer, rect, rect)
+
+        blits = self._entity_blits()
+        self.renderer.extend('entities', blits)
+        self.renderer.draw(screen, ['restore', 'entities'])
+        if ui_rects:
+            self._draw_menu(screen)
+
+        self._dirty_rects = [rect.copy() for _, rect in blits]
+        if self._redraw:
+            self._redraw = False
+            return None
+        return restore + self._dirty_rects + ui_rects
+
+    def _draw_menu(self, screen: pygame.display) -> None:
+        """
+        Render the game information and the remaining bombs
+        :param screen: a screen to draw to
+        """
+        for widget, pos in self._game_info.get_blit_sequence():
+            self.renderer.add('menu', widget, pos)
 
         # Bombs UI
-        for i in range(3 - len(self._bomb_group)):
-            screen.blit(self._bomb_counter_group[i].image, self._bomb_counter_group[i].rect)
+        remaining = max(3 - len(self._bomb_group), 0)
+        self.renderer.add_sprites('menu', self._bomb_counter_group[:remaining])
+        self.renderer.draw(screen, ['menu'])
 
     def check_end_game(self) -> None:
         """
@@ -231,12 +507,52 @@ class GameState(BaseState):
     def retrieve_information(self, information: Dict) -> None:
         """
         Get information about the game status
-        :param information:
+        :param information: level information from the WFC
+            or {'level_pack': path to the pack, 'level': number of the level}
+        :raises ValueError: if the levels of the pack don't have the size of the grid
         """
+        if 'level_pack' in information:
+            with LevelPack(information['level_pack']) as pack:
+                # The border, spawn cells and camera are built from the config size
+                if (pack.width, pack.height) != Config.get_grid_size():
+                    raise ValueError(f'Level pack size {pack.width}x{pack.height} does not '
+                                     f'match the grid size '
+                                     f'{Config.GRID_WIDTH}x{Config.GRID_HEIGHT}')
+                information = pack.load_level(information['level'])
+        self.level = {'grid': information.get('grid'), 'tiles': information.get('tiles')}
+
         self._walls_group = information['walls']
         self._empty_group = information['empty']
         self.walls_pos = information['walls_pos']
+        for wall in self._walls_group:
+            wall.on_destroy = self._wall_destroyed
+        self._static_layer = None
+        self._tile_index = self._create_tile_index()
+        self.renderer.invalidate()
         self._init_state()
+        if self.recorder is not None:
+            self.recorder.start(self)
+
+    @property
+    def seed(self) -> int:
+        """
+        :return: seed of the enemy placement and movement
+        """
+        return self._seed
+
+    def state_hash(self) -> str:
+        """
+        Digest of the simulation state, equal games have equal hashes
+        :return: hexadecimal SHA-256 digest
+        """
+        state = [self.tick, self._game_info.tries, self.active,
+                 sorted(player.rect.topleft for player in self._player_group),
+                 sorted(enemy.rect.topleft for enemy in self._enemy_group),
+                 sorted(bomb.pos for bomb in self._bomb_group),
+                 sorted((explosion.pos, explosion.reach, explosion.center_burning)
+                        for explosion in self._explosion_group),
+                 sorted(wall.rect.topleft for wall in self._walls_group)]
+        return hashlib.sha256(repr(state).encode()).hexdigest()
 
     def update(self, events: List) -> None:
         """
@@ -244,17 +560,44 @@ class GameState(BaseState):
         handle the game logic
         :param events: pygame logic feed
         """
+        if self.recorder is not None:
+            self.recorder.record(events, self.input_source.get_pressed())
         if not self.active:
             return
 
         self.check_end_game()
+        self._previous_pos = {sprite: sprite.rect.topleft for sprite in self._player_group}
+        if not isinstance(self._enemy_group, EnemySystem):
+            self._previous_pos.update((enemy, enemy.rect.topleft) for enemy in self._enemy_group)
+        self.tick += 1
         self._game_info.time += 1
         self._walls_group.update()
-        self._player_group.update(events, self.handle_collision, self.spawn_bomb)
-        self._bomb_group.update(self.spawn_explosion)
-        self._explosion_group.update(self.handle_collision, self.spawn_explosion)
-        self._enemy_group.update(self.handle_collision)
-        self._game_info.update()
+        self._player_group.update(events, self.handle_collision, self.spawn_bomb,
+                                  self.input_source.get_pressed())
+        self._player_group.refresh()
+        # Detonations, spreading and ends of the blasts
+        self._timers.advance(self.tick)
+        self._explosion_group.update(self.handle_collision)
+        flow_field = self._update_flow_field()
+        if isinstance(self._enemy_group, EnemySystem):
+            self._enemy_group.update(self._player_group, flow_field)
+        else:
+            self._enemy_group.update(self.handle_collision, flow_field)
+            self._enemy_group.refresh()
+        self._game_info.update(self.governor.should_refresh_ui())
+
+    def _update_flow_field(self) -> FlowField | None:
+        """
+        Follow the player with the flow field when the enemies chase it
+        :return: the flow field, None if the enemies wander
+        """
+        if Config.consts['ENEMY_BEHAVIOUR'] != 'chase' or not self._player_group:
+            return None
+
+        player = self._player_group.sprites()[0]
+        self._flow_field.update((player.rect.centerx // Config.consts['CELL_SIZE'],
+                                 player.rect.centery // Config.consts['CELL_SIZE']))
+        return self._flow_field
 
     def _create_grid(self, all_possible_tuples: List) -> List:
         """
@@ -272,6 +615,15 @@ class GameState(BaseState):
         for pos in left_border + right_border + top_border + bottom_border:
             self._map_border_group.add(Wall(pos))
 
+        # Static obstacles for the collision queries
+        self._occupancy = OccupancyGrid(Config.GRID_WIDTH, Config.GRID_HEIGHT,
+                                        Config.consts['CELL_SIZE'])
+        self._occupancy.add_all(self._walls_group, GroupClass.WALL.value)
+        self._occupancy.add_all(self._map_border_group, GroupClass.BORDER.value)
+        # Shared by all chasing enemies, recomputed when the player changes the cell
+        self._flow_field = FlowField(self._occupancy)
+        self._danger_map = DangerMap(self._occupancy)
+
         return all_possible_tuples
 
     def _spawn_enemies(self, all_possible_tuples: List) -> List:
@@ -284,9 +636,15 @@ class GameState(BaseState):
         self._enemies_alive = min(len(all_possible_tuples) - 1, self._enemies_alive)
         enemy_pos = self._generate_unique_tuples(self._enemies_alive, all_possible_tuples)
 
-        for pos in enemy_pos:
-            self._enemy_group.add(Enemy(pos, self._seed))
-            all_possible_tuples.remove(pos)
+        # All enemies are simulated together by the system in the stress arenas
+        if Config.consts['VECTORISED_ENEMIES']:
+            self._enemy_group = EnemySystem(enemy_pos, self._seed, self._occupancy)
+        else:
+            for index, pos in enumerate(enemy_pos):
+                self._enemy_group.add(Enemy(pos, self._streams.key('enemy', index)))
+
+        taken = set(enemy_pos)
+        all_possible_tuples[:] = [pos for pos in all_possible_tuples if pos not in taken]
         return all_possible_tuples
 
     def _generate_unique_tuples(self, number_of_indexes, all_possible_tuples):
@@ -296,5 +654,7 @@ class GameState(BaseState):
         :param all_possible_tuples:
         :return: list of unique tuples
         """
-        unique_tuples = self.rand.sample(all_possible_tuples, number_of_indexes)
-        return unique_tuples
+        # A new generator of the same stream repeats the positions after reset
+        rng = self._streams.generator('spawn')
+        indexes = rng.choice(len(all_possible_tuples), number_of_indexes, replace=False)
+        return [all_possible_tuples[index] for index in indexes.tolist()]
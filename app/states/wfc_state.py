@@ -19,12 +19,22 @@ class WaveFunctionCollapseState(BaseState):
         super().__init__()
         # Generate one seed
         self.cursor = False
+        # Fractions of the WFC steps carried over to the next frame
+        self._steps = 0.0
         self._init_state()
 
     def _init_state(self) -> None:
         """
         Initializes the WFC state
         """
+        self.wfc = self.create_generator()
+
+    @staticmethod
+    def create_generator() -> WaveFunctionCollapse:
+        """
+        Create the WFC initialized with the example scene
+        :return: WaveFunctionCollapse ready to generate a level
+        """
 
         # Create example scene
         tiles = {
@@ -44,27 +54,33 @@ class WaveFunctionCollapseState(BaseState):
         ]
 
         # Initialize wfc
-        self.wfc = WaveFunctionCollapse(Config.GRID_WIDTH, Config.GRID_HEIGHT)
-        self.wfc.init_wave_function_collapse(labyrinth, tiles)
+        wfc = WaveFunctionCollapse(Config.GRID_WIDTH, Config.GRID_HEIGHT)
+        wfc.init_wave_function_collapse(labyrinth, tiles)
+        return wfc
 
-    def draw(self, screen: pygame.display) -> None:
+    def draw(self, screen: pygame.display) -> List[pygame.Rect] | None:
         """
         Render the groups
         :param screen: screen to draw to
+        :return: changed areas or None if the whole screen was redrawn
         """
 
-        pygame.display.set_caption('Map Creation')
-        screen.fill(Config.consts['BACKGROUND_COLOR'])
-        self.wfc.draw(screen)
+        if self.wfc.redraw:
+            pygame.display.set_caption('Map Creation')
+            screen.fill(Config.consts['BACKGROUND_COLOR'])
+        return self.wfc.draw(screen)
 
     def update(self, events: List) -> None:
         """
         Update the internal state of the entities
         :param events: pygame logic feed
         """
-        self.wfc.update()
+        # Fewer steps per frame when the quality is lowered
+        self._steps += self.governor.wfc_steps
+        while self._steps >= 1:
+            self._steps -= 1
+            self.wfc.update()
         # The level was created
         if self.wfc.collapsed:
-            maps = self.wfc.get_maps()
-            self.information = {'walls': maps[0], 'empty': maps[1], 'walls_pos': maps[2]}
+            self.information = self.wfc.get_level_information()
             self.active = False
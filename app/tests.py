@@ -5,20 +5,49 @@
 
 
 """This module aggregates the tests for this project."""
+import math
+import os
+import random
+import re
+import shutil
+import subprocess
+import sys
 from typing import List, Tuple
 import numpy as np
 import pytest
 import pygame
 from app.core.wave_function_collapse import WaveFunctionCollapse
-from app.core.enums_manager import Movement
+from app.core.enums_manager import GroupClass, Movement
 from app.entities.enemy import Enemy
-from app.entities.explosion import Explosion
+from app.entities.explosion import Explosion, spread_delay
 from app.entities.bomb import Bomb
 from app.entities.wall import Wall
 from app.entities.player import Player
 from app.core.config import Config
+from app.core.level_prefetcher import LevelPrefetcher
+from app.core.level_pack import LevelPack
+from app.core.lru_cache import LRUCache
+from app.core.texture_atlas import TextureAtlas
+from app.core.asset_bundle import AssetBundle
+from app.core.asset_preloader import AssetPreloader
+from app.core.camera import Camera
+from app.core.renderer import BatchRenderer
+from app.core.input_source import KeyState, ScriptedInput
+from app.core.quality_governor import QualityGovernor
+from app.core.occupancy_grid import OccupancyGrid
+from app.core.spatial_hash import SpatialGroup
+from app.core.object_pool import ObjectPool
+from app.core.enemy_system import EnemySystem
+from app.core.flow_field import FlowField, UNREACHABLE
+from app.core.danger_map import DangerMap
+from app.core.timer_wheel import TimerWheel
+from app.core.random_streams import RandomStreams
+from app.core.replay import Recorder, Replayer, ReplayInput, keys_to_mask, mask_to_keys
+from app.core.thumbnails import ThumbnailRenderer, render_grids, render_pack
 from app.gui.button import Button
+from app.gui.label import Label, TextCache
 from app.states.game_state import GameState
+from app.states.wfc_state import WaveFunctionCollapseState
 
 
 class TestExplosionClass:
@@ -26,54 +55,109 @@ class TestExplosionClass:
     Test Explosion entity class
     """
 
-    @pytest.mark.parametrize("remaining_children, direction, synced_timer,pos", [
-        (4, Movement.MOVE_UP, 40, (0, -1)),
-        (3, Movement.MOVE_DOWN, 30, (0, 1)),
-        (2, Movement.MOVE_LEFT, 20, (-1, 0)),
-        (1, Movement.MOVE_RIGHT, 10, (1, 0)),
+    @staticmethod
+    def _kind_at(walls: List[Tuple[int, int]], size: Tuple[int, int] = (5, 5)):
+        """
+        Create the obstacle lookup of a small map
+        """
+        def kind_at(cell):
+            if not (-1 <= cell[0] <= size[0] and -1 <= cell[1] <= size[1]):
+                return None
+            if cell[0] in (-1, size[0]) or cell[1] in (-1, size[1]):
+                return GroupClass.BORDER.value
+            return GroupClass.WALL.value if cell in walls else 0
+        return kind_at
+
+    @pytest.mark.parametrize("pos, walls, expected_cells", [
+        ((2, 2), [], {(2, 2), (2, 0), (2, 1), (2, 3), (2, 4), (0, 2), (1, 2), (3, 2), (4, 2)}),
+        ((0, 0), [], {(0, 0), (1, 0), (2, 0), (0, 1), (0, 2)}),
+        ((2, 2), [(3, 2), (2, 1)], {(2, 2), (2, 1), (2, 3), (2, 4), (0, 2), (1, 2), (3, 2)}),
+        ((4, 4), [(3, 4)], {(4, 4), (3, 4), (4, 3), (4, 2)}),
     ])
-    def test_can_create_explosion(self,
-                                  remaining_children: int,
-                                  direction: Movement,
-                                  synced_timer: int,
-                                  pos: Tuple[int, int]):
-        """
-        Test if the explosion can spawn children in right directions
-        :param remaining_children:
-        :param direction:
-        :param synced_timer:
-        :param pos:
+    def test_cast(self, pos: Tuple[int, int], walls: List, expected_cells: set):
+        """
+        Test if the rays stop at the border and at the first wall
         """
+        explosion = Explosion(pos, 2)
+        explosion.cast(self._kind_at(walls))
+        assert {cell for _, cell in explosion.cells} == expected_cells
+        size = Config.consts['CELL_SIZE']
+        for _, cell in explosion.cells:
+            assert explosion.rect.contains(pygame.Rect(cell[0] * size, cell[1] * size,
+                                                       size, size))
 
-        def same(a: Explosion, b: Explosion) -> bool:
-            """
-            cmp function
-            """
-            return (a.pos == b.pos
-                    and a.range == b.range
-                    and a.direction == b.direction
-                    and a.synced_timer == b.synced_timer)
-
-        explosion = Explosion((0, 0), remaining_children, direction, synced_timer)
-        child = explosion._create_children()
-        assert same(child, Explosion(pos, remaining_children - 1, direction, synced_timer))
-
-    @pytest.mark.parametrize("remaining_children, direction, lifespan, expected_value", [
-        (4, Movement.MOVE_UP, 0, (0, -1), True),
-        (0, Movement.MOVE_DOWN, 30, (0, 1), False),
-        (-1, Movement.MOVE_LEFT, 20, (-1, 0), False),
-        (5, Movement.MOVE_RIGHT, 10, (1, 0), True),
-        (1, Movement.MOVE_RIGHT, 10, (1, 0), True),
-        (0, Movement.MOVE_RIGHT, 0, (1, 0), False),
+    def test_spreading(self):
+        """
+        Test if the blast spreads one cell further at the scheduled ticks
+        """
+        explosion = Explosion((2, 2), 2)
+        explosion.cast(self._kind_at([]))
+        timers = TimerWheel()
+        explosion.schedule(timers, 0)
+        probed = []
 
-    ])
-    def spawn_explosion(self, remaining_children: int, direction: Movement, lifespan: int,
-                        expected_value: Tuple[int, int]):
+        def handle_collision_mock(entity, _, dokill):
+            assert dokill
+            probed.append(entity.rect.topleft)
+            return []
+
+        group = pygame.sprite.Group(explosion)
+        explosion.update(handle_collision_mock)
+        # Center and the first cell in every direction
+        assert len(probed) == 5
+
+        spread = spread_delay(2)
+        timers.advance(spread - 1)
+        probed.clear()
+        explosion.update(handle_collision_mock)
+        assert len(probed) == 4
+        timers.advance(spread)
+        probed.clear()
+        explosion.update(handle_collision_mock)
+        assert len(probed) == 8
+
+        timers.advance(math.ceil(explosion.duration) - 1)
+        assert explosion.alive()
+        timers.advance(math.ceil(explosion.duration))
+        assert not group
+        assert len(timers) == 0
+
+    def test_kill_cancels_timers(self):
+        """
+        Test if the removed blast doesn't change after it is reused
+        """
+        explosion = Explosion((2, 2), 2)
+        timers = TimerWheel()
+        group = pygame.sprite.Group(explosion)
+        explosion.schedule(timers, 0)
+        explosion.kill()
+        assert not group and len(timers) == 0
+        explosion.reset((1, 1), 2)
+        timers.advance(100)
+        assert explosion.center_burning and explosion.reach == 1
+
+    def test_damage(self):
         """
-        Test if the explosion won't/will spawn children
+        Test if the blast destroys the first wall and kills the enemies it reaches
         """
-        explosion = Explosion((0, 0), remaining_children, direction, lifespan)
-        assert explosion._spawn_explosion(lambda x: x) == expected_value
+        pygame.init()
+        tiles = {'Q': ('wall_0.png', True), 'Y': ('space_0.png', False)}
+        grid = [['Y', 'Y', 'Q', 'Q'], ['Y', 'Y', 'Y', 'Y']]
+        g = GameState()
+        g.retrieve_information(LevelPack.create_level_information(grid, tiles))
+        g._enemy_group.empty()
+        enemy = Enemy((0, 1), 0)
+        enemy._move([0, Config.consts['CELL_SIZE']])
+        g._enemy_group.add(enemy)
+
+        g.spawn_explosion((0, 0), 3)
+        for _ in range(int(Config.consts['FPS'] * 3)):
+            g.tick += 1
+            g._timers.advance(g.tick)
+            g._explosion_group.update(g.handle_collision)
+        assert not enemy.alive()
+        assert sorted(g.walls_pos) == [(2, 0), (3, 0)]
+        assert [wall.rect.x // Config.consts['CELL_SIZE'] for wall in g._walls_group] == [3]
 
 
 class TestBombClass:
@@ -106,30 +190,40 @@ class TestBombClass:
 
     def test_create_bombs(self) -> None:
         """
-        Test the create_explosion method
+        Test if the detonated bomb spawns the blast at its position
         """
         bomb = Bomb((0, 0))
-        result = bomb._create_explosion()
-        assert len(result) == 5
-        for obj in result:
-            assert isinstance(obj, Explosion)
+        spawned = []
+        bomb.detonate(lambda pos, blast_range: spawned.append((pos, blast_range)))
+        assert spawned == [(bomb.pos, Config.consts['BOMB_RANGE'])]
 
     def test_explosion(self) -> None:
         """
-        Test the "explode" method
+        Test if the armed bomb detonates at its tick and the killed bomb doesn't
         """
         bomb = Bomb((0, 0))
+        group = pygame.sprite.Group(bomb)
+        timers = TimerWheel()
+        spawned = []
 
-        def mock_spawn_bomb(_):
+        def mock_spawn_bomb(*args):
             """
             Mock spawn_bomb function
             """
+            spawned.append(args)
 
-        for _ in range(Config.consts['BOMB_COUNTDOWN_SEC'] * Config.consts['FPS'] - 1):
-            bomb.update(mock_spawn_bomb)
-            assert bomb.countdown > 0
-        bomb.update(mock_spawn_bomb)
-        assert bomb.countdown <= 0
+        bomb.arm(timers, bomb.countdown, mock_spawn_bomb)
+        timers.advance(bomb.countdown - 1)
+        assert not spawned and bomb.alive()
+        timers.advance(bomb.countdown)
+        assert len(spawned) == 1
+        assert not group
+
+        group.add(bomb)
+        bomb.arm(timers, timers.now + bomb.countdown, mock_spawn_bomb)
+        bomb.kill()
+        timers.advance(timers.now + bomb.countdown)
+        assert len(spawned) == 1
 
 
 class TestPlayerClass:
@@ -388,6 +482,25 @@ class TestWaveFunctionCollapse:
         assert len(wfc._non_collapsed_group) == before - 1
         assert len(wfc.grid[pos[0]][pos[1]]) == 1
 
+    def test_incremental_draw(self):
+        """
+        Test if only the collapsed cells are drawn after the first frame
+        """
+        wfc = WaveFunctionCollapse(10, 10)
+        wfc.init_wave_function_collapse([
+            ['Q', 'Y', 'Q', 'Q'],
+            ['Q', 'Q', 'Y', 'Q'],
+        ], {'Q': ['wall_0.png', True], 'Y': ['space_0.png', False]})
+        screen = pygame.Surface((10 * Config.consts['CELL_SIZE'], 10 * Config.consts['CELL_SIZE']))
+        assert wfc.draw(screen) is None
+        assert wfc.draw(screen) == []
+        wfc.collapse((2, 3))
+        assert wfc.draw(screen) == [pygame.Rect(3 * Config.consts['CELL_SIZE'],
+                                                2 * Config.consts['CELL_SIZE'],
+                                                Config.consts['CELL_SIZE'],
+                                                Config.consts['CELL_SIZE'])]
+        assert wfc.draw(screen) == []
+
     @pytest.mark.parametrize("pos, direction, size, expected_value", [
         ((0, 0), (1, 0), (5, 5), (True, (1, 0))),
         ((2, 2), (0, 1), (4, 4), (True, (2, 3))),
@@ -490,6 +603,1454 @@ class TestEnemyClass:
         assert n._move_in_dir() == (expected_position[0], expected_position[1])
 
 
+class TestLevelPrefetcher:
+    """Test the LevelPrefetcher class"""
+
+    @staticmethod
+    def _create_generator() -> WaveFunctionCollapse:
+        """
+        Create a small generator to keep the test fast
+        """
+        wfc = WaveFunctionCollapse(4, 3)
+        wfc.init_wave_function_collapse([
+            ['Q', 'Y', 'Q', 'Q'],
+            ['Q', 'Q', 'Y', 'Q'],
+        ], {'Q': ['wall_0.png', True], 'Y': ['space_0.png', False]})
+        return wfc
+
+    def test_generate(self):
+        """
+        Test if the generate method collapses the whole grid
+        """
+        level = self._create_generator().generate()
+        assert len(level['walls']) + len(level['empty']) == 4 * 3
+        assert len(level['walls_pos']) == len(level['walls'])
+
+    def test_prefetch_level(self):
+        """
+        Test if the worker prepares the levels in the background
+        """
+        prefetcher = LevelPrefetcher(self._create_generator, 2)
+        prefetcher.start()
+        level = prefetcher.get_level(timeout=10)
+        prefetcher.stop()
+        assert level is not None
+        assert set(level.keys()) == {'walls', 'empty', 'walls_pos', 'grid', 'tiles'}
+
+    def test_disabled(self):
+        """
+        Test if the prefetching can be disabled
+        """
+        prefetcher = LevelPrefetcher(self._create_generator, 0)
+        prefetcher.start()
+        assert prefetcher.get_level(timeout=0.1) is None
+        prefetcher.stop()
+
+
+class TestLevelPack:
+    """Test the LevelPack class"""
+
+    tiles = {'Q': ('wall_0.png', True), 'Y': ('space_0.png', False)}
+    grids = [
+        [['Q', 'Y', 'Y'], ['Y', 'Y', 'Q']],
+        [['Y', 'Y', 'Y'], ['Y', 'Y', 'Y']],
+        [['Q', 'Q', 'Q'], ['Q', 'Y', 'Q']],
+    ]
+
+    def test_round_trip(self, tmp_path):
+        """
+        Test if the written levels are read back unchanged
+        """
+        path = str(tmp_path / 'levels.lvp')
+        LevelPack.write(path, self.tiles, self.grids)
+        with LevelPack(path) as pack:
+            assert len(pack) == 3
+            assert (pack.width, pack.height) == (3, 2)
+            assert pack.tiles == self.tiles
+            # random access in any order
+            for number in (2, 0, 1):
+                assert pack.load_grid(number) == self.grids[number]
+            with pytest.raises(IndexError):
+                pack.load_grid(3)
+
+    @pytest.mark.parametrize("length", [1, 255, 256, 1000])
+    def test_encode_long_runs(self, length: int):
+        """
+        Test if the runs longer than one byte are split
+        """
+        encoded = LevelPack.encode_grid(np.zeros(length, dtype=np.uint8))
+        assert sum(encoded[0::2]) == length
+        assert len(encoded) == 2 * -(-length // 255)
+
+    def test_load_level(self, tmp_path, monkeypatch):
+        """
+        Test if the loaded level plugs into the game state
+        """
+        path = str(tmp_path / 'levels.lvp')
+        LevelPack.write(path, self.tiles, self.grids)
+        monkeypatch.setattr(Config, 'GRID_WIDTH', 3)
+        monkeypatch.setattr(Config, 'GRID_HEIGHT', 2)
+        pygame.init()
+        g = GameState()
+        g.retrieve_information({'level_pack': path, 'level': 0})
+        assert len(g._walls_group) == 2
+        assert len(g._empty_group) == 4
+        assert sorted(g.walls_pos) == [(0, 0), (2, 1)]
+
+    @pytest.mark.parametrize("width, height", [(5, 4), (30, 19)])
+    def test_load_level_of_other_size(self, tmp_path, width: int, height: int):
+        """
+        Test if a pack of another size than the grid is refused
+        """
+        path = str(tmp_path / 'levels.lvp')
+        LevelPack.write(path, self.tiles, [[['Y'] * width for _ in range(height)]])
+        pygame.init()
+        g = GameState()
+        with pytest.raises(ValueError):
+            g.retrieve_information({'level_pack': path, 'level': 0})
+
+
+class TestImageCache:
+    """Test the LRUCache and its use in SpriteHandler"""
+
+    def test_eviction(self):
+        """
+        Test if the least recently used entry is removed
+        """
+        cache = LRUCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        assert cache.get('a') == 1
+        cache.put('c', 3)
+        assert 'b' not in cache
+        assert cache.get('b') is None
+        assert cache.info() == {'hits': 1, 'misses': 1, 'size': 2, 'max_size': 2}
+
+    def test_shared_surface(self):
+        """
+        Test if the same asset and scale returns the same surface
+        """
+        Config.image_cache.clear()
+        first = Config.load_image('bomb_0.png', Config.consts['CELL_SIZE'])
+        second = Config.load_image('bomb_0.png',
+                                   (Config.consts['CELL_SIZE'], Config.consts['CELL_SIZE']))
+        other = Config.load_image('bomb_0.png', Config.consts['CELL_SIZE'] * 0.5)
+        assert first is second
+        assert other is not first
+        assert other.get_size() == (Config.consts['CELL_SIZE'] // 2,) * 2
+        assert Config.image_cache.hits == 1
+        assert Config.image_cache.misses == 2
+
+    def test_random_variants(self):
+        """
+        Test if the random variants are cached as well
+        """
+        Config.image_cache.clear()
+        images = {id(image) for _ in range(30)
+                  for image in Config.load_image_variants('enemy_', Config.consts['CELL_SIZE'])}
+        assert len(images) == Config.IMAGE_VARIANTS['enemy_']
+        assert Config.image_cache.misses == len(images)
+
+
+class TestTextureAtlas:
+    """Test the TextureAtlas class"""
+
+    def test_build(self):
+        """
+        Test if all assets are packed and render the same as the single images
+        """
+        atlas = TextureAtlas(max_page_size=100)
+        assert atlas.build(Config.ASSET_DIR, 20, Config.decode_image)
+        # 5x5 images per page
+        assert len(atlas.pages) == -(-len(atlas) // 25)
+
+        for asset in ('bomb_0.png', 'space_6.png', 'button_0.png'):
+            image = atlas.get(asset, (20, 20))
+            assert image.get_parent() in atlas.pages
+            rendered = []
+            for source in (image, Config.decode_image(asset, (20, 20))):
+                screen = pygame.Surface((20, 20))
+                screen.fill(Config.consts['BACKGROUND_COLOR'])
+                screen.blit(source, (0, 0))
+                rendered.append(pygame.image.tobytes(screen, 'RGB'))
+            assert rendered[0] == rendered[1]
+        assert atlas.get('bomb_0.png', (10, 10)) is None
+
+    def test_rebuild(self):
+        """
+        Test if the atlas is rebuilt only when the cell size changes
+        """
+        atlas = TextureAtlas()
+        assert atlas.build(Config.ASSET_DIR, 20, Config.decode_image)
+        assert not atlas.build(Config.ASSET_DIR, 20, Config.decode_image)
+        assert atlas.build(Config.ASSET_DIR, 30, Config.decode_image)
+        assert atlas.get('bomb_0.png', (30, 30)) is not None
+        assert atlas.get('bomb_0.png', (20, 20)) is None
+
+
+class TestAssetBundle:
+    """Test the AssetBundle class"""
+
+    requests = [('bomb_0.png', (20, 20)), ('bomb_0.png', (7, 9)), ('button_0.png', (40, 10))]
+
+    @staticmethod
+    def _render(image: pygame.Surface) -> bytes:
+        """
+        Render the image over the background
+        """
+        screen = pygame.Surface(image.get_size())
+        screen.fill(Config.consts['BACKGROUND_COLOR'])
+        screen.blit(image, (0, 0))
+        return pygame.image.tobytes(screen, 'RGB')
+
+    def test_round_trip(self, tmp_path):
+        """
+        Test if the bundled images render the same as the PNGs
+        """
+        path = str(tmp_path / 'assets.bundle')
+        assert AssetBundle.build(path, Config.ASSET_DIR, self.requests) == 3
+        with AssetBundle(path, Config.ASSET_DIR) as bundle:
+            assert len(bundle) == 3
+            for name, size in self.requests:
+                image = bundle.get(name, size)
+                assert image.get_size() == size
+                assert self._render(image) == self._render(Config.decode_image(name, size))
+            # The surface shares the mapped pixels, it must be deleted before the close
+            del image
+            assert bundle.get('bomb_0.png', (21, 21)) is None
+
+    def test_outdated_entries(self, tmp_path):
+        """
+        Test if the images changed after the build are not used
+        """
+        asset_dir = tmp_path / 'assets'
+        asset_dir.mkdir()
+        for name in ('bomb_0.png', 'button_0.png'):
+            shutil.copy(os.path.join(Config.ASSET_DIR, name), asset_dir / name)
+        path = str(tmp_path / 'assets.bundle')
+        AssetBundle.build(path, str(asset_dir), self.requests)
+
+        stat = os.stat(asset_dir / 'bomb_0.png')
+        os.utime(asset_dir / 'bomb_0.png', ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        with AssetBundle(path, str(asset_dir)) as bundle:
+            assert bundle.get('bomb_0.png', (20, 20)) is None
+            assert bundle.get('button_0.png', (40, 10)) is not None
+
+    def test_missing_bundle(self, tmp_path, monkeypatch):
+        """
+        Test if the PNGs are used without the bundle
+        """
+        monkeypatch.setattr(Config, 'BUNDLE_PATH', str(tmp_path / 'missing.bundle'))
+        assert not Config.open_bundle()
+        assert Config.bundle is None
+        assert Config.decode_image('bomb_0.png', (20, 20)).get_size() == (20, 20)
+
+
+class TestAssetPreloader:
+    """Test the AssetPreloader class"""
+
+    def test_preload(self):
+        """
+        Test if all requested images are decoded and stored
+        """
+        requests = [('bomb_0.png', (20, 20)), ('wall_0.png', (20, 20)),
+                    ('bomb_0.png', (20, 20)), ('player_0.png', (8, 8))]
+        preloader = AssetPreloader(requests, Config.decode_image, workers=2)
+        preloader.start()
+        stored = {}
+        assert preloader.store(lambda name, size, image: stored.update({(name, size): image})) == 3
+        assert preloader.done()
+        assert preloader.progress() == 1.0
+        assert stored[('player_0.png', (8, 8))].get_size() == (8, 8)
+
+    def test_no_disk_access_after_preload(self, monkeypatch):
+        """
+        Test if the preloaded images are served from the cache
+        """
+        Config.image_cache.clear()
+        preloader = AssetPreloader([('bomb_0.png', (21, 21))], Config.decode_image)
+        preloader.start()
+        preloader.store(Config.store_image)
+
+        def fail(*_):
+            raise AssertionError('disk access')
+
+        monkeypatch.setattr(pygame.image, 'load', fail)
+        assert Config.load_image('bomb_0.png', 21).get_size() == (21, 21)
+
+
+class TestStaticLayer:
+    """Test the incremental rendering of the GameState"""
+
+    tiles = {'Q': ('wall_0.png', True), 'Y': ('space_0.png', False)}
+    grid = [['Q', 'Y', 'Y'], ['Y', 'Y', 'Q']]
+
+    def _create_game(self) -> GameState:
+        """
+        Create the game with a small level
+        """
+        pygame.init()
+        g = GameState()
+        g.retrieve_information(LevelPack.create_level_information(self.grid, self.tiles))
+        return g
+
+    def test_incremental_draw(self):
+        """
+        Test if only the first frame is fully redrawn
+        """
+        g = self._create_game()
+        screen = pygame.Surface(Config.get_screen_size())
+        assert g.draw(screen) is None
+        rects = g.draw(screen)
+        player = next(iter(g._player_group))
+        assert player.rect in rects
+        # Static tiles are not redrawn
+        for wall in g._walls_group:
+            assert wall.rect not in rects
+
+    def test_destroyed_wall(self):
+        """
+        Test if the destroyed wall is removed from the static layer
+        """
+        g = self._create_game()
+        screen = pygame.Surface(Config.get_screen_size())
+        g.draw(screen)
+        wall = [wall for wall in g._walls_group if wall.rect.topleft == (0, 0)][0]
+        wall.kill()
+        wall.kill()
+        assert g._destroyed_walls == [wall]
+        rects = g.draw(screen)
+        assert wall.rect in rects
+        assert screen.get_at(wall.rect.center)[:3] == Config.consts['BACKGROUND_COLOR']
+
+    def test_redraw_after_restart(self):
+        """
+        Test if the whole screen is redrawn after the player died
+        """
+        g = self._create_game()
+        screen = pygame.Surface(Config.get_screen_size())
+        g.draw(screen)
+        g._player_group = pygame.sprite.Group()
+        g.check_end_game()
+        assert g.draw(screen) is None
+
+
+class TestTextCache:
+    """Test the cached text rendering"""
+
+    def test_shared_font_and_text(self):
+        """
+        Test if the labels with the same text share the font and the rendered text
+        """
+        pygame.init()
+        attr = {'color': Config.consts['WHITE'], 'size': 17}
+        first = Label('Tries: 0', attr, pos=(0, 0))
+        second = Label('Tries: 0', attr, pos=(10, 10))
+        assert first.font is second.font
+        assert first.widget is second.widget
+
+    def test_set_text(self):
+        """
+        Test if the label is re-rendered only when the text changes
+        """
+        pygame.init()
+        label = Label('Time: 0', {'color': Config.consts['WHITE'], 'size': 17}, pos=(0, 0))
+        widget = label.widget
+        assert not label.set_text('Time: 0')
+        assert label.widget is widget
+        assert label.set_text('Time: 1')
+        assert label.widget is not widget
+
+    def test_game_info(self):
+        """
+        Test if the game information renders the timer once per second
+        """
+        pygame.init()
+        g = GameState()
+        TextCache.texts.clear()
+        for _ in range(2 * Config.consts['FPS']):
+            g._game_info.update()
+        # Only "Time: 1" and "Time: 2" are new
+        assert TextCache.texts.misses == 2
+        assert TextCache.texts.hits == 0
+
+
+class TestCamera:
+    """Test the viewport over the maps larger than the window"""
+
+    def test_follow_is_clamped(self):
+        """
+        Test if the camera centers on the target and does not leave the map
+        """
+        camera = Camera((100, 50), (400, 200))
+        assert camera.scrolling
+        camera.follow(pygame.Rect(200, 100, 10, 10))
+        assert camera.rect.center == (205, 105)
+        camera.follow(pygame.Rect(0, 0, 10, 10))
+        assert camera.rect.topleft == (0, 0)
+        camera.follow(pygame.Rect(390, 190, 10, 10))
+        assert camera.rect.bottomright == (400, 200)
+        assert camera.apply(pygame.Rect(300, 150, 10, 10)).topleft == (0, 0)
+
+    def test_visible_cells(self):
+        """
+        Test if only the cells intersecting the viewport are visible
+        """
+        camera = Camera((100, 50), (400, 200))
+        camera.rect.topleft = (25, 60)
+        columns, rows = camera.visible_cells(50)
+        assert list(columns) == [0, 1, 2]
+        assert list(rows) == [1, 2]
+        assert camera.is_visible(pygame.Rect(120, 100, 10, 10))
+        assert not camera.is_visible(pygame.Rect(200, 100, 10, 10))
+        assert not Camera((100, 50), (100, 50)).scrolling
+
+    def test_scrolling_draw(self, monkeypatch):
+        """
+        Test if only the visible tiles are drawn when the map is larger than the window
+        """
+        pygame.init()
+        monkeypatch.setattr(Config, 'GRID_WIDTH', Config.VIEW_WIDTH * 3)
+        monkeypatch.setattr(Config, 'GRID_HEIGHT', Config.VIEW_HEIGHT * 2)
+        tiles = {'Q': ('wall_0.png', True), 'Y': ('space_0.png', False)}
+        grid = [['Y'] * Config.GRID_WIDTH for _ in range(Config.GRID_HEIGHT)]
+        grid[-1][-1] = 'Q'
+
+        g = GameState()
+        g.retrieve_information(LevelPack.create_level_information(grid, tiles))
+        assert g._camera.scrolling
+        screen = pygame.Surface(Config.get_screen_size())
+        assert g.draw(screen) is None
+
+        visible = g._visible_tiles()
+        assert len(visible) < len(g._empty_group) + len(g._walls_group)
+        assert all(g._camera.is_visible(tile.rect) for tile in visible)
+
+        # The wall in the far corner is drawn once the player gets there
+        wall = next(iter(g._walls_group))
+        assert wall not in visible
+        player = next(iter(g._player_group))
+        player.rect.topleft = wall.rect.topleft
+        g.draw(screen)
+        assert wall in g._visible_tiles()
+        wall.kill()
+        assert wall not in g._visible_tiles()
+
+
+class TestBatchRenderer:
+    """Test the batched drawing of the layers"""
+
+    def test_one_call_per_layer(self):
+        """
+        Test if every non-empty layer is drawn by a single blits call
+        """
+        red = pygame.Surface((2, 2))
+        red.fill((255, 0, 0))
+        target = pygame.Surface((10, 10))
+        renderer = BatchRenderer()
+
+        renderer.begin_frame()
+        renderer.set_static('tiles', [(red, (0, 0)), (red, (2, 0))])
+        renderer.add('entities', red, (4, 4))
+        renderer.add('entities', red, (6, 6), pygame.Rect(0, 0, 1, 1))
+        renderer.draw(target, ['tiles', 'entities', 'empty'])
+        assert renderer.end_frame() == 2
+        assert target.get_at((3, 1))[:3] == (255, 0, 0)
+        assert target.get_at((6, 6))[:3] == (255, 0, 0)
+        assert target.get_at((7, 7))[:3] == (0, 0, 0)
+
+        # Static layer is reused, the dynamic one is dropped
+        renderer.begin_frame()
+        assert renderer.has_static('tiles')
+        assert not renderer.get_sequence('entities')
+        renderer.invalidate('tiles')
+        assert not renderer.has_static('tiles')
+
+    def test_game_draw_calls(self):
+        """
+        Test if the game frame takes a constant number of draw calls
+        """
+        pygame.init()
+        g = GameState()
+        screen = pygame.Surface(Config.get_screen_size())
+        g.draw(screen)
+        g.draw(screen)
+        # Restored areas, entities and the game menu
+        assert g.renderer.frame_draw_calls == 3
+
+
+class TestHeadlessMode:
+    """Test the game driven by a script without a window"""
+
+    def test_scripted_input(self):
+        """
+        Test if the held keys generate the key events and the script ends with quit
+        """
+        pygame.init()
+        script = ScriptedInput([[pygame.K_UP], [pygame.K_UP, pygame.K_SPACE], []])
+
+        def key_events():
+            return {(e.type, e.key) for e in script.poll() if hasattr(e, 'key')}
+
+        assert key_events() == {(pygame.KEYDOWN, pygame.K_UP)}
+        assert script.get_pressed()[pygame.K_UP]
+        assert key_events() == {(pygame.KEYDOWN, pygame.K_SPACE)}
+        assert key_events() == {(pygame.KEYUP, pygame.K_UP), (pygame.KEYUP, pygame.K_SPACE)}
+        assert not script.get_pressed()[pygame.K_UP]
+
+        assert pygame.QUIT in [e.type for e in script.poll()]
+        assert script.finished and script.frame == 3
+
+    def test_random_script(self):
+        """
+        Test if the random script is reproducible
+        """
+        keys = [pygame.K_UP, pygame.K_SPACE]
+        first = list(ScriptedInput.random_frames(50, keys, seed=3))
+        assert first == list(ScriptedInput.random_frames(50, keys, seed=3))
+        assert len(first) == 50
+
+    def test_player_scripted_movement(self):
+        """
+        Test if the player moves by the scripted key state
+        """
+        player = Player((1, 1))
+        start = player.rect.topleft
+        player.update([], lambda *_: [], lambda _: True,
+                      ScriptedInput([[Config.MOVE_RIGHT]]).get_pressed())
+        assert player.rect.topleft == start
+        script = ScriptedInput([[Config.MOVE_RIGHT]])
+        script.poll()
+        player.update([], lambda *_: [], lambda _: True, script.get_pressed())
+        assert player.rect.x == start[0] + Config.consts['PLAYER_SPEED']
+
+    def test_headless_run(self, tmp_path):
+        """
+        Test if the game runs the scripted frames without a window and quits
+        """
+        tiles = {'Q': ('wall_0.png', True), 'Y': ('space_0.png', False)}
+        grid = [['Y'] * Config.GRID_WIDTH for _ in range(Config.GRID_HEIGHT)]
+        path = str(tmp_path / 'levels.pack')
+        LevelPack.write(path, tiles, [grid])
+
+        env = dict(os.environ)
+        env.pop('SDL_VIDEODRIVER', None)
+        result = subprocess.run([sys.executable, 'main.py', '--headless', '--frames', '100',
+                                 '--level-pack', path],
+                                capture_output=True, text=True, timeout=300, check=True,
+                                env=env, cwd=os.path.dirname(os.path.dirname(__file__)))
+        assert '101 frames' in result.stdout
+
+    def test_fast_forward(self, tmp_path):
+        """
+        Test if the fast-forwarded game runs several ticks in one frame
+        """
+        tiles = {'Q': ('wall_0.png', True), 'Y': ('space_0.png', False)}
+        grid = [['Y'] * Config.GRID_WIDTH for _ in range(Config.GRID_HEIGHT)]
+        path = str(tmp_path / 'levels.pack')
+        LevelPack.write(path, tiles, [grid])
+
+        env = dict(os.environ)
+        env.pop('SDL_VIDEODRIVER', None)
+        result = subprocess.run([sys.executable, 'main.py', '--headless', '--no-render',
+                                 '--frames', '300', '--fast-forward', '1000',
+                                 '--level-pack', path],
+                                capture_output=True, text=True, timeout=300, check=True,
+                                env=env, cwd=os.path.dirname(os.path.dirname(__file__)))
+        ticks, frames = re.search(r'(\d+) ticks and (\d+) frames', result.stdout).groups()
+        assert int(ticks) == 301
+        assert int(frames) < int(ticks)
+
+    def test_negative_fast_forward(self):
+        """
+        Test if a negative fast-forward is refused instead of never running a tick
+        """
+        result = subprocess.run([sys.executable, 'main.py', '--headless', '--no-render',
+                                 '--fast-forward', '-1'],
+                                capture_output=True, text=True, timeout=60, check=False,
+                                cwd=os.path.dirname(os.path.dirname(__file__)))
+        assert result.returncode == 2
+        assert 'must not be negative' in result.stderr
+
+
+class TestThumbnails:
+    """Test the composition of the level previews"""
+
+    tiles = {'Q': ('wall_0.png', True), 'Y': ('space_0.png', False)}
+    grid = [['Q', 'Y', 'Y'], ['Y', 'Y', 'Q']]
+
+    def test_compose(self):
+        """
+        Test if the thumbnail matches the tiles blitted cell by cell
+        """
+        renderer = ThumbnailRenderer(['Q', 'Y'], self.tiles, 8, Config.ASSET_DIR, (1, 2, 3))
+        pixels = renderer.compose(renderer.grid_to_indices(self.grid))
+        assert pixels.shape == (3 * 8, 2 * 8, 3)
+
+        expected = pygame.Surface((3 * 8, 2 * 8))
+        expected.fill((1, 2, 3))
+        for y, row in enumerate(self.grid):
+            for x, symbol in enumerate(row):
+                image = pygame.image.load(os.path.join(Config.ASSET_DIR, self.tiles[symbol][0]))
+                expected.blit(pygame.transform.scale(image, (8, 8)), (x * 8, y * 8))
+        assert np.array_equal(pixels, pygame.surfarray.array3d(expected))
+
+    def test_render_pack(self, tmp_path):
+        """
+        Test if every level of the pack gets its PNG
+        """
+        path = str(tmp_path / 'levels.pack')
+        LevelPack.write(path, self.tiles, [self.grid, self.grid[::-1], self.grid])
+        written = render_pack(path, str(tmp_path / 'thumbs'), 4, Config.ASSET_DIR, workers=2)
+        assert len(written) == 3
+        assert pygame.image.load(written[1]).get_size() == (3 * 4, 2 * 4)
+
+        written = render_grids([self.grid], self.tiles, str(tmp_path / 'wfc'), 4,
+                               Config.ASSET_DIR, workers=1)
+        assert np.array_equal(pygame.surfarray.array3d(pygame.image.load(written[0])),
+                              pygame.surfarray.array3d(pygame.image.load(
+                                  str(tmp_path / 'thumbs' / 'level_00000.png'))))
+
+
+class TestQualityGovernor:
+    """Test the adaptive quality"""
+
+    def test_lower_and_restore(self):
+        """
+        Test if the quality is lowered over the budget and restored with headroom
+        """
+        governor = QualityGovernor(0.01, smoothing=1.0, patience=2)
+        for _ in range(2 * len(QualityGovernor.TIERS)):
+            governor.record(0.01, 0.01)
+        assert governor.level == len(QualityGovernor.TIERS) - 1
+        assert governor.wfc_steps < 1 and governor.draw_interval > 1
+
+        # Skipped frames keep the cost of the last drawn frame
+        governor.record(0.001, None)
+        assert governor.average == pytest.approx(0.011)
+
+        for _ in range(8):
+            governor.record(0.001, 0.001)
+        assert governor.level == len(QualityGovernor.TIERS) - 2
+
+        disabled = QualityGovernor(0.01, enabled=False, smoothing=1.0, patience=1)
+        disabled.record(1, 1)
+        assert disabled.level == 0 and disabled.should_draw() and disabled.should_refresh_ui()
+
+    def test_wfc_steps(self, monkeypatch):
+        """
+        Test if the level generation runs fewer steps with the lowered quality
+        """
+        state = WaveFunctionCollapseState()
+        steps = []
+        monkeypatch.setattr(state.wfc, 'update', lambda: steps.append(1))
+        state.governor = QualityGovernor(0.01)
+        state.governor.level = len(QualityGovernor.TIERS) - 1
+        for _ in range(8):
+            state.update([])
+        assert len(steps) == 8 * QualityGovernor.TIERS[-1][0]
+
+    def test_menu_refresh(self):
+        """
+        Test if the game menu is not redrawn in every frame with the lowered quality
+        """
+        pygame.init()
+        g = GameState()
+        g.governor = QualityGovernor(0.01)
+        g.governor.level = 2
+        screen = pygame.Surface(Config.get_screen_size())
+        ui_rect = pygame.Rect(0, Config.VIEW_HEIGHT * Config.consts['CELL_SIZE'],
+                              screen.get_width(),
+                              screen.get_height() - Config.VIEW_HEIGHT * Config.consts['CELL_SIZE'])
+        g.draw(screen)
+        g.governor.frame = 1
+        assert ui_rect not in g.draw(screen)
+        g.governor.frame = g.governor.ui_interval
+        assert ui_rect in g.draw(screen)
+
+
+class TestOccupancyGrid:
+    """Test the cell lookup of the static obstacles"""
+
+    def test_query_matches_spritecollide(self):
+        """
+        Test if the grid finds the same walls as the collision with the whole group
+        """
+        rand = np.random.default_rng(5)
+        cell = Config.consts['CELL_SIZE']
+        walls = pygame.sprite.Group(Wall((x, y)) for x in range(-1, 9) for y in range(-1, 7)
+                                    if rand.random() < 0.4)
+        grid = OccupancyGrid(8, 6, cell)
+        grid.add_all(walls, GroupClass.WALL.value)
+
+        probe = pygame.sprite.Sprite()
+        for _ in range(500):
+            x, y = rand.integers(-2 * cell, 10 * cell, size=2)
+            w, h = rand.integers(1, cell + 1, size=2)
+            probe.rect = pygame.Rect(int(x), int(y), int(w), int(h))
+            expected = set(pygame.sprite.spritecollide(probe, walls, False))
+            assert set(grid.query(probe.rect, [GroupClass.WALL.value])) == expected
+
+    def test_kinds_and_remove(self):
+        """
+        Test if the query filters the kinds and the removed obstacle is not found
+        """
+        cell = Config.consts['CELL_SIZE']
+        wall, border = Wall((0, 0)), Wall((-1, 0))
+        grid = OccupancyGrid(2, 2, cell)
+        grid.add(wall, GroupClass.WALL.value)
+        grid.add(border, GroupClass.BORDER.value)
+
+        rect = pygame.Rect(-cell // 2, 0, cell, cell)
+        assert grid.query(rect, [GroupClass.WALL.value]) == [wall]
+        assert grid.query(rect, [GroupClass.BORDER.value]) == [border]
+        grid.remove(wall)
+        assert not grid.query(rect, [GroupClass.WALL.value])
+        assert not grid.add(Wall((5, 5)), GroupClass.WALL.value)
+
+    def test_destroyed_wall(self):
+        """
+        Test if the wall destroyed in the game stops blocking the movement
+        """
+        pygame.init()
+        tiles = {'Q': ('wall_0.png', True), 'Y': ('space_0.png', False)}
+        g = GameState()
+        g.retrieve_information(LevelPack.create_level_information([['Q', 'Y'], ['Y', 'Y']],
+                                                                  tiles))
+        probe = pygame.sprite.Sprite()
+        probe.rect = pygame.Rect(0, 0, 10, 10)
+        wall = g.handle_collision(probe, [GroupClass.WALL], False)[0]
+        assert g.handle_collision(probe, [GroupClass.WALL], True) == [wall]
+        assert not wall.alive()
+        assert not g.handle_collision(probe, [GroupClass.WALL, GroupClass.BORDER], False)
+        probe.rect.x = -5
+        assert len(g.handle_collision(probe, [GroupClass.BORDER], False)) == 1
+
+
+class TestSpatialHash:
+    """Test the cell index of the moving entities"""
+
+    def test_collide_matches_spritecollide(self):
+        """
+        Test if the group finds the same sprites as spritecollide while the sprites move
+        """
+        rand = np.random.default_rng(7)
+        group = SpatialGroup(50)
+        for _ in range(100):
+            sprite = pygame.sprite.Sprite()
+            sprite.rect = pygame.Rect(*rand.integers(0, 500, size=2).tolist(), 40, 40)
+            group.add(sprite)
+
+        probe = pygame.sprite.Sprite()
+        for _ in range(20):
+            for sprite in group:
+                sprite.rect.move_ip(*rand.integers(-30, 31, size=2).tolist())
+            group.refresh()
+            for _ in range(20):
+                probe.rect = pygame.Rect(*rand.integers(-50, 550, size=2).tolist(), 50, 50)
+                assert (set(group.collide(probe, False)) ==
+                        set(pygame.sprite.spritecollide(probe, group, False)))
+
+    def test_spawn_and_kill(self):
+        """
+        Test if the killed sprites are removed from the index
+        """
+        group = SpatialGroup(50)
+        first, second = pygame.sprite.Sprite(), pygame.sprite.Sprite()
+        first.rect = pygame.Rect(10, 10, 50, 50)
+        second.rect = pygame.Rect(20, 20, 10, 10)
+        group.add(first, second)
+        assert len(group.spatial_hash) == 2
+        assert group.spatial_hash.cells_of(first.rect) == ((0, 0), (1, 0), (0, 1), (1, 1))
+
+        probe = pygame.sprite.Sprite()
+        probe.rect = pygame.Rect(0, 0, 25, 25)
+        assert group.collide(probe, True) == [first, second]
+        assert not first.alive() and not group.spatial_hash
+        assert not group.collide(probe, False)
+
+
+class TestObjectPool:
+    """Test the recycling of the bombs and explosions"""
+
+    def test_acquire_release(self):
+        """
+        Test if the released object is reset and reused
+        """
+        pool = ObjectPool(Bomb)
+        first = pool.acquire((0, 0))
+        pool.release(first)
+        second = pool.acquire((2 * Config.consts['CELL_SIZE'], 0))
+        assert second is first
+        assert second.pos == (2, 0)
+        assert second.countdown == Config.consts['BOMB_COUNTDOWN_SEC'] * Config.consts['FPS']
+        assert pool.info() == {'created': 1, 'reused': 1, 'released': 1, 'in_use': 1, 'free': 0}
+
+    def test_steady_state(self):
+        """
+        Test if the repeated detonations reuse the pooled entities
+        """
+        pygame.init()
+        g = GameState()
+        g._enemy_group.empty()
+        g._player_group.empty()
+        pos = (Config.consts['CELL_SIZE'], Config.consts['CELL_SIZE'])
+        for _ in range(5):
+            assert g.spawn_bomb(pos)
+            for _ in range(int(Config.consts['FPS'] * 3)):
+                g.tick += 1
+                g._timers.advance(g.tick)
+                g._explosion_group.update(g.handle_collision)
+            assert not g._bomb_group and not g._explosion_group
+
+        info = g.pool_info()
+        assert info['bombs']['created'] == 1 and info['bombs']['reused'] == 4
+        assert info['explosions']['created'] == 1 and info['explosions']['reused'] == 4
+        assert info['explosions']['in_use'] == 0
+
+
+class TestEnemySystem:
+    """Test the vectorised enemies"""
+
+    @staticmethod
+    def _create_occupancy(walls: List[Tuple[int, int]]) -> OccupancyGrid:
+        """
+        Create a 5x5 map with the border
+        """
+        grid = OccupancyGrid(5, 5, Config.consts['CELL_SIZE'])
+        grid.add_all([Wall(pos) for pos in walls], GroupClass.WALL.value)
+        grid.add_all([Wall((x, y)) for x in range(-1, 6) for y in range(-1, 6)
+                      if x in (-1, 5) or y in (-1, 5)], GroupClass.BORDER.value)
+        return grid
+
+    def test_move_and_look_around(self):
+        """
+        Test if the free enemies move and the blocked ones turn to a free direction
+        """
+        system = EnemySystem([(1, 1), (3, 3)], 0, self._create_occupancy([(2, 1)]))
+        system.direction[:] = [Movement.MOVE_RIGHT.value, Movement.MOVE_UP.value]
+        system.update(pygame.sprite.Group())
+
+        speed = Config.consts['ENEMY_SPEED']
+        cell = Config.consts['CELL_SIZE']
+        assert system.pos.tolist()[0] == [cell, cell]
+        assert system.direction[0] != Movement.MOVE_RIGHT.value
+        assert system.pos.tolist()[1] == [3 * cell, 3 * cell - speed]
+
+    def test_matches_enemy_blocking(self):
+        """
+        Test if the system blocks the same moves as the Enemy sprite
+        """
+        cell = Config.consts['CELL_SIZE']
+        walls = [(2, 1), (1, 3), (3, 2)]
+        occupancy = self._create_occupancy(walls)
+        wall_group = pygame.sprite.Group(Wall(pos) for pos in walls)
+
+        def handle_collision(entity, groups, _):
+            assert groups == [GroupClass.WALL]
+            return pygame.sprite.spritecollide(entity, wall_group, False)
+
+        rand = np.random.default_rng(1)
+        for _ in range(50):
+            pos = rand.integers(0, 4 * cell, size=2).tolist()
+            enemy = Enemy((0, 0), 0)
+            enemy.pos = tuple(pos)
+            system = EnemySystem([(0, 0)], 0, occupancy)
+            system.pos[0] = pos
+            possible = [movement.value for movement in enemy._look_around(handle_collision)]
+            for direction, step in enumerate([(0, -1), (0, 1), (-1, 0), (1, 0)]):
+                new_pos = system.pos + np.array(step) * Config.consts['ENEMY_SPEED']
+                blocked = system._blocked(new_pos, [GroupClass.WALL.value])[0]
+                assert blocked == (direction not in possible)
+
+    def test_kill_player_and_explosion(self):
+        """
+        Test if the enemy kills the player and the explosion kills the enemy
+        """
+        cell = Config.consts['CELL_SIZE']
+        system = EnemySystem([(1, 1), (3, 3)], 0, self._create_occupancy([]))
+        player = Player((1, 1))
+        player._move([cell + 10, cell + 10])
+        players = pygame.sprite.Group(player)
+        system.update(players)
+        assert not player.alive()
+
+        probe = pygame.sprite.Sprite()
+        probe.rect = pygame.Rect(3 * cell, 3 * cell, cell, cell)
+        assert len(system.collide(probe, True)) == 1
+        assert len(system) == 1
+        assert [view.rect.topleft for view in system] == [tuple(system.pos[0])]
+
+    def test_game_state(self, monkeypatch):
+        """
+        Test if the game runs with the vectorised enemies
+        """
+        pygame.init()
+        monkeypatch.setitem(Config.consts, 'VECTORISED_ENEMIES', True)
+        monkeypatch.setitem(Config.consts, 'NUM_OF_ENEMIES', 50)
+        g = GameState()
+        assert isinstance(g._enemy_group, EnemySystem)
+        assert len(g._enemy_group) == 50
+        screen = pygame.Surface(Config.get_screen_size())
+        for _ in range(10):
+            g.update([])
+            g.draw(screen)
+        g._enemy_group.empty()
+        g.check_end_game()
+        assert not g.active
+
+
+class TestFlowField:
+    """Test the shared path to the player"""
+
+    @staticmethod
+    def _create_field(walls: List[Tuple[int, int]]) -> FlowField:
+        """
+        Create the field of a 5x5 map with the border
+        """
+        grid = OccupancyGrid(5, 5, Config.consts['CELL_SIZE'])
+        grid.add_all([Wall(pos) for pos in walls], GroupClass.WALL.value)
+        grid.add_all([Wall((x, y)) for x in range(-1, 6) for y in range(-1, 6)
+                      if x in (-1, 5) or y in (-1, 5)], GroupClass.BORDER.value)
+        return FlowField(grid)
+
+    def test_distances_and_directions(self):
+        """
+        Test if the field leads around the walls by the shortest path
+        """
+        field = self._create_field([(1, 0), (1, 1), (1, 2), (1, 3)])
+        field.update((0, 0))
+
+        assert field.distance_at((0, 0)) == 0
+        assert field.distance_at((0, 4)) == 4
+        assert field.distance_at((2, 0)) == 10
+        assert field.distance_at((1, 1)) == UNREACHABLE
+        assert field.distance_at((-1, 0)) == UNREACHABLE
+        assert field.direction_at((0, 0)) is None
+        assert field.direction_at((0, 3)) == Movement.MOVE_UP
+        assert field.direction_at((1, 4)) == Movement.MOVE_LEFT
+        assert field.direction_at((2, 1)) == Movement.MOVE_DOWN
+
+        # Every direction leads to a neighbour one step closer
+        steps = {Movement.MOVE_UP: (0, -1), Movement.MOVE_DOWN: (0, 1),
+                 Movement.MOVE_LEFT: (-1, 0), Movement.MOVE_RIGHT: (1, 0)}
+        for x in range(5):
+            for y in range(5):
+                direction = field.direction_at((x, y))
+                if direction is not None:
+                    step = steps[direction]
+                    assert (field.distance_at((x + step[0], y + step[1])) ==
+                            field.distance_at((x, y)) - 1)
+
+    def test_recompute(self):
+        """
+        Test if the field is recomputed only when the target cell or the walls change
+        """
+        wall = Wall((2, 2))
+        field = self._create_field([])
+        field.occupancy.add(wall, GroupClass.WALL.value)
+
+        assert field.update((0, 0))
+        assert not field.update((0, 0))
+        assert field.update((4, 4))
+        assert field.distance_at((0, 0)) == 8
+        assert field.computations == 2
+
+        field.occupancy.remove(wall)
+        field.invalidate()
+        assert field.update((4, 4))
+        assert field.distance_at((2, 2)) == 4
+        assert field.computations == 3
+
+    def test_unreachable_target(self):
+        """
+        Test if the field has no directions when the player is walled in
+        """
+        field = self._create_field([(1, 0), (0, 1), (1, 1)])
+        field.update((0, 0))
+        assert field.direction_at((2, 2)) is None
+        field.update((-1, 0))
+        assert field.direction_at((0, 1)) is None
+
+    def test_enemies_chase(self):
+        """
+        Test if the sprite and the vectorised enemies turn towards the player in a cell center
+        """
+        cell = Config.consts['CELL_SIZE']
+        field = self._create_field([])
+        field.update((4, 2))
+
+        enemy = Enemy((0, 0), 0)
+        enemy.pos = (2 * cell + 1, 2 * cell)
+        enemy.direction = Movement.MOVE_UP
+        enemy.update(lambda *_: [], field)
+        assert enemy.direction == Movement.MOVE_RIGHT
+        assert enemy.pos == (2 * cell + Config.consts['ENEMY_SPEED'], 2 * cell)
+
+        system = EnemySystem([(2, 2), (2, 0)], 0, field.occupancy)
+        system.pos[1, 1] += cell // 2
+        system.direction[:] = Movement.MOVE_UP.value
+        system.update(pygame.sprite.Group(), field)
+        assert system.direction.tolist() == [Movement.MOVE_RIGHT.value, Movement.MOVE_UP.value]
+
+    def test_game_state(self, monkeypatch):
+        """
+        Test if the chasing enemies share one field that follows the player
+        """
+        pygame.init()
+        monkeypatch.setitem(Config.consts, 'ENEMY_BEHAVIOUR', 'chase')
+        g = GameState()
+        player = g._player_group.sprites()[0]
+        screen = pygame.Surface(Config.get_screen_size())
+        g.update([])
+        g.draw(screen)
+        assert g._flow_field.target == (player.rect.centerx // Config.consts['CELL_SIZE'],
+                                        player.rect.centery // Config.consts['CELL_SIZE'])
+        computations = g._flow_field.computations
+        g.update([])
+        assert g._flow_field.computations == computations
+
+        wall = Wall((0, 0))
+        wall.on_destroy = g._wall_destroyed
+        g._walls_group.add(wall)
+        wall.kill()
+        g.update([])
+        assert g._flow_field.computations == computations + 1
+
+    def test_config(self):
+        """
+        Test if an unknown behaviour falls back to the default
+        """
+        consts = dict(Config.consts)
+        consts['ENEMY_BEHAVIOUR'] = 'flee'
+        assert Config._check_data(consts)['ENEMY_BEHAVIOUR'] == 'wander'
+
+
+class TestDangerMap:
+    """Test the predicted blasts of the pending bombs"""
+
+    @staticmethod
+    def _create_map(walls: List[Wall]) -> DangerMap:
+        """
+        Create the danger map of a 5x5 map with the border
+        """
+        grid = OccupancyGrid(5, 5, Config.consts['CELL_SIZE'])
+        grid.add_all(walls, GroupClass.WALL.value)
+        grid.add_all([Wall((x, y)) for x in range(-1, 6) for y in range(-1, 6)
+                      if x in (-1, 5) or y in (-1, 5)], GroupClass.BORDER.value)
+        return DangerMap(grid)
+
+    def test_plant(self):
+        """
+        Test if the bomb marks the reached cells by the spread of the blast
+        """
+        danger = self._create_map([Wall((3, 1))])
+        danger.plant('bomb', (1, 1), 100, 2)
+        spread = math.ceil(Config.consts['EXPLOSION_SPAWN_COUNTDOWN'] * Config.consts['FPS'])
+
+        assert danger.tick_at((1, 1)) == 100
+        assert danger.tick_at((0, 1)) == 100
+        assert danger.tick_at((1, 3)) == 100 + spread
+        assert danger.tick_at((3, 1)) == 100 + spread
+        assert danger.tick_at((4, 1)) is None
+        assert danger.tick_at((-1, 1)) is None
+        assert danger.time_to_blast((1, 2), 90) == 10
+        assert danger.time_to_blast((4, 4), 90) is None
+        assert danger.ticks[2, 2] == 100
+
+        with pytest.raises(ValueError):
+            danger.ticks[0, 0] = 0
+
+    def test_remove(self):
+        """
+        Test if the removed bomb restores only its cells from the remaining bombs
+        """
+        danger = self._create_map([])
+        danger.plant('early', (1, 1), 50, 1)
+        danger.plant('late', (2, 1), 80, 1)
+        assert danger.tick_at((2, 1)) == 50
+        assert danger.tick_at((1, 1)) == 50
+
+        danger.remove('early')
+        danger.remove('unknown')
+        assert len(danger) == 1
+        assert danger.tick_at((2, 1)) == 80
+        assert danger.tick_at((1, 1)) == 80
+        assert danger.tick_at((1, 2)) is None
+
+        danger.remove('late')
+        assert (danger.ticks == np.iinfo(np.int64).max).all()
+
+    def test_wall_removed(self):
+        """
+        Test if the destroyed wall extends only the rays it stopped
+        """
+        wall = Wall((1, 2))
+        danger = self._create_map([wall])
+        danger.plant('bomb', (1, 1), 10, 3)
+        assert danger.tick_at((1, 2)) == 10
+        assert danger.tick_at((1, 3)) is None
+
+        danger.occupancy.remove(wall)
+        danger.wall_removed((1, 2))
+        assert danger.tick_at((1, 3)) is not None
+        assert danger.tick_at((1, 4)) is not None
+
+    def test_explosion_not_extended(self):
+        """
+        Test if the wall destroyed by an explosion doesn't extend its final rays
+        """
+        wall = Wall((1, 2))
+        danger = self._create_map([wall])
+        danger.plant('explosion', (1, 1), 10, 3, extendable=False)
+        danger.occupancy.remove(wall)
+        danger.wall_removed((1, 2))
+        assert danger.tick_at((1, 2)) == 10
+        assert danger.tick_at((1, 3)) is None
+
+    def test_game_state(self, monkeypatch):
+        """
+        Test if the predicted ticks match the cells burning in the game
+        """
+        pygame.init()
+        monkeypatch.setitem(Config.consts, 'NUM_OF_ENEMIES', 0)
+        g = GameState()
+        # The player survives the blast and the game doesn't end without enemies
+        player = g._player_group.sprites()[0]
+        monkeypatch.setattr(player, 'kill', lambda: None)
+        monkeypatch.setattr(g, 'check_end_game', lambda: None)
+
+        g.update([pygame.event.Event(pygame.KEYDOWN, key=Config.PLANT_BOMB_KEY)])
+        bomb = g._bomb_group.sprites()[0]
+        predicted = {}
+        for x in range(Config.GRID_WIDTH):
+            for y in range(Config.GRID_HEIGHT):
+                if g.danger_map.tick_at((x, y)) is not None:
+                    predicted[(x, y)] = g.danger_map.tick_at((x, y))
+        assert bomb.pos in predicted
+
+        # The blast kills the entities in the burning cells
+        burned = {}
+        handle_collision = g.handle_collision
+
+        def record_blast(entity, groups, dokill):
+            if dokill:
+                burned.setdefault((entity.rect.x // Config.consts['CELL_SIZE'],
+                                   entity.rect.y // Config.consts['CELL_SIZE']), g.tick)
+            return handle_collision(entity, groups, dokill)
+
+        monkeypatch.setattr(g, 'handle_collision', record_blast)
+        spreading = 0
+        for _ in range(1000):
+            if burned and not g._explosion_group:
+                break
+            g.update([])
+            # The cells about to burn stay marked after the bomb detonated
+            for cell, tick in predicted.items():
+                if cell not in burned:
+                    assert g.danger_map.tick_at(cell) == tick
+            if not g._bomb_group and len(burned) < len(predicted):
+                spreading += 1
+        assert spreading > 0
+        assert burned == predicted
+        assert len(g.danger_map) == 0
+
+
+class TestTimerWheel:
+    """Test the scheduled callbacks"""
+
+    def test_fire_at_tick(self):
+        """
+        Test if the timers of all levels fire exactly at their tick
+        """
+        rand = random.Random(3)
+        timers = TimerWheel()
+        fired = []
+        expected = []
+        for _ in range(2000):
+            tick = rand.randint(1, 300000)
+            expected.append(tick)
+            timers.schedule(tick, lambda t=tick: fired.append((t, timers.now)))
+
+        while timers.now < 300000:
+            timers.advance(timers.now + rand.randint(1, 5000))
+            # Timers scheduled between the advances land in the lower levels too
+            tick = timers.now + rand.randint(1, 70000)
+            expected.append(tick)
+            timers.schedule(tick, lambda t=tick: fired.append((t, timers.now)))
+        timers.advance(400000)
+
+        assert all(tick == now for tick, now in fired)
+        assert sorted(tick for tick, _ in fired) == sorted(expected)
+        assert len(timers) == 0
+        assert timers.fired == len(expected)
+
+    def test_order_and_cancel(self):
+        """
+        Test if the timers of a tick fire in the scheduled order and cancelled ones don't
+        """
+        timers = TimerWheel(10)
+        fired = []
+        timers.schedule(15, fired.append, 'first')
+        cancelled = timers.schedule(15, fired.append, 'cancelled')
+        timers.schedule(15, lambda: timers.schedule(15, fired.append, 'same tick'))
+        timers.schedule(15, fired.append, 'last')
+        timers.schedule(3, fired.append, 'past')
+        cancelled.cancel()
+        cancelled.cancel()
+        assert len(timers) == 4
+
+        timers.advance(11)
+        assert fired == ['past']
+        timers.advance(15)
+        assert fired == ['past', 'first', 'last', 'same tick']
+        assert len(timers) == 0
+
+    def test_order_after_cascade(self):
+        """
+        Test if a cascaded timer fires before the timer of its tick scheduled later
+        """
+        timers = TimerWheel(0)
+        fired = []
+        timers.schedule(100, fired.append, 'cascaded')
+        timers.advance(50)
+        timers.schedule(100, fired.append, 'direct')
+        timers.schedule(100, lambda: timers.schedule(100, fired.append, 'same tick'))
+        timers.advance(100)
+        assert fired == ['cascaded', 'direct', 'same tick']
+
+    def test_idle(self):
+        """
+        Test if the idle wheel skips to the tick
+        """
+        timers = TimerWheel()
+        timers.advance(10 ** 9)
+        assert timers.now == 10 ** 9
+        fired = []
+        timers.schedule(timers.now + 100, fired.append, True)
+        timers.advance(timers.now + 100)
+        assert fired == [True]
+
+
+class TestInterpolation:
+    """Test the drawing between the fixed ticks"""
+
+    def test_player(self):
+        """
+        Test if the moved player is drawn between its last two positions
+        """
+        pygame.init()
+        g = GameState()
+        g._enemy_group.empty()
+        player = g._player_group.sprites()[0]
+        screen = pygame.Surface(Config.get_screen_size())
+        g.update([])
+        start = player.rect.topleft
+        g._previous_pos[player] = (start[0] - 10, start[1] + 20)
+
+        g.interpolation = 0.25
+        g.draw(screen)
+        assert player.rect.move(-8, 15) in g._dirty_rects
+        assert player.rect.topleft == start
+
+        g.interpolation = 1.0
+        g.draw(screen)
+        assert player.rect in g._dirty_rects
+
+    def test_enemy_system(self):
+        """
+        Test if the vectorised enemies are drawn between their last two positions
+        """
+        grid = OccupancyGrid(5, 5, Config.consts['CELL_SIZE'])
+        system = EnemySystem([(2, 2)], 0, grid)
+        system.direction[:] = Movement.MOVE_RIGHT.value
+        system.update(pygame.sprite.Group())
+        speed = Config.consts['ENEMY_SPEED']
+        x = 2 * Config.consts['CELL_SIZE']
+
+        assert system.interpolated(0)[0].rect.x == x
+        assert system.interpolated(0.5)[0].rect.x == x + round(speed / 2)
+        assert system.interpolated(1)[0].rect.x == x + speed
+
+    def test_config(self):
+        """
+        Test if an invalid fast-forward falls back to the default
+        """
+        consts = dict(Config.consts)
+        consts['FAST_FORWARD'] = -2
+        assert Config._check_data(consts)['FAST_FORWARD'] == 1
+        consts['FAST_FORWARD'] = -0.5
+        assert Config._check_data(consts)['FAST_FORWARD'] == 1
+        consts['FAST_FORWARD'] = 0.5
+        assert Config._check_data(consts)['FAST_FORWARD'] == 0.5
+        consts['FAST_FORWARD'] = 0
+        assert Config._check_data(consts)['FAST_FORWARD'] == 0
+
+
+class TestReplay:
+    """Test the recording and the replay of the games"""
+
+    tiles = {'Q': ('wall_0.png', True), 'Y': ('space_0.png', False)}
+
+    def _grid(self) -> List[List[str]]:
+        """
+        Level with a few walls
+        """
+        grid = [['Y'] * Config.GRID_WIDTH for _ in range(Config.GRID_HEIGHT)]
+        for x in range(2, Config.GRID_WIDTH, 4):
+            grid[2][x] = 'Q'
+        return grid
+
+    def _record(self, path: str, frames: List[List[int]]) -> GameState:
+        """
+        Play the scripted game and record it
+        """
+        recorder = Recorder(path)
+        g = GameState(7)
+        g.recorder = recorder
+        g.input_source = ScriptedInput(frames)
+        g.retrieve_information(LevelPack.create_level_information(self._grid(), self.tiles))
+        for _ in frames:
+            g.update(g.input_source.poll())
+        recorder.save()
+        return g
+
+    def test_masks(self):
+        """
+        Test if the keys survive the conversion to the masks
+        """
+        keys = [Config.MOVE_LEFT, Config.PLANT_BOMB_KEY]
+        assert sorted(mask_to_keys(keys_to_mask(keys))) == sorted(keys)
+        assert keys_to_mask(KeyState(keys)) == keys_to_mask(set(keys))
+        assert keys_to_mask([]) == 0
+
+    def test_replay_input(self):
+        """
+        Test if the recorded runs are fed tick by tick
+        """
+        bomb = keys_to_mask([Config.PLANT_BOMB_KEY])
+        up = keys_to_mask([Config.MOVE_UP])
+        source = ReplayInput([[up, 0, 2], [up | bomb, bomb, 1]])
+        assert not source.poll() and source.get_pressed()[Config.MOVE_UP]
+        assert not source.poll()
+        events = source.poll()
+        assert [(event.type, event.key) for event in events] == [
+            (pygame.KEYDOWN, Config.PLANT_BOMB_KEY)]
+        assert source.get_pressed()[Config.PLANT_BOMB_KEY]
+        assert not source.poll() and not source.get_pressed()[Config.MOVE_UP]
+
+    def test_record_and_replay(self, tmp_path):
+        """
+        Test if the replayed game ends in the recorded state
+        """
+        pygame.init()
+        path = str(tmp_path / 'game.rec')
+        keys = [Config.MOVE_UP, Config.MOVE_DOWN, Config.MOVE_LEFT, Config.MOVE_RIGHT,
+                Config.PLANT_BOMB_KEY]
+        frames = list(ScriptedInput.random_frames(400, keys, seed=5))
+        g = self._record(path, frames)
+
+        replayer = Replayer(path)
+        # Held keys are stored once per run
+        assert len(replayer.recording['inputs']) < len(frames)
+        result = replayer.run()
+        assert result['ticks'] == len(frames)
+        assert result['match']
+        assert result['hash'] == g.state_hash()
+
+    def test_mismatch(self, tmp_path, monkeypatch):
+        """
+        Test if a changed simulation is detected and the config is restored
+        """
+        pygame.init()
+        path = str(tmp_path / 'game.rec')
+        frames = [[Config.MOVE_RIGHT]] * 30 + [[Config.MOVE_DOWN]] * 30
+        self._record(path, frames)
+
+        speed = Config.consts['PLAYER_SPEED']
+        replayer = Replayer(path)
+        replayer.recording['consts']['PLAYER_SPEED'] = speed - 1
+        assert not replayer.run()['match']
+        assert Config.consts['PLAYER_SPEED'] == speed
+
+        monkeypatch.setitem(Config.consts, 'PLAYER_SPEED', speed - 1)
+        assert Replayer(path).run()['match']
+
+
+class TestRandomStreams:
+    """Test the random streams of the entities"""
+
+    def test_keys_and_generators(self):
+        """
+        Test if the streams are reproducible and differ by the seed, the name and the id
+        """
+        streams = RandomStreams(7)
+        assert streams.key('enemy', 3) == RandomStreams(7).key('enemy', 3)
+        keys = {streams.key('enemy', 3), streams.key('enemy', 4), streams.key('spawn', 3),
+                RandomStreams(8).key('enemy', 3)}
+        assert len(keys) == 4
+        assert (streams.generator('enemy', 3).random(5).tolist()
+                == streams.generator('enemy', 3).random(5).tolist())
+
+    def test_vectorised_draws(self):
+        """
+        Test if the draw of an id doesn't depend on the other ids in the batch
+        """
+        streams = RandomStreams(7)
+        batch = streams.uniform('turn', np.arange(1000), 5)
+        assert batch.shape == (1000,)
+        assert ((batch >= 0) & (batch < 1)).all()
+        assert abs(batch.mean() - 0.5) < 0.05
+        assert streams.uniform('turn', [999, 3], 5).tolist() == [batch[999], batch[3]]
+        assert streams.uniform('turn', [[3]], 6)[0, 0] != batch[3]
+        assert set(streams.integers('image', np.arange(100), 0, 3).tolist()) == {0, 1, 2}
+
+    def test_enemies_ignore_the_others(self):
+        """
+        Test if creating another enemy or a global reseed doesn't change the movement
+        """
+        def directions(create_other):
+            enemy = Enemy((0, 0), RandomStreams(1).key('enemy', 0))
+            if create_other:
+                Enemy((0, 0), RandomStreams(1).key('enemy', 1))
+                random.seed(0)
+            return [enemy._pick_random(list(Movement)) for _ in range(20)]
+
+        assert directions(False) == directions(True)
+
+    def test_system_independent_of_removals(self):
+        """
+        Test if removing an enemy doesn't change the movement of the others
+        """
+        grid = OccupancyGrid(5, 5, Config.consts['CELL_SIZE'])
+        grid.add_all([Wall((x, y)) for x in range(-1, 6) for y in range(-1, 6)
+                      if x in (-1, 5) or y in (-1, 5)], GroupClass.BORDER.value)
+        full = EnemySystem([(0, 0), (2, 2), (4, 4)], 3, grid)
+        reduced = EnemySystem([(0, 0), (2, 2), (4, 4)], 3, grid)
+        reduced._keep(np.array([False, True, True]))
+        for _ in range(500):
+            full.update(pygame.sprite.Group())
+            reduced.update(pygame.sprite.Group())
+        assert full.pos[1:].tolist() == reduced.pos.tolist()
+        assert full.direction[1:].tolist() == reduced.direction.tolist()
+
+    def test_game_reset(self):
+        """
+        Test if a reset game places and moves the enemies the same
+        """
+        pygame.init()
+        g = GameState(11)
+        first = [enemy.rect.topleft for enemy in g._enemy_group]
+        for _ in range(30):
+            g.update([])
+        moved = [enemy.rect.topleft for enemy in g._enemy_group]
+        g._init_state()
+        assert [enemy.rect.topleft for enemy in g._enemy_group] == first
+        for _ in range(30):
+            g.update([])
+        assert [enemy.rect.topleft for enemy in g._enemy_group] == moved
+
+
 @pytest.mark.parametrize("input_pos, expected_result", [
     ((0.5, 0.5), (Config.consts['WIDTH'] // 2, Config.consts['HEIGHT'] // 2)),
     ((0.25, 0.75), (Config.consts['WIDTH'] // 4, 3 * Config.consts['HEIGHT'] // 4)),
@@ -1,14 +1,116 @@
 """This module is responsible for starting the application."""
+import argparse
+import os
+import sys
+import time
+from app.core.config import Config
+from app.core.input_source import ScriptedInput
 from app.core.state_manager import StateManager
 
 
-def run_game() -> None:
+def run_game(args: argparse.Namespace) -> None:
     """
     Run the main game
+    :param args: parsed command line arguments
     """
-    game = StateManager()
+    game = StateManager(record=args.record)
     game.game_loop()
 
 
+def run_replay(args: argparse.Namespace) -> None:
+    """
+    Re-run a recorded game without a window and verify its final state
+    :param args: parsed command line arguments
+    """
+    # Has to be set before the display is initialized
+    os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    # pylint: disable=import-outside-toplevel
+    import pygame
+    from app.core.replay import Replayer
+
+    pygame.init()
+    Config.import_from_json()
+    result = Replayer(args.replay).run()
+    print(f"{result['ticks']} ticks in {result['seconds']:.2f} s "
+          f"({result['ticks'] / max(result['seconds'], 1e-9):.0f} ticks/s)")
+    if not result['match']:
+        print(f"State hash mismatch: {result['hash']} != {result['expected']}")
+        sys.exit(1)
+    print(f"State hash matches: {result['hash']}")
+
+
+def run_headless(args: argparse.Namespace) -> None:
+    """
+    Run the game without a window, driven by a random script
+    :param args: parsed command line arguments
+    """
+    keys = [Config.MOVE_UP, Config.MOVE_DOWN, Config.MOVE_LEFT, Config.MOVE_RIGHT,
+            Config.PLANT_BOMB_KEY]
+    script = ScriptedInput(ScriptedInput.random_frames(args.frames, keys, args.seed))
+
+    # Skip the menu, start with the level generation or a level from the pack
+    information = None
+    start_state = 1
+    if args.level_pack:
+        information = {'level_pack': args.level_pack, 'level': args.level}
+        start_state = 2
+
+    game = StateManager(headless=True, render=not args.no_render, uncapped=not args.capped,
+                        input_source=script, start_state=start_state, information=information,
+                        fast_forward=args.fast_forward, record=args.record)
+    start = time.perf_counter()
+    game.game_loop()
+    elapsed = time.perf_counter() - start
+    print(f'{game.tick_count} ticks and {game.frame_count} frames in {elapsed:.2f} s '
+          f'({game.tick_count / max(elapsed, 1e-9):.0f} ticks/s, '
+          f'{game.frame_count / max(elapsed, 1e-9):.0f} FPS)')
+
+
+def non_negative(value: str) -> float:
+    """
+    :param value: command line value
+    :return: the value as a number
+    :raises argparse.ArgumentTypeError: if the value is not a number or is negative
+    """
+    try:
+        number = float(value)
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(f'invalid number: {value}') from error
+    if not number >= 0:
+        raise argparse.ArgumentTypeError(f'must not be negative: {value}')
+    return number
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    :return: parsed command line arguments
+    """
+    parser = argparse.ArgumentParser(description='Collapsed Bomberman')
+    parser.add_argument('--headless', action='store_true',
+                        help='run without a window, driven by a random input script')
+    parser.add_argument('--no-render', action='store_true',
+                        help='do not draw the states in the headless mode')
+    parser.add_argument('--capped', action='store_true',
+                        help='limit the headless mode to the configured FPS')
+    parser.add_argument('--frames', type=int, default=3600,
+                        help='number of ticks of the input script')
+    parser.add_argument('--fast-forward', type=non_negative, default=0,
+                        help='simulated seconds per real second in the headless mode, '
+                             '0 runs one tick per frame as fast as possible')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the input script')
+    parser.add_argument('--level-pack', help='play the level from the pack instead of WFC')
+    parser.add_argument('--level', type=int, default=0, help='number of the level in the pack')
+    parser.add_argument('--record', help='record the input of the last game to the file')
+    parser.add_argument('--replay', help='re-run the recorded game without a window '
+                                         'and verify its final state')
+    return parser.parse_args()
+
+
 if __name__ == '__main__':
-    run_game()
+    arguments = parse_args()
+    if arguments.replay:
+        run_replay(arguments)
+    elif arguments.headless:
+        run_headless(arguments)
+    else:
+        run_game(arguments)